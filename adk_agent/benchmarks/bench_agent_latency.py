@@ -0,0 +1,400 @@
+"""
+End-to-end latency benchmark of the agent stack, without calling Gemini.
+
+The agents of vayu_agent/agent.py run unchanged, except that each one's model is replaced by
+a scripted model returning a fixed sequence of responses per scenario: the tool calls a real
+model would request, then a final answer. The tools are served by the real MCP server
+(../airflow-mcp/server.py), started against a local fake Airflow API (fake_airflow.py), so
+every tool call goes over SSE, through the server and to HTTP as it does in production.
+
+Each run is split into hops on a single timeline:
+  setup                 run start until the orchestrator's model request (session, answer cache)
+  routing               orchestrator model request until transfer_to_agent (fast path or model)
+  delegation            transfer until the sub-agent's model request (agent switch, tool catalogue)
+  callbacks             model request until the model is called (before_model callbacks, compaction)
+  request encoding      the model request serialized to JSON, as the model API client would
+  model                 the scripted model itself (0 unless --model-latency-ms is set)
+  tool dispatch         model response until its tool calls start
+  tool calls            while any tool call is in flight (each call is also reported on its own)
+  result serialization  last tool result until the next model request (function responses, session)
+  finish                final answer until the run ends (after-agent callbacks)
+
+The first run of each scenario is reported as cold (MCP session and tool catalogue are
+set up during its delegation hop); the others are summarized as median and max.
+
+Usage:
+    python benchmarks/bench_agent_latency.py [--repeat 5] [--scenario list_dags] [--no-fast-router]
+        [--answer-cache] [--model-latency-ms 0] [--airflow-latency-ms 0] [--json out.json]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MCP_DIR = os.path.join(os.path.dirname(BASE_DIR), "airflow-mcp")
+sys.path.insert(0, BASE_DIR)
+
+from google.adk.models.base_llm import BaseLlm  # noqa: E402
+from google.adk.models.llm_request import LlmRequest  # noqa: E402
+from google.adk.models.llm_response import LlmResponse  # noqa: E402
+from google.adk.plugins.base_plugin import BasePlugin  # noqa: E402
+from google.genai import types  # noqa: E402
+
+from fake_airflow import FAILED_DAG_ID, FAILED_RUN_ID, FAILED_TASKS, FakeAirflow  # noqa: E402
+
+ORCHESTRATOR = "AirflowOrchestratorAgent"
+TROUBLESHOOTER = "DagTroubleShooterAgent"
+METADATA = "AirflowMetadataAgent"
+HOPS = [
+    "setup", "routing", "delegation", "callbacks", "request encoding", "model",
+    "tool dispatch", "tool calls", "result serialization", "finish", "other",
+]
+
+# A model turn: the tool calls to request, or the final answer
+Turn = Union[List[Tuple[str, Dict[str, Any]]], str]
+
+
+class Scenario(NamedTuple):
+    query: str
+    # The sub-agent the request should reach, and the scripted turns of that sub-agent
+    target: str
+    turns: List[Turn]
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    # Clear-cut request, routed by keyword, one tool call
+    "list_dags": Scenario(
+        "List all active DAGs",
+        METADATA,
+        [[("get_dags", {"only_active": True})], "There are 20 active DAGs."],
+    ),
+    # Clear-cut request, one server-side fan-out tool
+    "diagnose_failure": Scenario(
+        f"Why did the {FAILED_DAG_ID} DAG fail?",
+        TROUBLESHOOTER,
+        [[("diagnose_failed_run", {"dag_id": FAILED_DAG_ID})], "The transform tasks failed with a KeyError."],
+    ),
+    # Ambiguous request routed by the model, then a batch of concurrent tool calls
+    "failed_task_logs": Scenario(
+        f"Show me the failed tasks of the last {FAILED_DAG_ID} run",
+        TROUBLESHOOTER,
+        [
+            [("list_task_instances", {"dag_id": FAILED_DAG_ID, "dag_run_id": FAILED_RUN_ID, "state": ["failed"]})],
+            [
+                ("get_task_instance_log", {"dag_id": FAILED_DAG_ID, "dag_run_id": FAILED_RUN_ID,
+                                           "task_id": task_id, "try_number": 2})
+                for task_id in FAILED_TASKS
+            ],
+            "Three transform tasks failed on their retry with KeyError: 'customer_id'.",
+        ],
+    ),
+}
+
+
+class Mark(NamedTuple):
+    at: float
+    kind: str
+    agent: Optional[str] = None
+    detail: Any = None
+
+
+class Timeline:
+    """Marks recorded during one run, by the plugin and by the scripted models."""
+
+    def __init__(self):
+        self.marks: List[Mark] = []
+
+    def mark(self, kind: str, agent: Optional[str] = None, detail: Any = None) -> None:
+        self.marks.append(Mark(time.perf_counter(), kind, agent, detail))
+
+
+class ScriptDirector:
+    """Plays the scripted turns of the current scenario and records the model's marks."""
+
+    def __init__(self, model_latency: float = 0.0):
+        self.model_latency = model_latency
+        self.timeline = Timeline()
+        self.scripts: Dict[str, List[Turn]] = {}
+        self.request_bytes: List[int] = []
+
+    def start(self, scenario: Scenario) -> Timeline:
+        # The orchestrator's model, when it is asked, always delegates to the scenario's target
+        self.scripts = {
+            ORCHESTRATOR: [[("transfer_to_agent", {"agent_name": scenario.target})]],
+            scenario.target: list(scenario.turns),
+        }
+        self.timeline = Timeline()
+        self.request_bytes = []
+        return self.timeline
+
+    async def respond(self, agent_name: str, llm_request: LlmRequest) -> LlmResponse:
+        self.timeline.mark("model_start", agent_name)
+        body = json.dumps({
+            "contents": [content.model_dump(mode="json", exclude_none=True) for content in llm_request.contents],
+            "config": llm_request.config.model_dump(mode="json", exclude_none=True) if llm_request.config else None,
+        })
+        self.request_bytes.append(len(body))
+        self.timeline.mark("encoded", agent_name)
+        if self.model_latency:
+            await asyncio.sleep(self.model_latency)
+        script = self.scripts.get(agent_name)
+        if not script:
+            raise RuntimeError(f"The scenario has no scripted model turn left for {agent_name}")
+        turn = script.pop(0)
+        if isinstance(turn, str):
+            parts = [types.Part(text=turn)]
+        else:
+            parts = [types.Part(function_call=types.FunctionCall(name=name, args=args)) for name, args in turn]
+        self.timeline.mark("model_end", agent_name)
+        return LlmResponse(content=types.Content(role="model", parts=parts))
+
+
+class ScriptedLlm(BaseLlm):
+    """Deterministic stand-in for an agent's model."""
+
+    agent_name: str
+    director: ScriptDirector
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False):
+        yield await self.director.respond(self.agent_name, llm_request)
+
+
+class TimingPlugin(BasePlugin):
+    """Records run, model request, transfer and tool call marks on the director's timeline."""
+
+    def __init__(self, director: ScriptDirector):
+        super().__init__(name="latency_timing")
+        self.director = director
+
+    async def before_run_callback(self, *, invocation_context):
+        self.director.timeline.mark("run_start")
+        return None
+
+    async def before_model_callback(self, *, callback_context, llm_request):
+        self.director.timeline.mark("model_request", callback_context.agent_name)
+        return None
+
+    async def on_event_callback(self, *, invocation_context, event):
+        for call in event.get_function_calls():
+            if call.name == "transfer_to_agent":
+                self.director.timeline.mark("transfer", event.author, call.args.get("agent_name"))
+        return None
+
+    async def before_tool_callback(self, *, tool, tool_args, tool_context):
+        if tool.name != "transfer_to_agent":
+            self.director.timeline.mark("tool_start", tool_context.agent_name, (tool_context.function_call_id, tool.name))
+        return None
+
+    async def after_tool_callback(self, *, tool, tool_args, tool_context, result):
+        if tool.name != "transfer_to_agent":
+            self.director.timeline.mark("tool_end", tool_context.agent_name, (tool_context.function_call_id, tool.name))
+        return None
+
+    async def after_run_callback(self, *, invocation_context):
+        self.director.timeline.mark("run_end")
+        return None
+
+
+def split_hops(marks: List[Mark]) -> Dict[str, Any]:
+    """Attribute every span between consecutive marks to a hop, and time each tool call."""
+    hops: Dict[str, float] = defaultdict(float)
+    tools: List[Tuple[str, float]] = []
+    inflight: Dict[str, Mark] = {}
+    routing = transferred = False
+    routed_by_model = False
+    for prev, mark in zip(marks, marks[1:]):
+        span = (mark.at - prev.at) * 1000
+        if inflight:
+            hop = "tool calls"
+        elif routing:
+            hop = "routing"
+        elif prev.kind == "run_start":
+            hop = "setup"
+        elif prev.kind == "transfer":
+            hop = "delegation"
+        elif prev.kind == "model_request":
+            hop = "callbacks"
+        elif prev.kind == "model_start":
+            hop = "request encoding"
+        elif prev.kind == "encoded":
+            hop = "model"
+        elif prev.kind == "model_end":
+            hop = "tool dispatch" if mark.kind == "tool_start" else "finish"
+        elif prev.kind == "tool_end":
+            hop = "result serialization"
+        else:
+            hop = "other"
+        hops[hop] += span
+
+        if mark.kind == "model_request" and mark.agent == ORCHESTRATOR and not transferred:
+            routing = True
+        elif mark.kind == "model_start" and routing:
+            routed_by_model = True
+        elif mark.kind == "transfer":
+            routing, transferred = False, True
+        elif mark.kind == "tool_start":
+            inflight[mark.detail[0]] = mark
+        elif mark.kind == "tool_end":
+            started = inflight.pop(mark.detail[0], None)
+            if started is not None:
+                tools.append((mark.detail[1], (mark.at - started.at) * 1000))
+    return {
+        "hops": dict(hops),
+        "tools": tools,
+        "total": (marks[-1].at - marks[0].at) * 1000,
+        "routing": "model" if routed_by_model else "fast path",
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_mcp_server(airflow_url: str, port: int, log) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "AIRFLOW_HOST": airflow_url,
+        "MCP_HOST": "127.0.0.1",
+        "MCP_PORT": str(port),
+        "MCP_TRANSPORT": "sse",
+        "LOG_LEVEL": "warning",
+        "PYTHONWARNINGS": "ignore",
+    }
+    process = subprocess.Popen([sys.executable, "server.py"], cwd=MCP_DIR, env=env, stdout=log, stderr=log)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"The MCP server exited with code {process.returncode}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("The MCP server did not start within 60 s")
+
+
+async def run_scenarios(args: argparse.Namespace, names: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    from google.adk.runners import Runner
+    from google.adk.sessions import InMemorySessionService
+
+    from vayu_agent import agent as agent_module
+
+    director = ScriptDirector(model_latency=args.model_latency_ms / 1000)
+    root_agent = agent_module.get_root_agent()
+    for llm_agent in [root_agent, *root_agent.sub_agents]:
+        llm_agent.model = ScriptedLlm(model="scripted", agent_name=llm_agent.name, director=director)
+    sessions = InMemorySessionService()
+    runner = Runner(agent=root_agent, app_name="bench", session_service=sessions, plugins=[TimingPlugin(director)])
+
+    results: Dict[str, List[Dict[str, Any]]] = {}
+    try:
+        for name in names:
+            scenario = SCENARIOS[name]
+            results[name] = []
+            for index in range(args.repeat):
+                session = await sessions.create_session(app_name="bench", user_id="bench")
+                timeline = director.start(scenario)
+                message = types.Content(role="user", parts=[types.Part(text=scenario.query)])
+                answer = None
+                async for event in runner.run_async(user_id="bench", session_id=session.id, new_message=message):
+                    if event.is_final_response() and event.content and event.content.parts:
+                        answer = "".join(part.text or "" for part in event.content.parts)
+                run = split_hops(timeline.marks)
+                run["request_bytes"] = max(director.request_bytes, default=0)
+                run["answered"] = bool(answer)
+                results[name].append(run)
+    finally:
+        await agent_module.get_mcp_toolset().close()
+    return results
+
+
+def report(name: str, runs: List[Dict[str, Any]]) -> None:
+    cold, warm = runs[0], runs[1:] or runs[:1]
+    print(f"\n{name}: {SCENARIOS[name].query!r}")
+    print(f"  routed by {cold['routing']} to {SCENARIOS[name].target}, "
+          f"largest model request {cold['request_bytes']} bytes")
+    print(f"  {'hop':<28}{'cold ms':>10}{'median ms':>12}{'max ms':>10}")
+
+    def row(label: str, values: List[float], cold_value: float) -> None:
+        print(f"  {label:<28}{cold_value:>10.1f}{statistics.median(values):>12.1f}{max(values):>10.1f}")
+
+    for hop in HOPS:
+        values = [run["hops"].get(hop, 0.0) for run in warm]
+        if any(values) or cold["hops"].get(hop):
+            row(hop, values, cold["hops"].get(hop, 0.0))
+    calls: Dict[str, List[float]] = defaultdict(list)
+    cold_calls: Dict[str, List[float]] = defaultdict(list)
+    for run in warm:
+        for tool, ms in run["tools"]:
+            calls[tool].append(ms)
+    for tool, ms in cold["tools"]:
+        cold_calls[tool].append(ms)
+    for tool, values in calls.items():
+        count = len(values) // len(warm)
+        row(f"  {tool}" + (f" (x{count})" if count > 1 else ""), values, statistics.median(cold_calls[tool] or [0.0]))
+    row("total", [run["total"] for run in warm], cold["total"])
+    if not all(run["answered"] for run in runs):
+        print("  WARNING: some runs ended without a final answer")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per scenario; the first is reported as cold")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="Scenario to run (default: all)")
+    parser.add_argument("--no-fast-router", action="store_true", help="Route every request through the orchestrator's model")
+    parser.add_argument("--answer-cache", action="store_true", help="Keep the answer cache on (repeats then hit it)")
+    parser.add_argument("--model-latency-ms", type=float, default=0.0, help="Simulated latency of each model call")
+    parser.add_argument("--airflow-latency-ms", type=float, default=0.0, help="Latency of each fake Airflow request")
+    parser.add_argument("--json", help="Write the raw per-run hops to this file")
+    args = parser.parse_args()
+
+    # ADK warns about every MCP tool without auth configuration each time it builds one
+    logging.getLogger("google_adk").setLevel(logging.ERROR)
+    # Read by the agent modules when the agents are built, so set them first
+    os.environ["VAYU_FAST_ROUTER"] = "0" if args.no_fast_router else "1"
+    os.environ["VAYU_ANSWER_CACHE"] = "1" if args.answer_cache else "0"
+    port = free_port()
+    os.environ["MCP_HOST"] = "127.0.0.1"
+    os.environ["MCP_PORT"] = str(port)
+
+    airflow = FakeAirflow(latency=args.airflow_latency_ms / 1000).start()
+    with tempfile.TemporaryFile(mode="w+") as log:
+        try:
+            server = start_mcp_server(airflow.url, port, log)
+        except RuntimeError:
+            log.seek(0)
+            print(log.read()[-2000:], file=sys.stderr)
+            raise
+        try:
+            results = asyncio.run(run_scenarios(args, args.scenario or list(SCENARIOS)))
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+            airflow.stop()
+
+    print(f"Agent latency with a scripted model ({args.repeat} runs per scenario, "
+          f"model {args.model_latency_ms:g} ms, Airflow {args.airflow_latency_ms:g} ms per request)")
+    for name, runs in results.items():
+        report(name, runs)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nWrote {args.json}")
+    return 0 if all(run["answered"] for runs in results.values() for run in runs) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""
+Import-time benchmark for the agent package, failing when importing it gets slower.
+
+Each run imports vayu_agent in a fresh interpreter and compares the time against the budget
+in import_budget.json. The run also fails when the import loads google.adk, the MCP client
+or one of the agent modules, which should only load once an agent is first accessed. Building
+the agent hierarchy on first access is timed as well, for information; it opens no connection.
+
+Usage:
+    python benchmarks/bench_import_time.py [--repeat 7] [--budget-ms 50] [--update]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BUDGET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "import_budget.json")
+# Modules that must only load on first access to an agent
+LAZY_MODULES = [
+    "google.adk", "google.genai", "mcp", "vayu_agent.answer_cache", "vayu_agent.compaction",
+    "vayu_agent.mcp_tools", "vayu_agent.router",
+]
+
+PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import vayu_agent
+t1 = time.perf_counter()
+loaded = [name for name in %r if name in sys.modules]
+build_ms = None
+if %r:
+    vayu_agent.agent.root_agent
+    build_ms = (time.perf_counter() - t1) * 1000
+print(json.dumps({"import_ms": (t1 - t0) * 1000, "build_ms": build_ms, "loaded": loaded}))
+"""
+
+
+def measure(repeat: int, build: bool) -> List[Dict]:
+    env = {**os.environ, "PYTHONPATH": BASE_DIR, "PYTHONWARNINGS": "ignore"}
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE % (LAZY_MODULES, build)],
+            cwd=BASE_DIR, env=env, capture_output=True, text=True, check=True,
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return runs
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--budget-ms", type=float, help="Override the budget from import_budget.json")
+    parser.add_argument("--update", action="store_true", help="Record the measured time (plus headroom) as the budget")
+    parser.add_argument("--skip-build", action="store_true", help="Do not time building the agents on first access")
+    args = parser.parse_args()
+
+    runs = measure(args.repeat, build=False)
+    import_ms = statistics.median(run["import_ms"] for run in runs)
+    print(f"vayu_agent import: {import_ms:8.1f} ms (median of {args.repeat})")
+    if not args.skip_build:
+        # Building pulls in google.adk, which dominates; one run is enough to show the cost
+        build_ms = measure(1, build=True)[0]["build_ms"]
+        print(f"first agent access: {build_ms:7.1f} ms (paid by whoever uses an agent, not by importers)")
+
+    if args.update:
+        with open(BUDGET_PATH, "w", encoding="utf-8") as f:
+            json.dump({"package_import_ms": round(import_ms * 1.5 + 10)}, f, indent=2)
+            f.write("\n")
+        print(f"Updated {BUDGET_PATH}")
+        return 0
+
+    failures = []
+    if args.budget_ms is not None:
+        budget_ms = args.budget_ms
+    else:
+        with open(BUDGET_PATH, "r", encoding="utf-8") as f:
+            budget_ms = json.load(f)["package_import_ms"]
+    if import_ms > budget_ms:
+        failures.append(f"vayu_agent import took {import_ms:.1f} ms, over the {budget_ms:g} ms budget")
+    loaded = sorted({name for run in runs for name in run["loaded"]})
+    if loaded:
+        failures.append(f"importing vayu_agent loaded {', '.join(loaded)}, which should load on first use")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print(f"OK: within the {budget_ms:g} ms budget")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+"""
+Local fake of the Airflow REST API (v1), serving a small deterministic dataset.
+
+Used by the agent benchmarks so the real MCP server can run without an Airflow deployment.
+It covers the endpoints the MCP tools read: DAGs, DAG sources, DAG runs, task instances, their
+tries and logs, import errors, datasets and health, including the `~` wildcards. Every DAG has
+a few runs; the latest run of data_pipeline_etl failed in three transform tasks, each with a
+retry and a log ending in a traceback. Each request can be delayed to model network latency.
+
+Usage:
+    python benchmarks/fake_airflow.py [--port 8080] [--latency-ms 0]
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+FAILED_DAG_ID = "data_pipeline_etl"
+FAILED_RUN_ID = "scheduled__2024-01-05T00:00:00+00:00"
+FAILED_TASKS = ["transform_orders", "transform_customers", "transform_payments"]
+RUNS_PER_DAG = 5
+LOG_LINES = 200
+
+
+def _dag(dag_id: str) -> Dict[str, Any]:
+    return {
+        "dag_id": dag_id,
+        "description": f"Fake DAG {dag_id}",
+        "file_token": f"{dag_id}.py",
+        "fileloc": f"/opt/airflow/dags/{dag_id}.py",
+        "is_active": True,
+        "is_paused": False,
+        "owners": ["data-eng"],
+        "schedule_interval": {"__type": "CronExpression", "value": "0 0 * * *"},
+        "tags": [{"name": "fake"}],
+        "last_parsed_time": "2024-01-05T00:00:00+00:00",
+    }
+
+
+def _run(dag_id: str, day: int) -> Dict[str, Any]:
+    run_id = f"scheduled__2024-01-0{day}T00:00:00+00:00"
+    failed = dag_id == FAILED_DAG_ID and run_id == FAILED_RUN_ID
+    return {
+        "dag_id": dag_id,
+        "dag_run_id": run_id,
+        "execution_date": f"2024-01-0{day}T00:00:00+00:00",
+        "logical_date": f"2024-01-0{day}T00:00:00+00:00",
+        "start_date": f"2024-01-0{day}T00:00:05+00:00",
+        "end_date": f"2024-01-0{day}T00:12:00+00:00",
+        "state": "failed" if failed else "success",
+        "run_type": "scheduled",
+        "conf": {},
+    }
+
+
+def _task_instance(dag_id: str, run_id: str, task_id: str, state: str) -> Dict[str, Any]:
+    failed = state == "failed"
+    return {
+        "dag_id": dag_id,
+        "dag_run_id": run_id,
+        "task_id": task_id,
+        "map_index": -1,
+        "state": state,
+        "try_number": 2 if failed else 1,
+        "max_tries": 1,
+        "operator": "PythonOperator",
+        "duration": 42.5,
+        "start_date": "2024-01-05T00:01:00+00:00",
+        "end_date": "2024-01-05T00:01:42+00:00",
+        "hostname": "worker-0.airflow.svc.cluster.local",
+        "pool": "default_pool",
+        "queue": "default",
+    }
+
+
+def _task_instances(dag_id: str, run_id: str) -> List[Dict[str, Any]]:
+    failed_run = dag_id == FAILED_DAG_ID and run_id == FAILED_RUN_ID
+    tasks = [("extract", "success")]
+    tasks += [(task_id, "failed" if failed_run else "success") for task_id in FAILED_TASKS]
+    tasks += [("load", "upstream_failed" if failed_run else "success"), ("notify", "success")]
+    return [_task_instance(dag_id, run_id, task_id, state) for task_id, state in tasks]
+
+
+def _log(task_id: str, try_number: int) -> str:
+    lines = [
+        f"[2024-01-05, 00:01:{i % 60:02d}] {{taskinstance.py:1234}} INFO - {task_id} try {try_number}: processed batch {i}"
+        for i in range(LOG_LINES)
+    ]
+    lines += [
+        "[2024-01-05, 00:01:42] {taskinstance.py:1937} ERROR - Task failed with exception",
+        "Traceback (most recent call last):",
+        f'  File "/opt/airflow/dags/{FAILED_DAG_ID}.py", line 42, in {task_id}',
+        "    frame = read_partition(source, day)",
+        "KeyError: 'customer_id'",
+    ]
+    return "\n".join(lines)
+
+
+def _source(dag_id: str) -> str:
+    lines = [
+        "from airflow import DAG",
+        "from airflow.operators.python import PythonOperator",
+        "",
+        f'with DAG("{dag_id}", schedule="0 0 * * *") as dag:',
+    ]
+    for task_id in ["extract", *FAILED_TASKS, "load", "notify"]:
+        lines.append(f'    {task_id} = PythonOperator(task_id="{task_id}", python_callable=lambda: None)')
+    return "\n".join(lines) + "\n"
+
+
+class FakeAirflow:
+    """The fake API server, running in a background thread until stop() is called."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, dags: int = 20, latency: float = 0.0):
+        self.latency = latency
+        self.dag_ids = [FAILED_DAG_ID, "ml_training_pipeline"] + [f"sample_dag_{i}" for i in range(max(0, dags - 2))]
+        self.requests = 0
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                fake.requests += 1
+                if fake.latency:
+                    time.sleep(fake.latency)
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                status, body = fake.route(url.path[len("/api/v1/"):].strip("/"), query)
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeAirflow":
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _runs(self, dag_id: str) -> List[Dict[str, Any]]:
+        dag_ids = self.dag_ids if dag_id == "~" else [dag_id]
+        return [_run(d, day) for d in dag_ids for day in range(RUNS_PER_DAG, 0, -1)]
+
+    def route(self, path: str, query: Dict[str, List[str]]) -> Tuple[int, Any]:
+        parts = path.split("/")
+        states = query.get("state")
+        offset = int(query.get("offset", ["0"])[0])
+        limit = int(query.get("limit", ["100"])[0])
+
+        def page(key: str, items: List[Dict[str, Any]]) -> Tuple[int, Dict[str, Any]]:
+            if states:
+                items = [item for item in items if item.get("state") in states]
+            return 200, {key: items[offset:offset + limit], "total_entries": len(items)}
+
+        if path == "health":
+            return 200, {
+                "metadatabase": {"status": "healthy"},
+                "scheduler": {"status": "healthy", "latest_scheduler_heartbeat": "2024-01-05T00:12:00+00:00"},
+            }
+        if path == "importErrors":
+            return page("import_errors", [{
+                "import_error_id": 1,
+                "filename": "/opt/airflow/dags/broken_dag.py",
+                "stack_trace": "Traceback (most recent call last):\nModuleNotFoundError: No module named 'pandas'",
+                "timestamp": "2024-01-05T00:00:00+00:00",
+            }])
+        if path == "datasets":
+            return page("datasets", [])
+        if parts[0] == "dagSources" and len(parts) == 2:
+            dag_id = parts[1][:-3] if parts[1].endswith(".py") else parts[1]
+            if dag_id not in self.dag_ids:
+                return 404, {"title": "DAG source not found", "status": 404}
+            return 200, {"content": _source(dag_id)}
+        if parts[0] != "dags":
+            return 404, {"title": "Not found", "status": 404}
+        if len(parts) == 1:
+            return page("dags", [_dag(dag_id) for dag_id in self.dag_ids])
+        dag_id = parts[1]
+        if dag_id != "~" and dag_id not in self.dag_ids:
+            return 404, {"title": f"DAG {dag_id} not found", "status": 404}
+        if len(parts) == 2:
+            return 200, _dag(dag_id)
+        if parts[2] != "dagRuns":
+            return 404, {"title": "Not found", "status": 404}
+        runs = self._runs(dag_id)
+        if len(parts) == 3:
+            return page("dag_runs", runs)
+        run_id = parts[3]
+        if len(parts) == 4:
+            run = next((run for run in runs if run["dag_run_id"] == run_id), None)
+            return (200, run) if run else (404, {"title": "DAG run not found", "status": 404})
+        if parts[4] != "taskInstances":
+            return 404, {"title": "Not found", "status": 404}
+        selected = runs if run_id == "~" else [run for run in runs if run["dag_run_id"] == run_id]
+        task_instances = [ti for run in selected for ti in _task_instances(run["dag_id"], run["dag_run_id"])]
+        if len(parts) == 5:
+            return page("task_instances", task_instances)
+        task = next((ti for ti in task_instances if ti["task_id"] == parts[5]), None)
+        if task is None:
+            return 404, {"title": "Task instance not found", "status": 404}
+        if len(parts) == 6:
+            return 200, task
+        tries = [{**task, "try_number": n, "state": task["state"] if n == task["try_number"] else "up_for_retry"}
+                 for n in range(1, task["try_number"] + 1)]
+        if parts[6] == "tries":
+            if len(parts) == 7:
+                return page("task_instance_tries", tries)
+            found = next((t for t in tries if str(t["try_number"]) == parts[7]), None)
+            return (200, found) if found else (404, {"title": "Try not found", "status": 404})
+        if parts[6] == "logs" and len(parts) == 8:
+            return 200, {"content": _log(task["task_id"], int(parts[7])), "continuation_token": None}
+        return 404, {"title": "Not found", "status": 404}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--dags", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay added to every request")
+    args = parser.parse_args()
+    fake = FakeAirflow(args.host, args.port, dags=args.dags, latency=args.latency_ms / 1000)
+    print(f"Fake Airflow API at {fake.url}/api/v1")
+    fake.server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
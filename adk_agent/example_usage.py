@@ -13,11 +13,9 @@ from pathlib import Path
 # Add the vayu_agent package to the Python path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from vayu_agent.agent import (
-    root_agent,                    # Main orchestrator agent
-    dag_troubleshooter_agent,      # Direct access to troubleshooter
-    airflow_metadata_agent         # Direct access to metadata agent
-)
+# Importing is cheap: agents are built on first access (root_agent, dag_troubleshooter_agent,
+# airflow_metadata_agent) or by calling get_root_agent()
+from vayu_agent.agent import get_root_agent
 
 def main():
     """Demonstrate the multi-agent system usage."""
@@ -74,6 +72,7 @@ def main():
     print()
     
     # Show sub-agent relationships
+    root_agent = get_root_agent()  # Main orchestrator agent
     if root_agent.sub_agents:
         print("✅ Sub-agents properly configured:")
         for sub_agent in root_agent.sub_agents:
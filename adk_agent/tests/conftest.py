@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The agent package is imported from the directory that holds it, as `adk web` does
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
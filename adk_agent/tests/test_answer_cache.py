@@ -0,0 +1,126 @@
+import asyncio
+from types import SimpleNamespace
+
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from vayu_agent.answer_cache import DATA_VERSION_TOOL, AnswerCache
+
+QUESTION = "Which DAGs failed today?"
+ANSWER = "etl_daily failed at 02:00 with a KeyError."
+
+
+class FakeToolset:
+    def __init__(self, version: str = "v1"):
+        self.version = version
+        self.calls = 0
+
+    async def call_tool(self, name, arguments):
+        assert name == DATA_VERSION_TOOL
+        self.calls += 1
+        return {"version": self.version}
+
+
+def context(invocation_id: str, text: str = QUESTION) -> SimpleNamespace:
+    return SimpleNamespace(
+        invocation_id=invocation_id,
+        state={},
+        user_content=types.Content(role="user", parts=[types.Part(text=text)]),
+    )
+
+
+def answer(cache: AnswerCache, callback_context: SimpleNamespace, text: str = ANSWER) -> None:
+    cache.after_model(callback_context, LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)])))
+    cache.after_agent(callback_context)
+
+
+async def settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_repeated_question_waits_for_the_answer_in_flight() -> None:
+    async def scenario():
+        cache = AnswerCache(FakeToolset(), wait=5)
+        first, answered = context("first"), asyncio.Event()
+
+        async def first_invocation():
+            assert await cache.before_agent(first) is None
+            await answered.wait()
+            answer(cache, first)
+
+        running = asyncio.create_task(first_invocation())
+        await settle()
+        waiting = asyncio.create_task(cache.before_agent(context("second")))
+        await settle()
+        assert not waiting.done()
+        answered.set()
+        served = await asyncio.wait_for(waiting, 1)
+        await running
+        assert served.parts[0].text == ANSWER
+        # Later askers are served from the cache at once
+        assert (await cache.before_agent(context("third"))).parts[0].text == ANSWER
+
+    asyncio.run(scenario())
+
+
+def test_failed_invocation_releases_its_waiters() -> None:
+    async def scenario():
+        cache = AnswerCache(FakeToolset(), wait=60)
+        first, crash = context("first"), asyncio.Event()
+
+        async def first_invocation():
+            assert await cache.before_agent(first) is None
+            await crash.wait()
+            raise RuntimeError("model call failed")
+
+        running = asyncio.create_task(first_invocation())
+        await settle()
+        second = context("second")
+        waiting = asyncio.create_task(cache.before_agent(second))
+        await settle()
+        crash.set()
+        # The waiter stops as soon as the invocation ends, not after the wait, and answers itself
+        assert await asyncio.wait_for(waiting, 1) is None
+        (failure,) = await asyncio.gather(running, return_exceptions=True)
+        assert isinstance(failure, RuntimeError)
+        assert cache._pending["second"] is next(iter(cache._inflight.values()))
+        answer(cache, second)
+        assert not cache._inflight
+
+    asyncio.run(scenario())
+
+
+def test_invocation_past_the_wait_is_stale() -> None:
+    async def scenario():
+        cache = AnswerCache(FakeToolset(), wait=0.05)
+        first, never = context("first"), asyncio.Event()
+
+        async def first_invocation():
+            assert await cache.before_agent(first) is None
+            await never.wait()
+
+        running = asyncio.create_task(first_invocation())
+        await settle()
+        second = context("second")
+        assert await asyncio.wait_for(cache.before_agent(second), 1) is None
+        assert cache._pending["second"] is next(iter(cache._inflight.values()))
+        # The stale invocation finishing late does not take the question back
+        answer(cache, first, "late answer")
+        assert cache._pending["second"] is next(iter(cache._inflight.values()))
+        running.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_new_data_version_is_answered_again() -> None:
+    async def scenario():
+        toolset = FakeToolset()
+        cache = AnswerCache(toolset)
+        first = context("first")
+        assert await cache.before_agent(first) is None
+        answer(cache, first)
+        toolset.version = "v2"
+        assert await cache.before_agent(context("second")) is None
+
+    asyncio.run(scenario())
@@ -0,0 +1,67 @@
+from google.genai import types
+
+from vayu_agent.compaction import HistoryCompactor, digest
+
+RUNS = {"dag_runs": [{"dag_run_id": f"run_{i}", "state": "failed" if i % 4 == 0 else "success", "conf": {}, "note": "x" * 40} for i in range(60)]}
+
+
+def user(text: str) -> types.Content:
+    return types.Content(role="user", parts=[types.Part(text=text)])
+
+
+def call(name: str, **args) -> types.Content:
+    return types.Content(role="model", parts=[types.Part(function_call=types.FunctionCall(name=name, args=args))])
+
+
+def result(name: str, payload) -> types.Content:
+    return types.Content(role="user", parts=[
+        types.Part(function_response=types.FunctionResponse(name=name, response={"result": payload})),
+    ])
+
+
+def responses(contents):
+    return [part.function_response.response for content in contents for part in content.parts if part.function_response]
+
+
+def test_earlier_results_are_paired_with_their_calls_by_name_and_order() -> None:
+    contents = [
+        user("Which runs of etl and reports failed?"),
+        types.Content(role="model", parts=[
+            types.Part(function_call=types.FunctionCall(name="get_dag_runs", args={"dag_id": "etl"})),
+            types.Part(function_call=types.FunctionCall(name="get_dag_runs", args={"dag_id": "reports"})),
+            types.Part(function_call=types.FunctionCall(name="get_dag", args={"dag_id": "etl"})),
+        ]),
+        types.Content(role="user", parts=[
+            types.Part(function_response=types.FunctionResponse(name="get_dag", response={"result": {"dag_id": "etl"}})),
+            types.Part(function_response=types.FunctionResponse(name="get_dag_runs", response={"result": RUNS})),
+            types.Part(function_response=types.FunctionResponse(name="get_dag_runs", response={"result": RUNS})),
+        ]),
+        types.Content(role="model", parts=[types.Part(text="15 runs failed.")]),
+        user("And for billing?"),
+        call("get_dag_runs", dag_id="billing"),
+        result("get_dag_runs", RUNS),
+    ]
+    assert HistoryCompactor(min_chars=1500).compact(contents) == 2
+    small, etl, reports, current = responses(contents)
+    # Short results are kept as they are
+    assert small == {"result": {"dag_id": "etl"}}
+    assert etl["refetch"] == {"tool": "get_dag_runs", "args": {"dag_id": "etl"}}
+    assert reports["refetch"] == {"tool": "get_dag_runs", "args": {"dag_id": "reports"}}
+    assert etl["digest"] == digest(RUNS)
+    assert etl["digest"]["dag_runs"]["states"] == {"failed": 15, "success": 45}
+    # The result of the current turn is sent in full
+    assert current == {"result": RUNS}
+
+
+def test_result_without_a_call_keeps_an_unknown_handle() -> None:
+    contents = [user("Show the runs"), result("get_dag_runs", RUNS), user("Thanks, and the DAGs?")]
+    assert HistoryCompactor(min_chars=1500).compact(contents) == 1
+    assert responses(contents)[0]["refetch"] == {"tool": "get_dag_runs", "args": "unknown"}
+
+
+def test_other_agents_results_in_text_are_clipped() -> None:
+    text = "For context: [AirflowMetadataAgent] `get_dag_runs` tool returned result: " + "y" * 5000
+    contents = [user("Show the runs"), user(text), user("Why did they fail?")]
+    assert HistoryCompactor(min_chars=1500).compact(contents) == 1
+    assert len(contents[1].parts[0].text) < 500
+    assert contents[1].parts[0].text.endswith("call the tool again for the full result)")
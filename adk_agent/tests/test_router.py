@@ -0,0 +1,59 @@
+from types import SimpleNamespace
+
+import pytest
+from google.adk.models.llm_request import LlmRequest
+from google.genai import types
+
+from vayu_agent.router import METADATA, TROUBLESHOOTER, KeywordRouter
+
+
+def user_message(text: str) -> types.Content:
+    return types.Content(role="user", parts=[types.Part(text=text)])
+
+
+@pytest.mark.parametrize("text, agent_name", [
+    ("Why is my DAG failing?", TROUBLESHOOTER),
+    ("Show me the import errors", TROUBLESHOOTER),
+    ("List all variables", METADATA),
+    ("What is the health status of Airflow?", METADATA),
+])
+def test_clear_winner_is_routed(text, agent_name) -> None:
+    assert KeywordRouter().route(text) == agent_name
+
+
+@pytest.mark.parametrize("text", [
+    # One point each: a tie goes to the model
+    "show errors",
+    "get the failed runs",
+    # No keyword at all
+    "hello there",
+])
+def test_ties_and_unknown_requests_go_to_the_model(text) -> None:
+    assert KeywordRouter().route(text) is None
+
+
+def test_winner_needs_the_minimum_margin() -> None:
+    text = "show the status of the failed DAG"
+    assert KeywordRouter().scores(text) == {TROUBLESHOOTER: 1, METADATA: 2}
+    assert KeywordRouter(min_margin=1).route(text) == METADATA
+    assert KeywordRouter(min_margin=2).route(text) is None
+
+
+def test_new_message_is_answered_with_a_transfer() -> None:
+    text = "Why is my DAG failing?"
+    context = SimpleNamespace(user_content=user_message(text), invocation_id="invocation")
+    response = KeywordRouter()(context, LlmRequest(contents=[user_message(text)]))
+    transfer = response.content.parts[-1].function_call
+    assert transfer.name == "transfer_to_agent"
+    assert transfer.args == {"agent_name": TROUBLESHOOTER}
+
+
+def test_follow_up_model_calls_are_not_routed() -> None:
+    text = "Why is my DAG failing?"
+    context = SimpleNamespace(user_content=user_message(text), invocation_id="invocation")
+    # The model already answered the message once in this invocation
+    contents = [
+        user_message(text),
+        types.Content(role="model", parts=[types.Part(text="Let me check.")]),
+    ]
+    assert KeywordRouter()(context, LlmRequest(contents=contents)) is None
@@ -1,20 +1,56 @@
 import os
-from google.adk.agents import LlmAgent
-from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset
-from google.adk.tools.mcp_tool.mcp_session_manager import SseServerParams
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
+
+# google.adk and the agent modules are imported by the factories below, so that importing
+# this package stays cheap; agents, toolset and callbacks are built on first access
+if TYPE_CHECKING:
+    from google.adk.agents import LlmAgent
+
+    from .answer_cache import AnswerCache
+    from .compaction import HistoryCompactor
+    from .mcp_tools import SharedMCPToolset
 
 
 # MCP server configuration
 MCP_HOST = os.getenv("MCP_HOST", "localhost")
 MCP_PORT = int(os.getenv("MCP_PORT", "3000"))
 
-# Common MCP connection parameters
-MCP_CONNECTION_PARAMS = SseServerParams(url=f"http://{MCP_HOST}:{MCP_PORT}/sse")
 
-def create_dag_troubleshooter_agent() -> LlmAgent:
+@lru_cache(maxsize=None)
+def get_mcp_toolset() -> "SharedMCPToolset":
+    """
+    One MCP session and tool catalogue for all agents; each agent gets a filtered view.
+    The connection is opened by the first tool call, not here.
+    """
+    from google.adk.tools.mcp_tool.mcp_session_manager import SseServerParams
+
+    from .mcp_tools import SharedMCPToolset
+
+    return SharedMCPToolset(connection_params=SseServerParams(url=f"http://{MCP_HOST}:{MCP_PORT}/sse"))
+
+
+@lru_cache(maxsize=None)
+def get_answer_cache() -> "AnswerCache":
+    """Answers to repeated questions, reused while the Airflow data version is unchanged."""
+    from .answer_cache import AnswerCache
+
+    return AnswerCache(get_mcp_toolset())
+
+
+@lru_cache(maxsize=None)
+def get_history_compactor() -> "HistoryCompactor":
+    """Tool results of earlier turns are sent to the model as digests."""
+    from .compaction import HistoryCompactor
+
+    return HistoryCompactor()
+
+def create_dag_troubleshooter_agent() -> "LlmAgent":
     """
     Creates the DAG TroubleShooter Agent - specializes in diagnosing and resolving DAG issues.
     """
+    from google.adk.agents import LlmAgent
+
     return LlmAgent(
         name="DagTroubleShooterAgent",
         model="gemini-2.0-flash",
@@ -25,12 +61,30 @@ def create_dag_troubleshooter_agent() -> LlmAgent:
 - `get_dag`: Get specific DAG information
 - `get_dag_runs`: Get DAG run information
 - `get_dag_source`: Get DAG source code for analysis and debugging
+- `analyze_dag`: Summarize a DAG file (schedule, tasks, operators and dependencies) without reading its source
+- `get_dag_dependencies`: Find the DAGs downstream or upstream of a DAG (datasets, triggers, external task sensors) and the pools it shares
 - `list_task_instances`: List task instances for a specific DAG run
 - `get_task_instance`: Get details of a specific task instance
 - `get_task_instance_tries`: Get all tries for a specific task instance
 - `get_task_instance_try_details`: Get detailed information about a specific try
 - `get_task_instance_log`: Get logs for a specific task instance try
 - `get_health`: Check system health. This also give status of different airflow components
+- `scan_import_errors`: List DAG files that fail to import, grouped by cause, optionally only those new or changed since a timestamp
+- `diagnose_failed_run`: Diagnose a failed DAG run in one call (failed tasks, retry history, log errors and source snippets)
+- `get_truncated_output`: Read the rest of a response that came back with a `truncation` marker, using its cursor
+
+Request independent tool calls together in a single turn (e.g. the tries and logs of several failed tasks); they run concurrently.
+
+**WORKFLOW FOR FAILED RUNS:**
+1. Call `diagnose_failed_run` with the dag_id (and dag_run_id if the user gave one)
+2. Explain the failure from the returned error windows, retry history and source snippets
+3. Only fall back to the individual task instance, log and source tools if the bundle is not enough
+4. To tell the user what else is affected, call `get_dag_dependencies` with the dag_id (direction "downstream")
+
+**WORKFLOW FOR IMPORT ERRORS:**
+1. Call `scan_import_errors` (with `since` when the user asks what broke recently)
+2. Explain each signature: its error, how many files it affects and the likely cause from the sample trace
+3. Only read a file's source with `get_dag_source` when the trace points into the DAG file itself
 
 **DAG SOURCE ANALYSIS CAPABILITIES:**
 - Inspect DAG source code to understand logic and structure
@@ -41,36 +95,44 @@ def create_dag_troubleshooter_agent() -> LlmAgent:
 - Review task configurations and scheduling logic
 
 **WORKFLOW FOR DAG ANALYSIS:**
-1. First, get DAG details using `get_dag` to obtain the file_token
-2. Use `get_dag_source` with the file_token to retrieve the source code
-3. Analyze the source code to understand the DAG's purpose and logic
+1. Call `analyze_dag` with the dag_id to get its schedule, tasks and task dependencies
+2. Explain the DAG's purpose and structure from that summary
+3. Only if the actual code is needed (e.g. a task's logic or a suspected bug), get the file_token with `get_dag` and read it with `get_dag_source`
 4. Cross-reference with runtime data (DAG runs, task instances) if needed
 5. Provide comprehensive analysis and recommendations
 
 Use these tools to diagnose DAG import errors, runtime issues, performance problems, configuration issues, and analyze DAG logic. Provide clear analysis and actionable solutions.""",
         tools=[
-            MCPToolset(
-                connection_params=MCP_CONNECTION_PARAMS,
+            get_mcp_toolset().view(
                 tool_filter=[
                     'get_dags',
                     'get_dag',
                     'get_dag_runs',
                     'get_dag_source',
+                    'analyze_dag',
+                    'get_dag_dependencies',
+                    'scan_import_errors',
                     'list_task_instances',
                     'get_task_instance',
                     'get_task_instance_tries',
                     'get_task_instance_try_details',
                     'get_task_instance_log',
-                    'get_health'
+                    'get_health',
+                    'diagnose_failed_run',
+                    'get_truncated_output'
                 ]
             )
-        ]
+        ],
+        before_model_callback=get_history_compactor(),
+        after_model_callback=get_answer_cache().after_model
     )
 
-def create_airflow_metadata_agent() -> LlmAgent:
+def create_airflow_metadata_agent() -> "LlmAgent":
     """
     Creates the Airflow Metadata Agent - specializes in retrieving and presenting Airflow information.
     """
+    from google.adk.agents import LlmAgent
+
     return LlmAgent(
         name="AirflowMetadataAgent",
         model="gemini-2.0-flash", 
@@ -86,11 +148,17 @@ def create_airflow_metadata_agent() -> LlmAgent:
 - `get_task_instance_try_details`: Get detailed information about a specific try
 - `get_task_instance_log`: Get logs for a specific task instance try
 - `get_health`: Check system health. This also gives the status of different airflow components
+- `get_truncated_output`: Read the rest of a response that came back with a `truncation` marker, using its cursor
+
+Request independent tool calls together in a single turn (e.g. the details of several task instances); they run concurrently.
+
+Large responses are cut down to a size budget and carry a `truncation` marker. Only fetch the rest when the kept part is not enough.
+
+When several Airflow deployments are configured, pass `instance` to select one. `get_dags`, `get_dag_runs` and `list_task_instances` accept `instance="all"` to query every deployment at once; each item then names its `instance`, and failures per deployment are listed under `instances`.
 
 Use these tools to retrieve and present Airflow information in a clear, user-friendly format.""",
         tools=[
-            MCPToolset(
-                connection_params=MCP_CONNECTION_PARAMS,
+            get_mcp_toolset().view(
                 tool_filter=[
                     'get_dags',
                     'get_dag',
@@ -100,16 +168,23 @@ Use these tools to retrieve and present Airflow information in a clear, user-fri
                     'get_task_instance_tries',
                     'get_task_instance_try_details',
                     'get_task_instance_log',
-                    'get_health'
+                    'get_health',
+                    'get_truncated_output'
                 ]
             )
-        ]
+        ],
+        before_model_callback=get_history_compactor(),
+        after_model_callback=get_answer_cache().after_model
     )
 
-def create_airflow_orchestrator_agent() -> LlmAgent:
+def create_airflow_orchestrator_agent() -> "LlmAgent":
     """
     Creates the main Airflow Orchestrator Agent with specialized sub-agents.
     """
+    from google.adk.agents import LlmAgent
+
+    from .router import KeywordRouter
+
     # Create specialized sub-agents
     dag_troubleshooter = create_dag_troubleshooter_agent()
     metadata_agent = create_airflow_metadata_agent()
@@ -175,6 +250,12 @@ Your primary responsibility is to analyze incoming user requests and delegate th
 - AirflowMetadataAgent: Specialist in retrieving and presenting Airflow information
 
 Use your sub-agents effectively to provide comprehensive Airflow management assistance.""",
+        # Clear-cut requests are delegated by keyword without a model call
+        before_model_callback=[KeywordRouter(), get_history_compactor()],
+        # Repeated questions are answered from the cache while the Airflow data is unchanged
+        before_agent_callback=get_answer_cache().before_agent,
+        after_model_callback=get_answer_cache().after_model,
+        after_agent_callback=get_answer_cache().after_agent,
         sub_agents=[
             dag_troubleshooter,
             metadata_agent
@@ -183,28 +264,49 @@ Use your sub-agents effectively to provide comprehensive Airflow management assi
     
     return orchestrator
 
-# Initialize the multi-agent system using ADK hierarchy
-airflow_orchestrator = create_airflow_orchestrator_agent()
+@lru_cache(maxsize=None)
+def get_root_agent() -> "LlmAgent":
+    """The multi-agent system using ADK hierarchy, built once on first use."""
+    return create_airflow_orchestrator_agent()
+
+
+def _sub_agent(name: str) -> "LlmAgent":
+    return next(agent for agent in get_root_agent().sub_agents if agent.name == name)
+
+
+# Module attributes built on first access (PEP 562), e.g. `from vayu_agent.agent import root_agent`
+_LAZY_ATTRIBUTES = {
+    # Main agent (orchestrator is the primary interface)
+    "root_agent": get_root_agent,
+    "airflow_orchestrator": get_root_agent,
+    # Access to sub-agents for direct use if needed
+    "dag_troubleshooter_agent": lambda: _sub_agent("DagTroubleShooterAgent"),
+    "airflow_metadata_agent": lambda: _sub_agent("AirflowMetadataAgent"),
+    # Legacy aliases for backward compatibility
+    "troubleshooter_agent": lambda: _sub_agent("DagTroubleShooterAgent"),
+    "metadata_agent": lambda: _sub_agent("AirflowMetadataAgent"),
+    "MCP_TOOLSET": get_mcp_toolset,
+    "MCP_CONNECTION_PARAMS": lambda: get_mcp_toolset()._connection_params,
+    "ANSWER_CACHE": get_answer_cache,
+    "COMPACT_HISTORY": get_history_compactor,
+}
+
 
-# Main agent (orchestrator is the primary interface)
-root_agent = airflow_orchestrator
+def __getattr__(name: str) -> Any:
+    # Unknown names must raise AttributeError: ADK's agent loader probes the module with hasattr()
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = _LAZY_ATTRIBUTES[name]()
+    globals()[name] = value
+    return value
 
-# Access to sub-agents for direct use if needed
-dag_troubleshooter_agent = None
-airflow_metadata_agent = None
 
-# Extract sub-agents for direct access
-for sub_agent in airflow_orchestrator.sub_agents:
-    if sub_agent.name == "DagTroubleShooterAgent":
-        dag_troubleshooter_agent = sub_agent
-    elif sub_agent.name == "AirflowMetadataAgent":
-        airflow_metadata_agent = sub_agent
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
 
-# Legacy aliases for backward compatibility
-troubleshooter_agent = dag_troubleshooter_agent
-metadata_agent = airflow_metadata_agent
 
 if __name__ == "__main__":
+    get_root_agent()
     print("🚁 Airflow Copilot Multi-Agent System Initialized!")
     print(f"📡 Connecting to MCP server at {MCP_HOST}:{MCP_PORT}")
     print("🎯 **ORCHESTRATOR AGENT** (Main Entry Point)")
@@ -226,7 +328,7 @@ if __name__ == "__main__":
     print("   - Monitors task instances and execution details")
     print("   - Presents data in user-friendly formats")
     print()
-    print("🔧 Available MCP Tools: get_dags, get_dag, get_dag_runs, get_dag_source, list_task_instances, get_task_instance, get_task_instance_tries, get_task_instance_try_details, get_task_instance_log, get_health")
+    print("🔧 Available MCP Tools: get_dags, get_dag, get_dag_runs, get_dag_source, analyze_dag, get_dag_dependencies, list_task_instances, get_task_instance, get_task_instance_tries, get_task_instance_try_details, get_task_instance_log, get_health, scan_import_errors, diagnose_failed_run, get_truncated_output")
     print("💬 Ready to help manage and troubleshoot your Airflow workflows!")
     print()
     print("💡 Usage Examples:")
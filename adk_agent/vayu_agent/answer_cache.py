@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from .mcp_tools import SharedMCPToolset
+
+
+logger = logging.getLogger(__name__)
+
+# Reuse answers to repeated questions while the Airflow data is unchanged (set to "0" to disable)
+ANSWER_CACHE_ENABLED = os.getenv("VAYU_ANSWER_CACHE", "1") != "0"
+# Seconds an answer is reused at most, even when the data version did not change
+ANSWER_CACHE_TTL = float(os.getenv("VAYU_ANSWER_CACHE_TTL", "600"))
+ANSWER_CACHE_SIZE = int(os.getenv("VAYU_ANSWER_CACHE_SIZE", "256"))
+# Seconds a repeated question waits for the same question already being answered
+ANSWER_CACHE_WAIT = float(os.getenv("VAYU_ANSWER_CACHE_WAIT", "60"))
+# Session state marking that the conversation already had a turn
+SEEN_STATE_KEY = "vayu_answer_cache_seen"
+DATA_VERSION_TOOL = "get_data_version"
+# The version covers every Airflow instance, whichever one the answer read
+DATA_VERSION_ARGUMENTS = {"instance": "all"}
+
+# Only questions about failures and runs are cached, the state the data version fingerprints
+CACHEABLE_QUERY = re.compile(r"\b(fail\w*|errors?|broken|crash\w*|runs?)\b")
+# Questions that also read state the version does not cover, or that ask for an action
+UNCACHEABLE_QUERY = re.compile(
+    r"\b(running|queued|scheduled|succe\w*|variables?|health\w*|pause\w*|unpause\w*|pools?|"
+    r"connections?|config\w*|details?|sources?|code|trigger\w*|clear\w*|retr\w*|rerun\w*)\b"
+)
+
+
+def normalize_query(text: str) -> str:
+    """Lowercase the question and reduce punctuation and runs of whitespace to single spaces."""
+    return " ".join(re.sub(r"[^\w]+", " ", text.lower()).split())
+
+
+def is_cacheable(query: str) -> bool:
+    """Whether the answer to a normalized question only depends on the versioned failure and run state."""
+    return bool(CACHEABLE_QUERY.search(query)) and not UNCACHEABLE_QUERY.search(query)
+
+
+class AnswerCache:
+    """
+    Answers to repeated questions, keyed on the normalized question and the Airflow data version.
+
+    The data version comes from the MCP server's get_data_version tool, over every Airflow
+    instance, and changes as soon as recent DAG runs, failing task instances, DAGs or import
+    errors change. Only questions about failures and runs are cached, since the version covers
+    nothing else, so a cached answer is only returned while the data it was computed from is
+    unchanged. Only the first question of a conversation is cached, since later ones may refer
+    to earlier turns. When several people ask the same question at once, one computes the
+    answer and the others wait for it, for at most ``wait`` seconds after it was asked.
+
+    Wired into the agents as callbacks: before_agent on the orchestrator serves hits, after_model
+    on every agent records the latest final answer and after_agent on the orchestrator stores it.
+    """
+
+    def __init__(
+        self,
+        toolset: SharedMCPToolset,
+        ttl: float = ANSWER_CACHE_TTL,
+        max_entries: int = ANSWER_CACHE_SIZE,
+        wait: float = ANSWER_CACHE_WAIT,
+    ):
+        self.toolset = toolset
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.wait = wait
+        # (query, version) -> (answer, stored at)
+        self._answers: "OrderedDict[Tuple[str, str], Tuple[str, float]]" = OrderedDict()
+        # invocation id -> key, latest final answer, waiters, start time and task of an invocation
+        # being computed, also indexed by key while it is the one computing that answer
+        self._pending: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    def _get(self, key: Tuple[str, str]) -> Optional[str]:
+        entry = self._answers.get(key)
+        if entry is None or time.monotonic() - entry[1] > self.ttl:
+            return None
+        self._answers.move_to_end(key)
+        return entry[0]
+
+    def _put(self, key: Tuple[str, str], answer: str) -> None:
+        self._answers[key] = (answer, time.monotonic())
+        self._answers.move_to_end(key)
+        while len(self._answers) > self.max_entries:
+            self._answers.popitem(last=False)
+
+    def _release(self, pending: Dict[str, Any], answer: Optional[str]) -> None:
+        """Hand the answer (or the failure) of an invocation to the questions waiting for it."""
+        key, future = pending["key"], pending["future"]
+        if self._inflight.get(key) is pending:
+            del self._inflight[key]
+        if future.done():
+            return
+        if answer:
+            future.set_result(answer)
+        else:
+            future.set_exception(LookupError("The question was not answered"))
+            # Nobody may be waiting, so do not warn about an unretrieved exception
+            future.exception()
+
+    def _is_stale(self, pending: Dict[str, Any]) -> bool:
+        """An invocation that failed without reaching after_agent, or has run for longer than the wait."""
+        task = pending["task"]
+        if task is not None and (task.done() or task is asyncio.current_task()):
+            return True
+        return time.monotonic() - pending["started"] > self.wait
+
+    async def _wait_for(self, pending: Dict[str, Any]) -> Optional[str]:
+        future, task = pending["future"], pending["task"]
+        remaining = self.wait - (time.monotonic() - pending["started"])
+        # Stop waiting as soon as the invocation's task ends, answered or not
+        awaitables = [future] if task is None else [future, task]
+        await asyncio.wait(awaitables, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+        if future.done() and not future.exception():
+            return future.result()
+        if self._is_stale(pending):
+            self._release(pending, None)
+        return None
+
+    async def before_agent(self, callback_context: CallbackContext) -> Optional[types.Content]:
+        if not ANSWER_CACHE_ENABLED or callback_context.state.get(SEEN_STATE_KEY):
+            return None
+        callback_context.state[SEEN_STATE_KEY] = True
+        user_content = callback_context.user_content
+        text = " ".join(part.text for part in (user_content.parts or []) if part.text) if user_content else ""
+        query = normalize_query(text)
+        if not query or not is_cacheable(query):
+            return None
+
+        started = time.perf_counter()
+        try:
+            version = (await self.toolset.call_tool(DATA_VERSION_TOOL, DATA_VERSION_ARGUMENTS))["version"]
+        except Exception as e:
+            logger.warning("Answer cache bypassed, data version unavailable: %s", e)
+            return None
+        key = (query, version)
+
+        answer = self._get(key)
+        inflight = self._inflight.get(key)
+        if inflight is not None and self._is_stale(inflight):
+            self._release(inflight, None)
+        elif answer is None and inflight is not None:
+            answer = await self._wait_for(inflight)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if answer is not None:
+            logger.info("Answer cache hit for %r at data version %s in %.1f ms", query, version, elapsed_ms)
+            return types.Content(role="model", parts=[types.Part(text=answer)])
+
+        logger.info("Answer cache miss for %r at data version %s in %.1f ms", query, version, elapsed_ms)
+        # A question whose answer failed or timed out is answered again, and waited for anew
+        pending = {
+            "key": key,
+            "answer": None,
+            "future": asyncio.get_running_loop().create_future(),
+            "started": time.monotonic(),
+            "task": asyncio.current_task(),
+        }
+        self._inflight[key] = pending
+        self._pending[callback_context.invocation_id] = pending
+        while len(self._pending) > self.max_entries:
+            self._release(self._pending.popitem(last=False)[1], None)
+        return None
+
+    def after_model(self, callback_context: CallbackContext, llm_response: LlmResponse) -> Optional[LlmResponse]:
+        pending = self._pending.get(callback_context.invocation_id)
+        content = llm_response.content
+        if pending is None or llm_response.partial or content is None or not content.parts:
+            return None
+        if any(part.function_call for part in content.parts):
+            return None
+        text = "".join(part.text for part in content.parts if part.text)
+        if text:
+            pending["answer"] = text
+        return None
+
+    def after_agent(self, callback_context: CallbackContext) -> Optional[types.Content]:
+        pending = self._pending.pop(callback_context.invocation_id, None)
+        if pending is None:
+            return None
+        if pending["answer"]:
+            self._put(pending["key"], pending["answer"])
+        self._release(pending, pending["answer"])
+        return None
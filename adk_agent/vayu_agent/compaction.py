@@ -0,0 +1,175 @@
+import json
+import logging
+import os
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+
+logger = logging.getLogger(__name__)
+
+# Replace tool results of earlier turns with digests (set to "0" to send them in full)
+COMPACTION_ENABLED = os.getenv("VAYU_COMPACT_HISTORY", "1") != "0"
+# Tool results shorter than this many characters are kept as they are
+COMPACT_MIN_CHARS = int(os.getenv("VAYU_COMPACT_MIN_CHARS", "1500"))
+# Shape of a digest: nesting kept, keys per object, identified items per list, characters per string
+DIGEST_DEPTH = 3
+DIGEST_KEYS = 20
+DIGEST_ITEMS = 20
+DIGEST_TEXT = 300
+# Fields kept per listed item that has no identifying fields, and their maximum length
+SCALAR_FIELDS = 6
+SCALAR_TEXT = 120
+# Fields that identify an item of a listed collection
+ID_FIELDS = ("dag_id", "dag_run_id", "task_id", "map_index", "try_number", "state", "filename", "instance")
+# How ADK presents other agents' turns, and their tool results, to an agent
+CONTEXT_PREFIX = "For context:"
+RESULT_MARKER = "tool returned result:"
+
+
+def tool_payload(response: Any) -> Any:
+    """The tool's result inside a function response, parsed from an MCP CallToolResult when possible."""
+    result = response.get("result", response) if isinstance(response, dict) else response
+    if hasattr(result, "model_dump"):
+        result = result.model_dump(mode="json", exclude_none=True)
+    if isinstance(result, dict) and "content" in result:
+        if result.get("structuredContent") is not None:
+            return result["structuredContent"]
+        text = "".join(
+            part.get("text", "") for part in result.get("content") or [] if isinstance(part, dict)
+        )
+        try:
+            return json.loads(text)
+        except ValueError:
+            return text
+    return result
+
+
+def _size(value: Any) -> int:
+    return len(json.dumps(value, default=str))
+
+
+def _clip(text: str) -> str:
+    if len(text) <= DIGEST_TEXT:
+        return text
+    # Keep both ends: errors tend to sit at the end of logs and traces
+    half = DIGEST_TEXT // 2
+    return f"{text[:half]} …[{len(text) - DIGEST_TEXT} characters]… {text[-half:]}"
+
+
+def _identify(item: Dict[str, Any]) -> Dict[str, Any]:
+    """The identifying fields of a listed item, or its first short scalar fields when it has none."""
+    ids = {field: item[field] for field in ID_FIELDS if item.get(field) is not None}
+    if ids:
+        return ids
+    scalars = {
+        key: field for key, field in item.items()
+        if isinstance(field, (int, float, bool)) or (isinstance(field, str) and len(field) <= SCALAR_TEXT)
+    }
+    return dict(list(scalars.items())[:SCALAR_FIELDS])
+
+
+def digest(value: Any, depth: int = 0) -> Any:
+    """
+    Compact structured summary of a tool result: scalars and short strings are kept, long strings
+    keep their ends, and lists become a count, a tally of item states and the identifying (or
+    short) fields of their first items.
+    """
+    if isinstance(value, str):
+        return _clip(value)
+    if isinstance(value, dict):
+        if depth >= DIGEST_DEPTH:
+            return {"keys": sorted(value)[:DIGEST_KEYS]}
+        kept = {key: digest(item, depth + 1) for key, item in list(value.items())[:DIGEST_KEYS]}
+        if len(value) > DIGEST_KEYS:
+            kept["omitted_keys"] = len(value) - DIGEST_KEYS
+        return kept
+    if isinstance(value, list):
+        summary: Dict[str, Any] = {"count": len(value)}
+        records = [item for item in value if isinstance(item, dict)]
+        states = Counter(str(item["state"]) for item in records if item.get("state") is not None)
+        if states:
+            summary["states"] = dict(states)
+        if records:
+            summary["items"] = [_identify(item) for item in records[:DIGEST_ITEMS]]
+        elif value:
+            summary["items"] = [digest(item, depth + 1) for item in value[:DIGEST_ITEMS]]
+        return summary
+    return value
+
+
+def _is_user_turn(content: types.Content) -> bool:
+    """Whether content is a message the user typed, rather than a tool result or another agent's context."""
+    if content.role != "user" or not content.parts:
+        return False
+    if any(part.function_response for part in content.parts):
+        return False
+    texts = [part.text for part in content.parts if part.text]
+    return bool(texts) and not texts[0].startswith(CONTEXT_PREFIX)
+
+
+class HistoryCompactor:
+    """
+    Before-model callback that keeps the prompt of long conversations bounded.
+
+    Tool results from earlier turns have already been read and answered, yet ADK resends them
+    in full on every model call. Each one larger than VAYU_COMPACT_MIN_CHARS is replaced, in the
+    request only, by a digest (see digest()) plus a handle: the tool name and arguments to call it
+    again, which the MCP server answers from its revalidation cache, and the truncation cursor
+    when the result had one. Results of the current turn are left intact. The session keeps the
+    full results, so compaction never loses data.
+    """
+
+    def __init__(self, min_chars: int = COMPACT_MIN_CHARS):
+        self.min_chars = min_chars
+
+    def compact(self, contents: List[types.Content]) -> int:
+        """Compact tool results before the latest user message in place; returns how many were compacted."""
+        last_turn = max((index for index, content in enumerate(contents) if _is_user_turn(content)), default=0)
+        compacted = 0
+        # Function call ids are stripped from the request, so pair responses with calls by name and order
+        calls: Dict[str, List[Dict[str, Any]]] = {}
+        for content in contents[:last_turn]:
+            for part in content.parts or []:
+                if part.function_call:
+                    calls.setdefault(part.function_call.name, []).append(dict(part.function_call.args or {}))
+                elif part.function_response:
+                    pending = calls.get(part.function_response.name)
+                    args = pending.pop(0) if pending else None
+                    compacted += self._compact_response(part.function_response, args)
+                elif part.text and content.role == "user" and RESULT_MARKER in part.text and len(part.text) > self.min_chars:
+                    # Another agent's tool result, presented to this agent as text
+                    part.text = f"{_clip(part.text)} (compacted; call the tool again for the full result)"
+                    compacted += 1
+        return compacted
+
+    def _compact_response(self, function_response: types.FunctionResponse, args: Optional[Dict[str, Any]]) -> int:
+        payload = tool_payload(function_response.response)
+        if _size(payload) < self.min_chars:
+            return 0
+        compacted: Dict[str, Any] = {
+            "compacted": True,
+            "digest": digest(payload),
+            "refetch": {"tool": function_response.name, "args": args if args is not None else "unknown"},
+        }
+        if isinstance(payload, dict) and isinstance(payload.get("truncation"), dict):
+            compacted["truncation"] = payload["truncation"]
+        function_response.response = compacted
+        return 1
+
+    def __call__(self, callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+        if not COMPACTION_ENABLED or not llm_request.contents:
+            return None
+        before = sum(_size(content.model_dump(mode="json", exclude_none=True)) for content in llm_request.contents)
+        compacted = self.compact(llm_request.contents)
+        if compacted:
+            after = sum(_size(content.model_dump(mode="json", exclude_none=True)) for content in llm_request.contents)
+            logger.info(
+                "Compacted %d earlier tool results for %s: %d -> %d characters",
+                compacted, callback_context.agent_name, before, after,
+            )
+        return None
@@ -0,0 +1,145 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
+
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.base_toolset import BaseToolset, ToolPredicate
+from google.adk.tools.mcp_tool.mcp_session_manager import retry_on_closed_resource
+from google.adk.tools.mcp_tool.mcp_tool import McpTool
+from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset
+from google.adk.tools.tool_context import ToolContext
+
+
+# Seconds the tool catalogue of the MCP server is reused before it is listed again
+MCP_TOOL_CATALOGUE_TTL = float(os.getenv("MCP_TOOL_CATALOGUE_TTL", "300"))
+# Tool calls of one agent invocation that run at the same time over the shared session
+MCP_TOOL_CONCURRENCY = int(os.getenv("MCP_TOOL_CONCURRENCY", "4"))
+
+
+class InvocationLimiter:
+    """Caps the tool calls in flight per invocation, so one request cannot flood the MCP server."""
+
+    def __init__(self, limit: int = MCP_TOOL_CONCURRENCY):
+        self.limit = limit
+        # invocation id -> semaphore and number of calls holding or waiting for it
+        self._slots: Dict[str, List[Any]] = {}
+
+    @asynccontextmanager
+    async def slot(self, invocation_id: str) -> AsyncIterator[None]:
+        entry = self._slots.setdefault(invocation_id, [asyncio.Semaphore(self.limit), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._slots[invocation_id]
+
+
+class CappedMCPTool(McpTool):
+    """An MCP tool whose calls wait for a slot of the invocation's concurrency cap."""
+
+    def __init__(self, *, limiter: InvocationLimiter, **kwargs):
+        super().__init__(**kwargs)
+        self._limiter = limiter
+
+    async def run_async(self, *, args: Dict[str, Any], tool_context: ToolContext) -> Any:
+        async with self._limiter.slot(tool_context.invocation_id):
+            return await super().run_async(args=args, tool_context=tool_context)
+
+
+class SharedMCPToolset(MCPToolset):
+    """
+    One MCP connection and tool catalogue shared by every agent of the process.
+
+    A plain MCPToolset per agent opens its own SSE connection and lists the server's tools
+    on every model call of that agent. Agents instead take a view() of this toolset: all
+    views call tools over the one pooled session, and the catalogue is listed once and
+    reused for MCP_TOOL_CATALOGUE_TTL seconds, so adding sub-agents adds neither connections
+    nor tool-list round trips.
+
+    ADK runs the function calls of one model turn concurrently; they share the session and are
+    capped at MCP_TOOL_CONCURRENCY calls in flight per invocation.
+    """
+
+    def __init__(
+        self,
+        *,
+        catalogue_ttl: float = MCP_TOOL_CATALOGUE_TTL,
+        concurrency: int = MCP_TOOL_CONCURRENCY,
+        **kwargs
+    ):
+        super().__init__(**kwargs)
+        self._catalogue_ttl = catalogue_ttl
+        self._limiter = InvocationLimiter(concurrency)
+        self._catalogue: Optional[List[BaseTool]] = None
+        self._listed_at: Optional[float] = None
+        self._catalogue_lock = asyncio.Lock()
+
+    async def catalogue(self) -> List[BaseTool]:
+        """All tools of the server; concurrent callers wait for a single listing."""
+        async with self._catalogue_lock:
+            if self._catalogue is None or time.monotonic() - self._listed_at > self._catalogue_ttl:
+                self._catalogue = await self._list_tools()
+                self._listed_at = time.monotonic()
+            return self._catalogue
+
+    @retry_on_closed_resource
+    async def _list_tools(self) -> List[BaseTool]:
+        session = await self._mcp_session_manager.create_session()
+        listing = await session.list_tools()
+        return [
+            CappedMCPTool(
+                mcp_tool=tool,
+                mcp_session_manager=self._mcp_session_manager,
+                auth_scheme=self._auth_scheme,
+                auth_credential=self._auth_credential,
+                limiter=self._limiter,
+            )
+            for tool in listing.tools
+        ]
+
+    def invalidate(self) -> None:
+        """List the tools again on the next call, e.g. after the MCP server was redeployed."""
+        self._catalogue = None
+
+    async def get_tools(self, readonly_context: Optional[ReadonlyContext] = None) -> List[BaseTool]:
+        return [tool for tool in await self.catalogue() if self._is_tool_selected(tool, readonly_context)]
+
+    @retry_on_closed_resource
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Call a tool directly over the shared session, outside of any agent, and return its result."""
+        session = await self._mcp_session_manager.create_session()
+        result = await session.call_tool(name, arguments=arguments or {})
+        if result.isError:
+            message = " ".join(getattr(part, "text", "") for part in result.content)
+            raise RuntimeError(f"MCP tool {name} failed: {message}")
+        return result.structuredContent or {}
+
+    def view(self, tool_filter: Optional[Union[ToolPredicate, List[str]]] = None) -> "MCPToolView":
+        """A toolset exposing the tools selected by tool_filter, for one agent."""
+        return MCPToolView(self, tool_filter=tool_filter)
+
+    async def close(self) -> None:
+        self.invalidate()
+        await super().close()
+
+
+class MCPToolView(BaseToolset):
+    """The tools of a SharedMCPToolset that one agent may use."""
+
+    def __init__(self, shared: SharedMCPToolset, tool_filter: Optional[Union[ToolPredicate, List[str]]] = None):
+        super().__init__(tool_filter=tool_filter)
+        self.shared = shared
+
+    async def get_tools(self, readonly_context: Optional[ReadonlyContext] = None) -> List[BaseTool]:
+        return [tool for tool in await self.shared.catalogue() if self._is_tool_selected(tool, readonly_context)]
+
+    async def close(self) -> None:
+        # Closing is idempotent and the session reconnects on the next call, so the first
+        # agent to shut down may release the shared connection for all of them
+        await self.shared.close()
@@ -0,0 +1,101 @@
+import logging
+import os
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+
+logger = logging.getLogger(__name__)
+
+# Route clear-cut requests without asking the model (set to "0" to always ask the model)
+FAST_ROUTER_ENABLED = os.getenv("VAYU_FAST_ROUTER", "1") != "0"
+
+TROUBLESHOOTER = "DagTroubleShooterAgent"
+METADATA = "AirflowMetadataAgent"
+
+# (pattern, weight) per sub-agent, mirroring the orchestrator's delegation rules
+ROUTES: Dict[str, List[Tuple[str, int]]] = {
+    TROUBLESHOOTER: [
+        (r"import errors?", 2), (r"stack ?traces?", 2), (r"source code", 2), (r"not (working|running)", 2),
+        (r"troubleshoot\w*", 2), (r"debug\w*", 2), (r"what does", 2), (r"how does", 2), (r"why", 2),
+        (r"errors?", 1), (r"fail\w*", 1), (r"broken", 1), (r"fix\w*", 1), (r"stuck", 1),
+        (r"time ?outs?|timed out", 1), (r"explain\w*", 1), (r"analy[sz]\w*", 1), (r"inspect\w*", 1),
+        (r"logic", 1), (r"parsing", 1),
+    ],
+    METADATA: [
+        (r"show", 1), (r"list", 1), (r"get", 1), (r"details?", 1), (r"information|info", 1),
+        (r"what is", 1), (r"health", 1), (r"status", 1), (r"variables?", 1), (r"logs?", 1),
+    ],
+}
+MIN_MARGIN = 1
+
+
+class KeywordRouter:
+    """
+    Deterministic pre-router for the orchestrator, run as its before_model_callback.
+
+    Scores the user's message against the keyword rules of each sub-agent. When one sub-agent
+    clearly wins, the callback answers in place of the model with a transfer_to_agent call,
+    saving the orchestrator's model round trip; ties, follow-ups and messages without keywords
+    go to the model as before. Every decision and its latency is logged.
+    """
+
+    def __init__(self, routes: Dict[str, List[Tuple[str, int]]] = ROUTES, min_margin: int = MIN_MARGIN):
+        self.routes = {
+            agent_name: [(re.compile(rf"\b(?:{pattern})\b", re.IGNORECASE), weight) for pattern, weight in rules]
+            for agent_name, rules in routes.items()
+        }
+        self.min_margin = min_margin
+
+    def scores(self, text: str) -> Dict[str, int]:
+        return {
+            agent_name: sum(weight for pattern, weight in rules if pattern.search(text))
+            for agent_name, rules in self.routes.items()
+        }
+
+    def route(self, text: str) -> Optional[str]:
+        """The sub-agent that clearly matches text, or None when the model should decide."""
+        ranked = sorted(self.scores(text).items(), key=lambda item: item[1], reverse=True)
+        if not ranked or ranked[0][1] == 0:
+            return None
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0
+        return ranked[0][0] if ranked[0][1] - runner_up >= self.min_margin else None
+
+    def __call__(self, callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+        if not FAST_ROUTER_ENABLED:
+            return None
+        started = time.perf_counter()
+        text = _new_user_message(callback_context, llm_request)
+        agent_name = self.route(text) if text else None
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logger.info(
+            "Pre-router %s in %.3f ms (invocation %s)",
+            f"delegated to {agent_name}" if agent_name else "deferred to the model",
+            elapsed_ms, callback_context.invocation_id,
+        )
+        if agent_name is None:
+            return None
+        return LlmResponse(content=types.Content(role="model", parts=[
+            types.Part(text=f"🎯 Delegating your request to {agent_name}..."),
+            types.Part(function_call=types.FunctionCall(name="transfer_to_agent", args={"agent_name": agent_name})),
+        ]))
+
+
+def _new_user_message(callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[str]:
+    """
+    Text of the user's message when the model is about to see it for the first time in this
+    invocation, i.e. no tool result or other agent's reply came after it.
+    """
+    user_content = callback_context.user_content
+    if not llm_request.contents or user_content is None or not user_content.parts:
+        return None
+    last = llm_request.contents[-1]
+    text = " ".join(part.text for part in user_content.parts if part.text)
+    if last.role != "user" or " ".join(part.text for part in last.parts or [] if part.text) != text:
+        return None
+    return text or None
@@ -0,0 +1,162 @@
+import contextlib
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import deadlines
+from metrics import metrics
+
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+# Class of the work currently running. Tools run as interactive unless they opt into background.
+current_request_class: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "current_request_class", default=INTERACTIVE
+)
+
+
+class AdmissionRejected(RuntimeError):
+    """Raised when the scheduler is saturated and a request cannot be queued or waited too long."""
+
+
+@contextlib.contextmanager
+def request_class(name: str) -> Iterator[None]:
+    """
+    Run the enclosed Airflow requests under the given request class.
+    The class is carried by a context variable, so it follows asyncio.to_thread calls.
+    """
+    token = current_request_class.set(name)
+    try:
+        yield
+    finally:
+        current_request_class.reset(token)
+
+
+class ClassLimits:
+    """
+    Scheduling limits for one request class.
+
+    Args:
+        priority: Lower values are admitted first when requests are waiting
+        max_concurrency: Maximum number of in-flight requests of this class
+        max_queue: Maximum number of waiting requests before new ones are rejected
+        queue_timeout: Seconds a request may wait for a slot before it is rejected
+    """
+
+    def __init__(self, priority: int, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.priority = priority
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+
+class AdmissionController:
+    """
+    Priority-aware admission control for upstream Airflow requests.
+
+    Requests take a slot from both their class limit and the shared max_concurrency.
+    When slots are taken, requests wait in a single priority queue ordered by class
+    priority then arrival, so interactive work overtakes background work. A request
+    is rejected at once when its class queue is full, and after queue_timeout when no
+    slot freed up in time.
+
+    Args:
+        max_concurrency: Maximum number of in-flight requests across all classes
+        classes: Limits for each request class
+        name: Name of the upstream the controller guards, used as the metric label
+    """
+
+    def __init__(self, max_concurrency: int, classes: Dict[str, ClassLimits], name: str = "default"):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.classes = classes
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._in_flight_by_class = {class_name: 0 for class_name in classes}
+        self._waiting_by_class = {class_name: 0 for class_name in classes}
+        self._waiters: List[Tuple[int, int, str]] = []
+        self._sequence = itertools.count()
+
+    def _can_admit(self, entry: Tuple[int, int, str]) -> bool:
+        """A waiter is admitted when it is the first waiter whose class has a free slot."""
+        if self._in_flight >= self.max_concurrency:
+            return False
+        for waiter in sorted(self._waiters):
+            name = waiter[2]
+            if self._in_flight_by_class[name] < self.classes[name].max_concurrency:
+                return waiter == entry
+        return False
+
+    def acquire(self, name: Optional[str] = None) -> str:
+        """Block until a slot is free for the request class and return the class that was admitted."""
+        name = name or current_request_class.get()
+        if name not in self.classes:
+            raise ValueError(f"Unknown request class '{name}', expected one of {sorted(self.classes)}")
+        limits = self.classes[name]
+        started = time.monotonic()
+        with self._condition:
+            if self._waiting_by_class[name] >= limits.max_queue and not self._has_free_slot(name):
+                metrics.inc("mcp_admission_rejected_total", instance=self.name, request_class=name, reason="queue_full")
+                raise AdmissionRejected(
+                    f"Airflow request scheduler for '{self.name}' is saturated: {self._waiting_by_class[name]} {name} "
+                    f"requests already waiting and {self._in_flight} in flight. Retry later."
+                )
+            entry = (limits.priority, next(self._sequence), name)
+            heapq.heappush(self._waiters, entry)
+            self._waiting_by_class[name] += 1
+            self._report(name)
+            try:
+                deadline = started + limits.queue_timeout
+                while not self._can_admit(entry):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        metrics.inc("mcp_admission_rejected_total", instance=self.name, request_class=name, reason="queue_timeout")
+                        raise AdmissionRejected(
+                            f"Airflow request scheduler for '{self.name}' is saturated: {name} request waited "
+                            f"{limits.queue_timeout:.1f}s without getting a slot. Retry later."
+                        )
+                    deadlines.wait(self._condition, remaining)
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._waiting_by_class[name] -= 1
+                # Whoever is next in line may have become admissible
+                self._condition.notify_all()
+            self._in_flight += 1
+            self._in_flight_by_class[name] += 1
+            self._report(name)
+        metrics.observe(
+            "mcp_admission_queue_wait_seconds", time.monotonic() - started, instance=self.name, request_class=name
+        )
+        return name
+
+    def release(self, name: str) -> None:
+        with self._condition:
+            self._in_flight -= 1
+            self._in_flight_by_class[name] -= 1
+            self._report(name)
+            self._condition.notify_all()
+
+    @contextlib.contextmanager
+    def slot(self, name: Optional[str] = None) -> Iterator[str]:
+        """Hold an admission slot for the duration of the block."""
+        admitted = self.acquire(name)
+        try:
+            yield admitted
+        finally:
+            self.release(admitted)
+
+    def _has_free_slot(self, name: str) -> bool:
+        return (
+            not self._waiters
+            and self._in_flight < self.max_concurrency
+            and self._in_flight_by_class[name] < self.classes[name].max_concurrency
+        )
+
+    def _report(self, name: str) -> None:
+        metrics.set("mcp_admission_in_flight", self._in_flight_by_class[name], instance=self.name, request_class=name)
+        metrics.set("mcp_admission_queued", self._waiting_by_class[name], instance=self.name, request_class=name)
@@ -0,0 +1,100 @@
+"""
+Import-time benchmark for the MCP server, failing when startup gets slower.
+
+Each run imports fastmcp and then the server in a fresh interpreter. The time spent on
+our own modules (server import minus fastmcp import) is compared against the budget in
+import_budget.json, and the run also fails when importing the server loads a tool module
+or the HTTP stack, or when tools/manifest.json is out of date.
+
+Usage:
+    python benchmarks/bench_import_time.py [--repeat 7] [--budget-ms 150] [--update]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from tools.manifest import load_manifest  # noqa: E402
+
+BUDGET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "import_budget.json")
+# Modules that must only load on the first tool call
+LAZY_MODULES = [
+    "clients", "http_utils", "requests", "tools.dag", "tools.data_version", "tools.diagnose",
+    "tools.import_errors", "tools.monitor", "tools.task_instance", "tools.truncation",
+]
+
+PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import fastmcp
+t1 = time.perf_counter()
+import server
+t2 = time.perf_counter()
+print(json.dumps({
+    "fastmcp_ms": (t1 - t0) * 1000,
+    "server_ms": (t2 - t1) * 1000,
+    "loaded": [name for name in %r if name in sys.modules],
+}))
+""" % (LAZY_MODULES,)
+
+
+def measure(repeat: int) -> List[Dict]:
+    env = {**os.environ, "PYTHONPATH": BASE_DIR, "PYTHONWARNINGS": "ignore"}
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE], cwd=BASE_DIR, env=env, capture_output=True, text=True, check=True
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return runs
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--budget-ms", type=float, help="Override the budget from import_budget.json")
+    parser.add_argument("--update", action="store_true", help="Record the measured time (plus headroom) as the budget")
+    args = parser.parse_args()
+
+    runs = measure(args.repeat)
+    fastmcp_ms = statistics.median(run["fastmcp_ms"] for run in runs)
+    server_ms = statistics.median(run["server_ms"] for run in runs)
+    print(f"fastmcp import: {fastmcp_ms:8.1f} ms (median of {args.repeat})")
+    print(f"server import:  {server_ms:8.1f} ms on top of fastmcp")
+
+    if args.update:
+        with open(BUDGET_PATH, "w", encoding="utf-8") as f:
+            json.dump({"server_import_ms": round(server_ms * 1.5 + 10)}, f, indent=2)
+            f.write("\n")
+        print(f"Updated {BUDGET_PATH}")
+        return 0
+
+    failures = []
+    if args.budget_ms is not None:
+        budget_ms = args.budget_ms
+    else:
+        with open(BUDGET_PATH, "r", encoding="utf-8") as f:
+            budget_ms = json.load(f)["server_import_ms"]
+    if server_ms > budget_ms:
+        failures.append(f"server import took {server_ms:.1f} ms, over the {budget_ms:g} ms budget")
+    loaded = sorted({name for run in runs for name in run["loaded"]})
+    if loaded:
+        failures.append(f"importing the server loaded {', '.join(loaded)}, which should load on first use")
+    if load_manifest() is None:
+        failures.append("tools/manifest.json is stale, regenerate it with: python -m tools.manifest")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print(f"OK: within the {budget_ms:g} ms budget")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
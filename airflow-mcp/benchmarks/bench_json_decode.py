@@ -0,0 +1,109 @@
+"""
+Micro-benchmark for decoding and encoding large Airflow responses.
+
+Compares the previous path (stdlib json via requests' response.json()) with the
+json_codec backend (orjson when installed), and reports how much gzip/brotli shrink
+the payloads on the wire.
+
+Usage:
+    python benchmarks/bench_json_decode.py [--task-instances 5000] [--log-mb 2] [--repeat 5]
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json_codec  # noqa: E402
+
+
+def task_instance_collection(count: int) -> Dict[str, Any]:
+    states = ["success", "failed", "running", "upstream_failed", "skipped"]
+    return {
+        "task_instances": [
+            {
+                "task_id": f"extract_partition_{i}",
+                "dag_id": "data_pipeline_etl",
+                "dag_run_id": "scheduled__2024-01-01T00:00:00+00:00",
+                "execution_date": "2024-01-01T00:00:00+00:00",
+                "start_date": "2024-01-01T00:01:02.123456+00:00",
+                "end_date": "2024-01-01T00:03:04.654321+00:00",
+                "duration": 122.53 + i,
+                "state": states[i % len(states)],
+                "try_number": 1 + i % 3,
+                "max_tries": 3,
+                "hostname": f"worker-{i % 8}.airflow.svc.cluster.local",
+                "unixname": "airflow",
+                "pool": "default_pool",
+                "pool_slots": 1,
+                "queue": "default",
+                "priority_weight": 10,
+                "operator": "PythonOperator",
+                "queued_when": "2024-01-01T00:00:59.000000+00:00",
+                "pid": 4000 + i,
+                "executor_config": "{}",
+                "sla_miss": None,
+                "rendered_map_index": None,
+                "rendered_fields": {"op_kwargs": {"partition": i, "table": "events"}, "templates_dict": None},
+                "trigger": None,
+                "triggerer_job": None,
+                "note": None,
+            }
+            for i in range(count)
+        ],
+        "total_entries": count,
+    }
+
+
+def task_log(megabytes: float) -> Dict[str, Any]:
+    line = "[2024-01-01, 00:01:02 UTC] {taskinstance.py:1234} INFO - Processing partition 42 of events\n"
+    return {"content": line * int(megabytes * 1024 * 1024 / len(line)), "continuation_token": None}
+
+
+def best_of(repeat: int, fn: Callable[[], Any]) -> float:
+    timings: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--task-instances", type=int, default=5000)
+    parser.add_argument("--log-mb", type=float, default=2.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+
+    payloads = {
+        f"task_instances x{args.task_instances}": task_instance_collection(args.task_instances),
+        f"log {args.log_mb:g} MB": task_log(args.log_mb),
+    }
+    print(f"json_codec backend: {json_codec.BACKEND}")
+    print(f"{'payload':<24}{'size MB':>9}{'gzip %':>8}{'br %':>8}"
+          f"{'json ms/MB':>12}{'codec ms/MB':>13}{'speedup':>9}{'encode ms/MB':>14}")
+    for name, payload in payloads.items():
+        body = json.dumps(payload).encode("utf-8")
+        mb = len(body) / (1024 * 1024)
+        gzip_ratio = 100 * len(gzip.compress(body, 6)) / len(body)
+        br_ratio = f"{100 * len(brotli.compress(body, quality=5)) / len(body):.1f}" if brotli else "n/a"
+        # requests' response.json() decodes the bytes to text and calls the stdlib json module
+        before = best_of(args.repeat, lambda: json.loads(body.decode("utf-8"))) / mb * 1000
+        after = best_of(args.repeat, lambda: json_codec.loads(body)) / mb * 1000
+        encode = best_of(args.repeat, lambda: json_codec.dumps(payload)) / mb * 1000
+        print(f"{name:<24}{mb:>9.2f}{gzip_ratio:>8.1f}{br_ratio:>8}"
+              f"{before:>12.2f}{after:>13.2f}{before / after:>8.1f}x{encode:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import os
+from urllib.parse import urljoin
+
+from admission import AdmissionController, ClassLimits, INTERACTIVE, BACKGROUND
+from concurrency import AdaptiveLimiterRegistry
+from credentials import IdentityClientPool, PASSTHROUGH_MODE
+from http_cache import RevalidationCache
+from http_utils import HTTPUtils
+from instances import DEFAULT_INSTANCE, InstanceConfig, InstanceRegistry, load_instance_configs
+from resilience import CircuitBreakerRegistry, RetryBudget, RetryPolicy
+from shared_cache import build_shared_store
+
+
+AIRFLOW_HOST = os.getenv("AIRFLOW_HOST", "http://localhost:8080")
+AIRFLOW_BASE_URL = urljoin(AIRFLOW_HOST, "/api/v1")
+SSL_VERIFY = os.getenv("SSL_VERIFY", "True").lower() == "true"
+AIRFLOW_USERNAME = os.getenv("AIRFLOW_USERNAME", "airflow")
+AIRFLOW_PASSWORD = os.getenv("AIRFLOW_PASSWORD", "airflow")
+# Worker processes sharing the upstream limits, set by run_workers() for each worker
+WORKER_COUNT = max(1, int(os.getenv("MCP_WORKER_COUNT", "1")))
+
+
+def per_worker(limit: float, minimum: float = 1) -> float:
+    """
+    This process's share of an upstream limit, so that all workers together stay within it.
+    Admission slots, AIMD limits and the retry budget live in each process.
+    """
+    return max(minimum, limit / WORKER_COUNT)
+
+
+def build_admission(name: str, max_concurrency: int) -> AdmissionController:
+    """Upstream admission control: background work gets a smaller share so interactive requests always find a slot."""
+    return AdmissionController(
+        name=name,
+        max_concurrency=int(per_worker(max_concurrency)),
+        classes={
+            INTERACTIVE: ClassLimits(
+                priority=0,
+                max_concurrency=int(per_worker(min(max_concurrency, int(os.getenv("MCP_INTERACTIVE_CONCURRENCY", "16"))))),
+                max_queue=int(os.getenv("MCP_INTERACTIVE_QUEUE", "64")),
+                queue_timeout=float(os.getenv("MCP_INTERACTIVE_QUEUE_TIMEOUT", "10")),
+            ),
+            BACKGROUND: ClassLimits(
+                priority=1,
+                max_concurrency=int(per_worker(min(max_concurrency, int(os.getenv("MCP_BACKGROUND_CONCURRENCY", "4"))))),
+                max_queue=int(os.getenv("MCP_BACKGROUND_QUEUE", "32")),
+                queue_timeout=float(os.getenv("MCP_BACKGROUND_QUEUE_TIMEOUT", "30")),
+            ),
+        },
+    )
+
+
+# AIMD concurrency limit per Airflow host, backing off on slow responses and 429/5xx
+limiters = AdaptiveLimiterRegistry(
+    initial_limit=per_worker(float(os.getenv("MCP_UPSTREAM_INITIAL_LIMIT", "8"))),
+    min_limit=per_worker(float(os.getenv("MCP_UPSTREAM_MIN_LIMIT", "1"))),
+    max_limit=per_worker(float(os.getenv("MCP_UPSTREAM_MAX_LIMIT", "32"))),
+    latency_target=float(os.getenv("MCP_UPSTREAM_LATENCY_TARGET", "2.0")),
+    backoff_ratio=float(os.getenv("MCP_UPSTREAM_BACKOFF_RATIO", "0.7")),
+)
+# Idempotent retries with jittered backoff, capped by a global retry budget, and a breaker per host.
+# The budget's ratio applies to each worker's own requests, its floor is shared out; breakers
+# stay per worker, so each lets at most one probe through per reset timeout
+retry_policy = RetryPolicy(
+    max_attempts=int(os.getenv("MCP_RETRY_MAX_ATTEMPTS", "3")),
+    base_delay=float(os.getenv("MCP_RETRY_BASE_DELAY", "0.2")),
+    max_delay=float(os.getenv("MCP_RETRY_MAX_DELAY", "2.0")),
+)
+retry_budget = RetryBudget(
+    ratio=float(os.getenv("MCP_RETRY_BUDGET_RATIO", "0.2")),
+    min_per_second=per_worker(float(os.getenv("MCP_RETRY_BUDGET_MIN_PER_SECOND", "1")), minimum=0),
+    max_tokens=per_worker(20.0),
+)
+breakers = CircuitBreakerRegistry(
+    failure_threshold=int(os.getenv("MCP_CIRCUIT_FAILURE_THRESHOLD", "5")),
+    reset_timeout=float(os.getenv("MCP_CIRCUIT_RESET_TIMEOUT", "15")),
+)
+
+
+# Cache tier shared by worker processes (SQLite file or Redis), None for a single process
+shared_store = build_shared_store(os.getenv("MCP_SHARED_CACHE_URL"))
+
+
+def build_client(config: InstanceConfig) -> HTTPUtils:
+    """
+    HTTP client for one Airflow instance. Pool, auth, admission limits and cache belong to
+    the instance; adaptive limiters and circuit breakers are keyed by host and the retry
+    budget is global, so they are shared.
+    """
+    return HTTPUtils(
+        base_url=urljoin(config.host, "/api/v1"),
+        verify_ssl=config.ssl_verify,
+        timeout=config.timeout,
+        auth=(config.username, config.password),
+        admission=build_admission(config.name, config.max_concurrency),
+        limiters=limiters,
+        retry_policy=retry_policy,
+        retry_budget=retry_budget,
+        breakers=breakers,
+        cache=RevalidationCache(
+            max_entries=int(os.getenv("MCP_HTTP_CACHE_ENTRIES", "512")),
+            shared=shared_store,
+            fresh_for=float(os.getenv("MCP_HTTP_CACHE_TTL", "0")),
+        ),
+        pool_size=config.pool_size,
+    )
+
+
+# Named Airflow instances. Without AIRFLOW_INSTANCES the AIRFLOW_HOST deployment is the only one.
+airflow_instances = InstanceRegistry.from_configs(
+    load_instance_configs(InstanceConfig(
+        name=DEFAULT_INSTANCE,
+        host=AIRFLOW_HOST,
+        username=AIRFLOW_USERNAME,
+        password=AIRFLOW_PASSWORD,
+        ssl_verify=SSL_VERIFY,
+        max_concurrency=int(os.getenv("MCP_MAX_UPSTREAM_CONCURRENCY", "16")),
+    )),
+    build_client,
+    default=os.getenv("AIRFLOW_DEFAULT_INSTANCE", DEFAULT_INSTANCE),
+    # Callers' own credentials, when passed through, get their own pooled clients and cache partition
+    identities=IdentityClientPool(
+        mode=PASSTHROUGH_MODE,
+        max_clients=int(os.getenv("MCP_CREDENTIAL_CLIENTS", "64")),
+    ),
+)
@@ -0,0 +1,122 @@
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from admission import AdmissionRejected
+import deadlines
+from metrics import metrics
+
+
+# Status codes that mean the upstream is overloaded rather than that the request was wrong
+OVERLOAD_STATUS_CODES = {429, 502, 503, 504}
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit for one upstream host.
+
+    Every successful response that comes back within latency_target grows the limit by
+    about one request per limit's worth of responses (additive increase). A 429/5xx, a
+    failed connection or a slow response multiplies the limit by backoff_ratio
+    (multiplicative decrease), at most once per cooldown so a burst of slow responses
+    from the same congested period only counts once.
+
+    Args:
+        host: Upstream host the limit applies to, used as the metric label
+        initial_limit: Starting concurrency limit
+        min_limit: The limit never drops below this value
+        max_limit: The limit never grows above this value
+        latency_target: Responses slower than this (seconds) count as congestion
+        backoff_ratio: Factor applied to the limit on congestion
+        cooldown: Minimum seconds between two decreases
+    """
+
+    def __init__(
+        self,
+        host: str,
+        initial_limit: float = 8,
+        min_limit: float = 1,
+        max_limit: float = 32,
+        latency_target: float = 2.0,
+        backoff_ratio: float = 0.7,
+        cooldown: float = 1.0
+    ):
+        self.host = host
+        self.limit = float(initial_limit)
+        self.min_limit = float(min_limit)
+        self.max_limit = float(max_limit)
+        self.latency_target = latency_target
+        self.backoff_ratio = backoff_ratio
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+        self._report()
+
+    def acquire(self, timeout: Optional[float] = None) -> None:
+        """Block until fewer than limit requests are in flight to this host."""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    metrics.inc("mcp_upstream_limiter_rejected_total", host=self.host)
+                    raise AdmissionRejected(
+                        f"Airflow at {self.host} is at its adaptive concurrency limit "
+                        f"({int(self.limit)} in flight). Retry later."
+                    )
+                deadlines.wait(self._condition, remaining)
+            self.in_flight += 1
+            self._report()
+
+    def release(self, latency: float, status_code: Optional[int]) -> None:
+        """
+        Record the outcome of a request and adjust the limit.
+        A status_code of None means the request failed without a response.
+        """
+        congested = (
+            status_code is None
+            or status_code in OVERLOAD_STATUS_CODES
+            or latency > self.latency_target
+        )
+        with self._condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if congested:
+                if now - self._last_decrease >= self.cooldown:
+                    self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+                    self._last_decrease = now
+                    metrics.inc("mcp_upstream_limit_decreases_total", host=self.host)
+            else:
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self._report()
+            self._condition.notify_all()
+        metrics.observe("mcp_upstream_latency_seconds", latency, host=self.host)
+
+    def _report(self) -> None:
+        metrics.set("mcp_upstream_concurrency_limit", int(self.limit), host=self.host)
+        metrics.set("mcp_upstream_in_flight", self.in_flight, host=self.host)
+
+
+class AdaptiveLimiterRegistry:
+    """
+    One AdaptiveLimiter per upstream host, created on first use with shared settings.
+
+    Args:
+        **limiter_kwargs: Arguments passed to every AdaptiveLimiter
+    """
+
+    def __init__(self, **limiter_kwargs):
+        self.limiter_kwargs = limiter_kwargs
+        self._limiters: Dict[str, AdaptiveLimiter] = {}
+        self._lock = threading.Lock()
+
+    def for_url(self, url: str) -> AdaptiveLimiter:
+        host = urlparse(url).netloc or url
+        with self._lock:
+            limiter = self._limiters.get(host)
+            if limiter is None:
+                limiter = AdaptiveLimiter(host, **self.limiter_kwargs)
+                self._limiters[host] = limiter
+            return limiter
@@ -0,0 +1,102 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from http_utils import HTTPUtils
+from metrics import metrics
+
+
+# "off" always uses the service account, "optional" forwards the caller's credentials when
+# present and falls back to the service account, "required" rejects calls without them
+PASSTHROUGH_OFF = "off"
+PASSTHROUGH_OPTIONAL = "optional"
+PASSTHROUGH_REQUIRED = "required"
+
+PASSTHROUGH_MODE = os.getenv("MCP_CREDENTIAL_PASSTHROUGH", PASSTHROUGH_OFF).lower()
+CREDENTIAL_HEADER = os.getenv("MCP_CREDENTIAL_HEADER", "Authorization").lower()
+SERVICE_IDENTITY = "service"
+
+
+class MissingCredentials(RuntimeError):
+    """Raised when pass-through is required and the MCP request carries no Airflow credentials."""
+
+
+def request_credential(header: str = CREDENTIAL_HEADER) -> Optional[str]:
+    """
+    Airflow credentials of the current MCP request, taken verbatim from the given HTTP header
+    (e.g. "Basic dXNlcjpwYXNz"). Returns None outside HTTP transports or when the header is absent.
+    """
+    from fastmcp.server.dependencies import get_http_headers
+
+    return get_http_headers(include_all=True).get(header) or None
+
+
+def identity_of(credential: Optional[str]) -> str:
+    """Stable, non-reversible identity for a credential, so raw secrets never end up in cache keys."""
+    if not credential:
+        return SERVICE_IDENTITY
+    return hashlib.sha256(credential.encode("utf-8")).hexdigest()[:32]
+
+
+def current_identity() -> str:
+    """Identity the current request runs as, SERVICE_IDENTITY when credentials are not forwarded."""
+    if PASSTHROUGH_MODE == PASSTHROUGH_OFF:
+        return SERVICE_IDENTITY
+    return identity_of(request_credential())
+
+
+class IdentityClientPool:
+    """
+    Bounded LRU of HTTP clients per (instance, identity) for credential pass-through.
+
+    Each caller's credentials get their own pooled client, so keep-alive connections are
+    reused across calls instead of setting up a session per call, and requests never go out
+    with another caller's Authorization header. Clients share their instance's admission
+    controller and revalidation cache, with cache keys partitioned by identity, so a cached
+    response is only ever served back to the identity that fetched it.
+
+    Args:
+        mode: "off", "optional" or "required", see PASSTHROUGH_*
+        max_clients: Maximum number of per-identity clients kept (least recently used are evicted)
+        header: HTTP header of the MCP request that carries the Airflow credentials
+    """
+
+    def __init__(self, mode: str = PASSTHROUGH_OFF, max_clients: int = 64, header: str = CREDENTIAL_HEADER):
+        if mode not in (PASSTHROUGH_OFF, PASSTHROUGH_OPTIONAL, PASSTHROUGH_REQUIRED):
+            raise ValueError(f"Unknown credential pass-through mode '{mode}'")
+        self.mode = mode
+        self.max_clients = max_clients
+        self.header = header
+        self._clients: "OrderedDict[Tuple[str, str], HTTPUtils]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def client_for(self, instance: str, service_client: HTTPUtils) -> HTTPUtils:
+        """Client to use for the current request against the instance."""
+        if self.mode == PASSTHROUGH_OFF:
+            return service_client
+        credential = request_credential(self.header)
+        if credential is None:
+            if self.mode == PASSTHROUGH_REQUIRED:
+                raise MissingCredentials(
+                    f"Airflow credentials are required: send them in the '{self.header}' header of the MCP request"
+                )
+            return service_client
+
+        key = (instance, identity_of(credential))
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self._clients.move_to_end(key)
+                metrics.inc("mcp_identity_clients_total", result="hit")
+                return client
+            # Evicted clients are not closed: a request may still be using their session,
+            # the connections are released once the last reference is gone
+            client = service_client.for_identity(credential, key[1])
+            self._clients[key] = client
+            while len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+            metrics.inc("mcp_identity_clients_total", result="created")
+            metrics.set("mcp_identity_clients", len(self._clients))
+            return client
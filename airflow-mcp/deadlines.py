@@ -0,0 +1,126 @@
+import contextlib
+import contextvars
+import threading
+import time
+from typing import Iterator, Optional
+
+
+# Blocking waits wake up this often to notice a cancelled call
+CANCEL_POLL_INTERVAL = 0.1
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a tool call runs past its deadline."""
+
+
+class RequestCancelled(RuntimeError):
+    """Raised in worker threads once the MCP client has cancelled the tool call."""
+
+
+class Deadline:
+    """
+    Deadline and cancellation flag of one tool call.
+
+    The tool wrapper sets it in a context variable, so it follows asyncio.to_thread into the
+    threads running the blocking HTTP requests. Those threads bound their upstream timeouts
+    by remaining() and call check() between steps, so a cancelled or expired call stops
+    holding admission slots and connections at the next step instead of at the request timeout.
+
+    Args:
+        timeout: Seconds the call may run, None for no deadline
+    """
+
+    def __init__(self, timeout: Optional[float] = None):
+        self.expires_at = time.monotonic() + timeout if timeout is not None else None
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline, None when the call has no deadline."""
+        if self.expires_at is None:
+            return None
+        return self.expires_at - time.monotonic()
+
+    def check(self) -> None:
+        """Raise RequestCancelled or DeadlineExceeded when the call should stop."""
+        if self.cancelled:
+            raise RequestCancelled("The tool call was cancelled by the client")
+        remaining = self.remaining()
+        if remaining is not None and remaining <= 0:
+            raise DeadlineExceeded("The tool call ran past its deadline")
+
+    def bound(self, timeout: Optional[float]) -> Optional[float]:
+        """Shorten a timeout so it ends no later than the deadline."""
+        self.check()
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        return remaining if timeout is None else min(timeout, remaining)
+
+    def sleep(self, seconds: float) -> bool:
+        """
+        Sleep unless cancelled first. Returns False without sleeping when the deadline
+        would pass during the sleep, so callers can give up instead of waiting in vain.
+        """
+        remaining = self.remaining()
+        if remaining is not None and remaining <= seconds:
+            return False
+        if self._cancelled.wait(seconds):
+            self.check()
+        return True
+
+
+current_deadline: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar(
+    "current_deadline", default=None
+)
+
+
+@contextlib.contextmanager
+def deadline_scope(timeout: Optional[float]) -> Iterator[Deadline]:
+    """Run the enclosed tool call under a new deadline."""
+    deadline = Deadline(timeout)
+    token = current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        current_deadline.reset(token)
+
+
+def check() -> None:
+    """Raise when the current call was cancelled or is past its deadline. No-op outside a call."""
+    deadline = current_deadline.get()
+    if deadline is not None:
+        deadline.check()
+
+
+def bound(timeout: Optional[float]) -> Optional[float]:
+    """Shorten a timeout to the current call's deadline."""
+    deadline = current_deadline.get()
+    return deadline.bound(timeout) if deadline is not None else timeout
+
+
+def sleep(seconds: float) -> bool:
+    """Sleep within the current call's deadline, see Deadline.sleep()."""
+    deadline = current_deadline.get()
+    if deadline is None:
+        time.sleep(seconds)
+        return True
+    return deadline.sleep(seconds)
+
+
+def wait(condition: threading.Condition, timeout: Optional[float]) -> None:
+    """
+    Wait on a condition (whose lock is held) for at most timeout seconds, waking up
+    regularly to raise as soon as the current call is cancelled or past its deadline.
+    """
+    if current_deadline.get() is None:
+        condition.wait(timeout)
+        return
+    condition.wait(CANCEL_POLL_INTERVAL if timeout is None else min(timeout, CANCEL_POLL_INTERVAL))
+    check()
@@ -0,0 +1,156 @@
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+
+import json_codec
+from metrics import metrics
+
+
+CacheKey = Tuple[str, str, Tuple[Tuple[str, str], ...]]
+
+
+class _Entry:
+    def __init__(
+        self,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        digest: str,
+        size: int,
+        value: Any,
+        stored_at: float
+    ):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.digest = digest
+        self.size = size
+        self.value = value
+        self.stored_at = stored_at
+
+    def encode(self) -> bytes:
+        return json_codec.dumps(self.__dict__).encode("utf-8")
+
+    @classmethod
+    def decode(cls, data: bytes) -> "_Entry":
+        return cls(**json_codec.loads(data))
+
+
+class RevalidationCache:
+    """
+    Conditional revalidation cache for GET responses.
+
+    Responses are stored with their ETag/Last-Modified validators. Revisits send
+    If-None-Match/If-Modified-Since, and a 304 is served from the cache without the body
+    being transferred. When the upstream sends no validators, a hash of the body is kept
+    instead, so an unchanged body reuses the already decoded value.
+
+    With a shared store, entries are also written to it and local misses are looked up there,
+    so worker processes reuse each other's responses. Responses younger than fresh_for are
+    served without contacting Airflow at all.
+
+    Args:
+        max_entries: Maximum number of cached responses (least recently used are evicted)
+        shared: SqliteStore or RedisStore shared with other processes (optional)
+        fresh_for: Seconds a response is served without revalidation (default: 0, always revalidate)
+    """
+
+    SHARED_NAMESPACE = "http"
+
+    def __init__(self, max_entries: int = 512, shared: Optional[Any] = None, fresh_for: float = 0.0):
+        self.max_entries = max_entries
+        self.shared = shared
+        self.fresh_for = fresh_for
+        self._entries: "OrderedDict[CacheKey, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(url: str, params: Optional[Dict[str, Any]], partition: Optional[str] = None) -> CacheKey:
+        """Entries of different partitions (e.g. caller identities) never match each other."""
+        return partition or "", url, tuple(sorted((k, str(v)) for k, v in (params or {}).items()))
+
+    def _get(self, key: CacheKey) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        if self.shared is None:
+            return None
+        data = self.shared.get(self.SHARED_NAMESPACE, self._shared_key(key))
+        if data is None:
+            return None
+        entry = _Entry.decode(data)
+        self._put_local(key, entry)
+        return entry
+
+    def _put_local(self, key: CacheKey, entry: _Entry) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            metrics.set("mcp_http_cache_entries", len(self._entries))
+
+    @staticmethod
+    def _shared_key(key: CacheKey) -> str:
+        return hashlib.sha256(json_codec.dumps(key).encode("utf-8")).hexdigest()
+
+    def fresh(self, key: CacheKey) -> Tuple[bool, Any]:
+        """Return (True, value) when a cached response is recent enough to skip the request."""
+        if self.fresh_for <= 0:
+            return False, None
+        entry = self._get(key)
+        if entry is None or time.time() - entry.stored_at >= self.fresh_for:
+            return False, None
+        metrics.inc("mcp_http_cache_requests_total", result="fresh")
+        return True, copy.deepcopy(entry.value)
+
+    def validators(self, key: CacheKey) -> Dict[str, str]:
+        """Conditional request headers for a cached response, empty when nothing is cached."""
+        entry = self._get(key)
+        headers: Dict[str, str] = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def revalidate(self, key: CacheKey, response: requests.Response) -> Tuple[bool, Any]:
+        """
+        Return (True, value) when the response confirms the cached value is still current,
+        either with a 304 or with an identical body, and (False, None) otherwise. A 304 for an
+        entry evicted since its validators were sent also returns (False, None): the caller has
+        to repeat the request without validators.
+        """
+        entry = self._get(key)
+        if entry is not None and response.status_code == 304:
+            metrics.inc("mcp_http_cache_requests_total", result="not_modified")
+            metrics.inc("mcp_http_cache_bytes_saved_total", entry.size)
+            return True, copy.deepcopy(entry.value)
+        if entry is not None and response.status_code == 200 and entry.digest == self._digest(response):
+            metrics.inc("mcp_http_cache_requests_total", result="unchanged_body")
+            return True, copy.deepcopy(entry.value)
+        metrics.inc("mcp_http_cache_requests_total", result="miss")
+        return False, None
+
+    def store(self, key: CacheKey, response: requests.Response, value: Any) -> None:
+        entry = _Entry(
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            digest=self._digest(response),
+            size=len(response.content),
+            value=copy.deepcopy(value),
+            stored_at=time.time(),
+        )
+        self._put_local(key, entry)
+        if self.shared is not None:
+            self.shared.set(self.SHARED_NAMESPACE, self._shared_key(key), entry.encode())
+
+    @staticmethod
+    def _digest(response: requests.Response) -> str:
+        return hashlib.sha256(response.content).hexdigest()
@@ -1,13 +1,35 @@
+import asyncio
+import time
 import requests
-from typing import Optional, Dict, Any, Union
+import requests.adapters
+from typing import Callable, Optional, Dict, Any, Union
 from requests.exceptions import RequestException, Timeout, ConnectionError
 import json
+from urllib.parse import urlparse
+
+from admission import AdmissionController
+from concurrency import AdaptiveLimiterRegistry
+import deadlines
+from http_cache import RevalidationCache
+import json_codec
+from metrics import metrics
+from resilience import CircuitBreakerRegistry, RetryBudget, RetryPolicy
+
+try:
+    import brotli  # noqa: F401 - lets urllib3 decode brotli responses
+    ACCEPT_ENCODING = 'br, gzip, deflate'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+# Streamed bodies are read in chunks of this size between deadline checks
+BODY_CHUNK_SIZE = 16 * 1024
 
 
 class HTTPUtils:
     """
     A utility class for making HTTP requests with configurable global settings.
-    Each request uses its own session.
+    Each request uses its own session unless pool_size is set, in which case requests
+    share a pooled session with keep-alive connections.
     
     Args:
         base_url: Base URL for all requests (optional)
@@ -15,6 +37,14 @@ class HTTPUtils:
         timeout: Default timeout for requests in seconds (default: 30)
         headers: Default headers to include in all requests (optional)
         auth: Authentication tuple (username, password) for all requests (optional)
+        admission: Admission controller that bounds and prioritises in-flight requests (optional)
+        limiters: Per-host adaptive concurrency limiters driven by upstream latency (optional)
+        retry_policy: Which failed idempotent requests are retried and the backoff between attempts (optional)
+        retry_budget: Shared budget that caps retries to a fraction of all requests (optional)
+        breakers: Per-host circuit breakers that fail fast while Airflow is down (optional)
+        cache: Conditional revalidation cache for GET JSON responses (optional)
+        pool_size: Size of a shared keep-alive connection pool (optional)
+        cache_partition: Prefix of this client's cache keys, so clients sharing a cache never see each other's entries (optional)
     """
     
     def __init__(
@@ -23,22 +53,66 @@ class HTTPUtils:
         verify_ssl: bool = True,
         timeout: int = 30,
         headers: Optional[Dict[str, str]] = None,
-        auth: Optional[tuple] = None
+        auth: Optional[tuple] = None,
+        admission: Optional[AdmissionController] = None,
+        limiters: Optional[AdaptiveLimiterRegistry] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        retry_budget: Optional[RetryBudget] = None,
+        breakers: Optional[CircuitBreakerRegistry] = None,
+        cache: Optional[RevalidationCache] = None,
+        pool_size: Optional[int] = None,
+        cache_partition: Optional[str] = None
     ):
         self.base_url = base_url.rstrip('/') if base_url else None
         self.verify_ssl = verify_ssl
         self.timeout = timeout
         
-        # Set default headers with Content-Type as application/json
+        # Set default headers with Content-Type as application/json and compressed transfer
         self.default_headers = {
             'Content-Type': 'application/json',
-            'Accept': 'application/json'
+            'Accept': 'application/json',
+            'Accept-Encoding': ACCEPT_ENCODING
         }
         if headers:
             self.default_headers.update(headers)
             
         self.auth = auth
+        self.admission = admission
+        self.limiters = limiters
+        self.retry_policy = retry_policy
+        self.retry_budget = retry_budget
+        self.breakers = breakers
+        self.cache = cache
+        self.cache_partition = cache_partition
+        self.pool_size = pool_size
+        self.session = None
+        if pool_size:
+            self.session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            self.session.mount('http://', adapter)
+            self.session.mount('https://', adapter)
         
+    def for_identity(self, authorization: str, identity: str) -> "HTTPUtils":
+        """
+        Client that sends the given Authorization header instead of this client's credentials.
+        It has its own connection pool but shares admission, limiters, retries, breakers and the
+        cache, with cache keys partitioned by identity.
+        """
+        return HTTPUtils(
+            base_url=self.base_url,
+            verify_ssl=self.verify_ssl,
+            timeout=self.timeout,
+            headers={**self.default_headers, 'Authorization': authorization},
+            admission=self.admission,
+            limiters=self.limiters,
+            retry_policy=self.retry_policy,
+            retry_budget=self.retry_budget,
+            breakers=self.breakers,
+            cache=self.cache,
+            pool_size=self.pool_size,
+            cache_partition=identity
+        )
+
     def _build_url(self, endpoint: str) -> str:
         """Construct full URL from base URL and endpoint."""
         if endpoint.startswith('http://') or endpoint.startswith('https://'):
@@ -62,11 +136,14 @@ class HTTPUtils:
         headers: Optional[Dict[str, str]] = None,
         params: Optional[Dict[str, Any]] = None,
         timeout: Optional[int] = None,
+        request_class: Optional[str] = None,
         **kwargs
     ) -> requests.Response:
         """
         Make an HTTP request with error handling.
-        Each request uses its own session.
+        Each request uses its own session. Idempotent requests that fail with a connection
+        error, a timeout or a retryable status are retried according to the retry policy
+        while the retry budget allows it.
         
         Args:
             endpoint: API endpoint or full URL
@@ -75,20 +152,99 @@ class HTTPUtils:
             headers: Request-specific headers
             params: URL query parameters
             timeout: Request-specific timeout (overrides default)
+            request_class: Admission class of the request (defaults to the current context's class)
             **kwargs: Additional arguments to pass to requests
             
         Returns:
             requests.Response object
             
         Raises:
+            admission.AdmissionRejected: If the scheduler is saturated
+            resilience.CircuitOpenError: If the circuit breaker for the host is open
             requests.exceptions.Timeout: If request times out
             requests.exceptions.ConnectionError: If connection fails
             requests.exceptions.HTTPError: If response status indicates error
             requests.exceptions.RequestException: For other request errors
         """
         url = self._build_url(endpoint)
+        breaker = self.breakers.for_url(url) if self.breakers else None
+        if self.retry_budget:
+            self.retry_budget.record_request()
+        attempt = 1
+        while True:
+            deadlines.check()
+            if breaker:
+                breaker.before_request()
+            try:
+                response = self._admitted_send(request_class, url, method, body, headers, params, timeout, **kwargs)
+            except (Timeout, ConnectionError, requests.exceptions.HTTPError) as e:
+                failed_response = getattr(e, 'response', None)
+                status_code = failed_response.status_code if failed_response is not None else None
+                if breaker:
+                    # 4xx responses prove the webserver is up, only outages count as failures
+                    if status_code is None or status_code >= 500:
+                        breaker.record_failure()
+                    else:
+                        breaker.record_success()
+                if not self._should_retry(url, method, status_code, attempt):
+                    raise
+                # No point backing off past the caller's deadline
+                if not deadlines.sleep(self.retry_policy.backoff(attempt)):
+                    raise
+                attempt += 1
+                continue
+            except RequestException:
+                # Other upstream failures, e.g. a body cut off mid-stream
+                if breaker:
+                    breaker.record_failure()
+                raise
+            except BaseException:
+                # Admission rejections, deadlines and cancellations are local: the upstream
+                # was not judged, but a half-open probe must be handed back
+                if breaker:
+                    breaker.release_probe()
+                raise
+            if breaker:
+                breaker.record_success()
+            return response
+
+    def _should_retry(self, url: str, method: str, status_code: Optional[int], attempt: int) -> bool:
+        """Decide whether a failed attempt is retried, spending retry budget if it is."""
+        if self.retry_policy is None or attempt >= self.retry_policy.max_attempts:
+            return False
+        if not self.retry_policy.is_retryable(method, status_code):
+            return False
+        host = urlparse(url).netloc
+        if self.retry_budget and not self.retry_budget.try_spend():
+            metrics.inc("mcp_retry_budget_exhausted_total", host=host)
+            return False
+        metrics.inc("mcp_retries_total", host=host, reason=str(status_code or "error"))
+        return True
+
+    def _admitted_send(self, request_class: Optional[str], url: str, *args, **kwargs) -> requests.Response:
+        """Send one attempt while holding an admission slot."""
+        if self.admission is None:
+            return self._send(url, *args, **kwargs)
+        with self.admission.slot(request_class):
+            return self._send(url, *args, **kwargs)
+
+    def _send(
+        self,
+        url: str,
+        method: str,
+        body: Optional[Union[Dict[str, Any], str]],
+        headers: Optional[Dict[str, str]],
+        params: Optional[Dict[str, Any]],
+        timeout: Optional[int],
+        on_chunk: Optional[Callable[[bytes], None]] = None,
+        **kwargs
+    ) -> requests.Response:
+        """Send a single request and translate errors, see make_request()."""
         merged_headers = self._merge_headers(headers)
-        request_timeout = timeout if timeout is not None else self.timeout
+        # The caller's deadline caps the upstream timeout
+        request_timeout = deadlines.bound(timeout if timeout is not None else self.timeout)
+        deadline = deadlines.current_deadline.get()
+        streamed = (deadline is not None or on_chunk is not None) and 'stream' not in kwargs
         
         try:
             # Prepare request kwargs
@@ -98,6 +254,7 @@ class HTTPUtils:
                 'headers': merged_headers,
                 'params': params,
                 'auth': self.auth,
+                'stream': streamed,
                 **kwargs
             }
             
@@ -111,12 +268,26 @@ class HTTPUtils:
                 else:
                     request_kwargs['data'] = body
             
-            # Make the request with a new session
-            response = requests.request(
-                method=method.upper(),
-                url=url,
-                **request_kwargs
-            )
+            # Make the request with the pooled or a new session, within the host's adaptive concurrency limit
+            limiter = self.limiters.for_url(url) if self.limiters else None
+            if limiter:
+                limiter.acquire(timeout=request_timeout)
+            started = time.monotonic()
+            status_code = None
+            try:
+                send = self.session.request if self.session is not None else requests.request
+                response = send(
+                    method=method.upper(),
+                    url=url,
+                    **request_kwargs
+                )
+                status_code = response.status_code
+                if streamed:
+                    # Error bodies are read but not handed to on_chunk
+                    self._read_body(response, deadline, on_chunk if response.ok else None)
+            finally:
+                if limiter:
+                    limiter.release(time.monotonic() - started, status_code)
             
             # Raise exception for bad status codes (4xx, 5xx)
             response.raise_for_status()
@@ -124,7 +295,7 @@ class HTTPUtils:
             return response
             
         except Timeout as e:
-            raise Timeout(f"Request to {url} timed out after {request_timeout}s") from e
+            raise Timeout(f"Request to {url} timed out after {request_timeout:g}s") from e
         except ConnectionError as e:
             raise ConnectionError(f"Failed to connect to {url}") from e
         except requests.exceptions.HTTPError as e:
@@ -141,6 +312,31 @@ class HTTPUtils:
         except RequestException as e:
             raise RequestException(f"Request to {url} failed: {str(e)}") from e
     
+    @staticmethod
+    def _read_body(
+        response: requests.Response,
+        deadline: Optional[deadlines.Deadline],
+        on_chunk: Optional[Callable[[bytes], None]] = None
+    ) -> None:
+        """
+        Read a streamed body chunk by chunk, checking the deadline in between, so a cancelled
+        call drops a large or slow download right away and returns the connection.
+        Each chunk is also passed to on_chunk as soon as it arrives.
+        """
+        chunks = []
+        try:
+            for chunk in response.iter_content(BODY_CHUNK_SIZE):
+                if deadline is not None:
+                    deadline.check()
+                if on_chunk is not None:
+                    on_chunk(chunk)
+                chunks.append(chunk)
+        except BaseException:
+            response.close()
+            raise
+        # Same as requests does when it reads a non-streamed body
+        response._content = b''.join(chunks)
+
     def get_json_response(
         self,
         endpoint: str,
@@ -153,6 +349,9 @@ class HTTPUtils:
     ) -> Any:
         """
         Make an HTTP request and return JSON response body.
+        GET responses are revalidated against the cache: a 304 or an unchanged body
+        returns the cached value without decoding the response again, and a response
+        younger than the cache's fresh_for is returned without a request.
         
         Args:
             endpoint: API endpoint or full URL
@@ -170,21 +369,63 @@ class HTTPUtils:
             json.JSONDecodeError: If response body is not valid JSON
             All exceptions from make_request()
         """
+        cache_key = None
+        request_headers = headers
+        if self.cache is not None and method.upper() == 'GET':
+            cache_key = self.cache.key(self._build_url(endpoint), params, self.cache_partition)
+            fresh, value = self.cache.fresh(cache_key)
+            if fresh:
+                return value
+            request_headers = {**self.cache.validators(cache_key), **(headers or {})}
+
         response = self.make_request(
             endpoint=endpoint,
             method=method,
             body=body,
-            headers=headers,
+            headers=request_headers,
             params=params,
             timeout=timeout,
             **kwargs
         )
-        
+
+        if cache_key is not None:
+            fresh, value = self.cache.revalidate(cache_key, response)
+            if fresh:
+                return value
+            if response.status_code == 304:
+                # The entry was evicted after its validators were sent, so the 304 has no body
+                # to fall back on: fetch the response again, unconditionally
+                response = self.make_request(
+                    endpoint=endpoint,
+                    method=method,
+                    body=body,
+                    headers=headers,
+                    params=params,
+                    timeout=timeout,
+                    **kwargs
+                )
+
+        content = response.content
+        encoding = response.headers.get('Content-Encoding', 'identity')
+        metrics.inc("mcp_upstream_body_bytes_total", len(content), encoding=encoding)
+        if encoding != 'identity' and response.headers.get('Content-Length'):
+            metrics.inc("mcp_upstream_wire_bytes_total", int(response.headers['Content-Length']), encoding=encoding)
         try:
-            return response.json()
+            value = json_codec.loads(content)
         except json.JSONDecodeError as e:
             raise json.JSONDecodeError(
                 f"Failed to parse JSON response from {response.url}: {e.msg}",
                 e.doc,
                 e.pos
             ) from e
+        if cache_key is not None:
+            self.cache.store(cache_key, response, value)
+        return value
+
+    async def aget_json_response(self, endpoint: str, **kwargs) -> Any:
+        """
+        Async variant of get_json_response().
+        The blocking request runs in a worker thread so waiting for an admission slot or for
+        Airflow never blocks the event loop, and several requests can be in flight at once.
+        """
+        return await asyncio.to_thread(self.get_json_response, endpoint, **kwargs)
@@ -0,0 +1,167 @@
+import asyncio
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+from credentials import IdentityClientPool
+from http_utils import HTTPUtils
+from metrics import metrics
+
+
+ALL_INSTANCES = "all"
+DEFAULT_INSTANCE = "default"
+
+
+class InstanceConfig:
+    """
+    Connection settings for one named Airflow deployment.
+
+    Args:
+        name: Name used to select the instance in tools
+        host: Airflow webserver URL, e.g. http://airflow-webserver:8080
+        username: Basic auth username
+        password: Basic auth password
+        ssl_verify: Whether to verify SSL certificates
+        timeout: Default request timeout in seconds
+        max_concurrency: Maximum in-flight requests to this instance
+        pool_size: Size of the instance's HTTP connection pool
+    """
+
+    def __init__(
+        self,
+        name: str,
+        host: str,
+        username: str,
+        password: str,
+        ssl_verify: bool = True,
+        timeout: int = 30,
+        max_concurrency: int = 16,
+        pool_size: int = 16
+    ):
+        self.name = name
+        self.host = host
+        self.username = username
+        self.password = password
+        self.ssl_verify = ssl_verify
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.pool_size = pool_size
+
+    @classmethod
+    def from_dict(cls, name: str, raw: Dict[str, Any]) -> "InstanceConfig":
+        """Build a config from a registry entry. Secrets may be given as *_env variable names."""
+        password = raw.get("password")
+        if password is None and raw.get("password_env"):
+            password = os.getenv(raw["password_env"], "")
+        username = raw.get("username")
+        if username is None and raw.get("username_env"):
+            username = os.getenv(raw["username_env"], "")
+        return cls(
+            name=name,
+            host=raw["host"],
+            username=username or "",
+            password=password or "",
+            ssl_verify=bool(raw.get("ssl_verify", True)),
+            timeout=int(raw.get("timeout", 30)),
+            max_concurrency=int(raw.get("max_concurrency", 16)),
+            pool_size=int(raw.get("pool_size", 16)),
+        )
+
+
+def load_instance_configs(default: InstanceConfig) -> Dict[str, InstanceConfig]:
+    """
+    Read the instance registry from AIRFLOW_INSTANCES (inline JSON) or AIRFLOW_INSTANCES_FILE
+    (path to a JSON file). Both map instance names to settings:
+
+        {"prod-eu": {"host": "https://airflow.eu", "username": "vayu", "password_env": "EU_PASSWORD"}}
+
+    Without a registry the single AIRFLOW_HOST deployment is exposed as the default instance.
+    """
+    raw = os.getenv("AIRFLOW_INSTANCES")
+    path = os.getenv("AIRFLOW_INSTANCES_FILE")
+    if not raw and path:
+        with open(path, "r", encoding="utf-8") as f:
+            raw = f.read()
+    if not raw:
+        return {default.name: default}
+    entries = json.loads(raw)
+    if ALL_INSTANCES in entries:
+        raise ValueError(f"'{ALL_INSTANCES}' is reserved and cannot be used as an instance name")
+    return {name: InstanceConfig.from_dict(name, entry) for name, entry in entries.items()}
+
+
+class InstanceRegistry:
+    """
+    Named Airflow instances, each with its own HTTP client, and concurrent fan-out across them.
+
+    Args:
+        clients: HTTP client per instance name, using the instance's service account
+        default: Instance used when a tool does not select one
+        identities: Per-caller clients when credentials are passed through (optional)
+    """
+
+    def __init__(self, clients: Dict[str, HTTPUtils], default: str, identities: Optional[IdentityClientPool] = None):
+        if default not in clients:
+            raise ValueError(f"Default instance '{default}' is not in the registry {sorted(clients)}")
+        self.clients = clients
+        self.default = default
+        self.identities = identities
+
+    @classmethod
+    def from_configs(
+        cls,
+        configs: Dict[str, InstanceConfig],
+        build_client: Callable[[InstanceConfig], HTTPUtils],
+        default: Optional[str] = None,
+        identities: Optional[IdentityClientPool] = None
+    ) -> "InstanceRegistry":
+        clients = {name: build_client(config) for name, config in configs.items()}
+        return cls(clients, default if default in clients else next(iter(clients)), identities)
+
+    def names(self) -> List[str]:
+        return list(self.clients)
+
+    def get(self, instance: Optional[str] = None) -> HTTPUtils:
+        """Client for the instance, carrying the caller's credentials when they are passed through."""
+        name = instance or self.default
+        if name == ALL_INSTANCES:
+            raise ValueError(f"This tool queries a single instance; choose one of {self.names()}")
+        if name not in self.clients:
+            raise ValueError(f"Unknown Airflow instance '{name}', expected one of {self.names()}")
+        if self.identities is not None:
+            return self.identities.client_for(name, self.clients[name])
+        return self.clients[name]
+
+    async def get_json(self, instance: Optional[str], endpoint: str, **kwargs) -> Any:
+        """GET a JSON response from a single instance."""
+        return await self.get(instance).aget_json_response(endpoint, **kwargs)
+
+    async def collect(self, instance: Optional[str], endpoint: str, items_key: str, **kwargs) -> Dict[str, Any]:
+        """
+        GET a paginated collection from one instance, or from every instance when instance is "all".
+
+        In "all" mode the instances are queried concurrently. Items are concatenated and tagged
+        with an `instance` field, total_entries is summed, and an `instances` map reports each
+        instance's total or error, so one unreachable deployment does not fail the whole query.
+        """
+        if instance != ALL_INSTANCES:
+            return await self.get_json(instance, endpoint, **kwargs)
+
+        names = self.names()
+        results = await asyncio.gather(
+            *[self.get(name).aget_json_response(endpoint, **kwargs) for name in names],
+            return_exceptions=True,
+        )
+        merged: Dict[str, Any] = {items_key: [], "total_entries": 0, "instances": {}}
+        for name, result in zip(names, results):
+            if isinstance(result, BaseException):
+                metrics.inc("mcp_fan_out_errors_total", instance=name)
+                merged["instances"][name] = {"error": str(result)}
+                continue
+            items = result.get(items_key, [])
+            merged[items_key].extend({**item, "instance": name} for item in items)
+            merged["total_entries"] += result.get("total_entries", len(items))
+            merged["instances"][name] = {"total_entries": result.get("total_entries", len(items))}
+        if all("error" in status for status in merged["instances"].values()):
+            raise RuntimeError(f"All Airflow instances failed: {merged['instances']}")
+        return merged
@@ -0,0 +1,38 @@
+import json
+import os
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+# "auto" uses orjson when it is installed, "json" forces the standard library
+JSON_BACKEND = os.getenv("MCP_JSON_BACKEND", "auto").lower()
+USE_ORJSON = orjson is not None and JSON_BACKEND in ("auto", "orjson")
+
+
+def _default(value: Any) -> str:
+    return str(value)
+
+
+if USE_ORJSON:
+    def loads(data: Union[bytes, str]) -> Any:
+        """Decode JSON from bytes or text. Raises json.JSONDecodeError on invalid input."""
+        return orjson.loads(data)
+
+    def dumps(value: Any) -> str:
+        """Encode a value as compact JSON text, falling back to str() for unknown types."""
+        return orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+else:
+    def loads(data: Union[bytes, str]) -> Any:
+        """Decode JSON from bytes or text. Raises json.JSONDecodeError on invalid input."""
+        return json.loads(data)
+
+    def dumps(value: Any) -> str:
+        """Encode a value as compact JSON text, falling back to str() for unknown types."""
+        return json.dumps(value, default=_default, separators=(",", ":"), ensure_ascii=False)
+
+
+BACKEND = "orjson" if USE_ORJSON else "json"
@@ -0,0 +1,79 @@
+import threading
+from typing import Dict, List, Tuple
+
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _render_labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in key) + "}"
+
+
+class Metrics:
+    """
+    A minimal thread-safe metrics registry.
+
+    Counters only go up, gauges hold the last value set and summaries keep a count and sum
+    of observations. Everything can be rendered in the Prometheus text format or as a dict.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._summaries: Dict[str, Dict[LabelKey, List[float]]] = {}
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels: str) -> None:
+        with self._lock:
+            self._gauges.setdefault(name, {})[_label_key(labels)] = value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._summaries.setdefault(name, {})
+            count_sum = series.setdefault(key, [0, 0.0])
+            count_sum[0] += 1
+            count_sum[1] += value
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Return every series as {metric_name: {rendered_labels: value}}."""
+        with self._lock:
+            result: Dict[str, Dict[str, float]] = {}
+            for store in (self._counters, self._gauges):
+                for name, series in store.items():
+                    result[name] = {_render_labels(k): v for k, v in series.items()}
+            for name, series in self._summaries.items():
+                result[f"{name}_count"] = {_render_labels(k): v[0] for k, v in series.items()}
+                result[f"{name}_sum"] = {_render_labels(k): v[1] for k, v in series.items()}
+            return result
+
+    def render_prometheus(self, **const_labels: str) -> str:
+        """Render every series, adding const_labels (e.g. the worker index) to each of them."""
+        extra = _label_key(const_labels)
+        lines: List[str] = []
+        with self._lock:
+            for kind, store in (("counter", self._counters), ("gauge", self._gauges)):
+                for name, series in sorted(store.items()):
+                    lines.append(f"# TYPE {name} {kind}")
+                    lines.extend(f"{name}{_render_labels(k + extra)} {v}" for k, v in series.items())
+            for name, series in sorted(self._summaries.items()):
+                lines.append(f"# TYPE {name} summary")
+                for k, (count, total) in series.items():
+                    lines.append(f"{name}_count{_render_labels(k + extra)} {count}")
+                    lines.append(f"{name}_sum{_render_labels(k + extra)} {total}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
@@ -0,0 +1,193 @@
+import random
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from metrics import metrics
+
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRYABLE_STATUS_CODES = {429, 502, 503, 504}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without contacting the upstream while its circuit breaker is open."""
+
+
+class RetryPolicy:
+    """
+    Which failed requests are retried and how long to wait between attempts.
+
+    Only idempotent methods are retried, and only after connection errors, timeouts or
+    a retryable status code. Delays use exponential backoff with full jitter.
+
+    Args:
+        max_attempts: Total attempts including the first one (1 disables retries)
+        base_delay: Backoff before the first retry in seconds
+        max_delay: Upper bound of any single backoff in seconds
+        retry_on_status: Status codes that are worth retrying
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.2,
+        max_delay: float = 2.0,
+        retry_on_status: Optional[set] = None
+    ):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_on_status = retry_on_status if retry_on_status is not None else RETRYABLE_STATUS_CODES
+
+    def is_retryable(self, method: str, status_code: Optional[int]) -> bool:
+        """A status_code of None means the request failed without a response."""
+        if method.upper() not in IDEMPOTENT_METHODS:
+            return False
+        return status_code is None or status_code in self.retry_on_status
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter delay before retry number `attempt` (1-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+
+class RetryBudget:
+    """
+    Global token bucket that caps retries to a fraction of recent requests.
+
+    Every request deposits `ratio` tokens and every retry spends one, with a small
+    floor of `min_per_second` retries so a quiet server can still retry. When Airflow
+    is down the bucket drains and retries stop instead of multiplying the load.
+
+    Args:
+        ratio: Retries allowed per original request
+        min_per_second: Retries always allowed per second regardless of traffic
+        max_tokens: Maximum tokens the bucket can hold
+    """
+
+    def __init__(self, ratio: float = 0.2, min_per_second: float = 1.0, max_tokens: float = 20.0):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.max_tokens, self._tokens + (now - self._last_refill) * self.min_per_second)
+        self._last_refill = now
+
+    def record_request(self) -> None:
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            metrics.set("mcp_retry_budget_tokens", round(self._tokens, 2))
+            return True
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker.
+
+    After failure_threshold consecutive failures the circuit opens and requests fail
+    fast with CircuitOpenError. After reset_timeout one probe request is let through
+    (half-open): success closes the circuit, failure opens it again. A probe that never
+    reached Airflow (rejected locally or cancelled) is released without a verdict, so the
+    next request probes instead.
+
+    Args:
+        host: Upstream host the breaker guards, used as the metric label
+        failure_threshold: Consecutive failures that open the circuit
+        reset_timeout: Seconds the circuit stays open before a probe is allowed
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, host: str, failure_threshold: int = 5, reset_timeout: float = 15.0):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        self._report()
+
+    def before_request(self) -> None:
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._set_state(self.HALF_OPEN)
+            if self.state == self.OPEN or (self.state == self.HALF_OPEN and self._probe_in_flight):
+                metrics.inc("mcp_circuit_rejected_total", host=self.host)
+                retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+                raise CircuitOpenError(
+                    f"Airflow at {self.host} is unavailable (circuit open after "
+                    f"{self._failures} consecutive failures). Retry in {retry_in:.0f}s."
+                )
+            if self.state == self.HALF_OPEN:
+                self._probe_in_flight = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._probe_in_flight = False
+            if self.state != self.CLOSED:
+                self._set_state(self.CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                if self.state != self.OPEN:
+                    self._set_state(self.OPEN)
+
+    def release_probe(self) -> None:
+        """End a request that says nothing about the upstream, letting another one probe."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def _set_state(self, state: str) -> None:
+        self.state = state
+        metrics.inc("mcp_circuit_transitions_total", host=self.host, state=state)
+        self._report()
+
+    def _report(self) -> None:
+        metrics.set("mcp_circuit_state", self.STATE_VALUES[self.state], host=self.host)
+
+
+class CircuitBreakerRegistry:
+    """
+    One CircuitBreaker per upstream host, created on first use with shared settings.
+
+    Args:
+        **breaker_kwargs: Arguments passed to every CircuitBreaker
+    """
+
+    def __init__(self, **breaker_kwargs):
+        self.breaker_kwargs = breaker_kwargs
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def for_url(self, url: str) -> CircuitBreaker:
+        host = urlparse(url).netloc or url
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = CircuitBreaker(host, **self.breaker_kwargs)
+                self._breakers[host] = breaker
+            return breaker
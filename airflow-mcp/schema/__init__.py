@@ -2,17 +2,6 @@ import json
 import os
 from typing import Any, Dict, Set
 
-from http_utils import HTTPUtils
-from urllib.parse import urljoin
-import os
-from typing import Dict, Any
-
-AIRFLOW_BASE_URL = urljoin(os.getenv("AIRFLOW_HOST", "http://localhost:8080"), "/api/v1")
-SSL_VERIFY = os.getenv("SSL_VERIFY", "True").lower() == "true"
-AIRFLOW_USERNAME = os.getenv("AIRFLOW_USERNAME", "airflow")
-AIRFLOW_PASSWORD = os.getenv("AIRFLOW_PASSWORD", "airflow") 
-http_utils = HTTPUtils(base_url=AIRFLOW_BASE_URL, verify_ssl=SSL_VERIFY, auth=(AIRFLOW_USERNAME, AIRFLOW_PASSWORD))
-
 
 def _load_json(path: str) -> Dict[str, Any]:
     with open(path, "r", encoding="utf-8") as f:
@@ -1,6 +1,15 @@
 import os
+
+# Rendering a rich traceback for a failed tool call blocks the event loop for most of a second,
+# which serializes concurrent calls whenever some of them fail
+os.environ.setdefault("FASTMCP_ENABLE_RICH_TRACEBACKS", "false")
+
 from fastmcp import FastMCP
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
 
+import json_codec
+from metrics import metrics
 from tools.registry import register_all
 
 
@@ -8,15 +17,30 @@ transport = os.getenv("MCP_TRANSPORT", "sse")
 mcp_host = os.getenv("MCP_HOST", "0.0.0.0")
 mcp_port = int(os.getenv("MCP_PORT", "3000"))
 log_level = os.getenv("LOG_LEVEL", "info").lower()
+workers = int(os.getenv("MCP_WORKERS", "1"))
+worker_index = os.getenv("MCP_WORKER_INDEX")
 
-mcp = FastMCP("airflow-mcp-server 🚁")
+mcp = FastMCP("airflow-mcp-server 🚁", tool_serializer=json_codec.dumps)
 
 register_all(mcp)
 
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    """Expose server metrics in the Prometheus text format."""
+    labels = {"worker": worker_index} if worker_index is not None else {}
+    return PlainTextResponse(metrics.render_prometheus(**labels))
+
+
 if __name__ == "__main__":
-    mcp.run(
-        transport=transport,
-        host=mcp_host,
-        port=mcp_port,
-        log_level=log_level
-    )
+    if workers > 1:
+        from workers import run_workers
+
+        run_workers(transport, mcp_host, mcp_port, log_level, workers)
+    else:
+        mcp.run(
+            transport=transport,
+            host=mcp_host,
+            port=mcp_port,
+            log_level=log_level
+        )
@@ -0,0 +1,153 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+from urllib.parse import urlparse
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - redis is optional
+    redis = None
+
+from metrics import metrics
+
+
+# Cached Airflow responses may hold sensitive data, so the default lives in a directory only
+# the server's user can read, not in the world-writable temp directory
+DEFAULT_SQLITE_DIR = os.path.join(
+    os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "airflow-mcp"
+)
+DEFAULT_SQLITE_PATH = os.path.join(DEFAULT_SQLITE_DIR, "cache.db")
+
+
+def _private_directory(path: str) -> None:
+    """Create the directory with 0700 permissions, or restrict an existing one to them."""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    os.chmod(path, 0o700)
+
+
+class SqliteStore:
+    """
+    Key-value store in a local SQLite file, shared by the worker processes of one host.
+
+    Values are bytes grouped by namespace. The database runs in WAL mode so readers never
+    wait for writers, and each thread has its own connection. Expired rows and rows beyond
+    max_entries per namespace (oldest first) are removed every few hundred writes.
+
+    Args:
+        path: Database file, created when missing. The default one's directory is made private
+              to the server's user (0700)
+        max_entries: Rows kept per namespace
+    """
+
+    PRUNE_EVERY = 200
+
+    def __init__(self, path: str = DEFAULT_SQLITE_PATH, max_entries: int = 10000):
+        self.path = path
+        if os.path.dirname(os.path.abspath(path)) == DEFAULT_SQLITE_DIR:
+            _private_directory(DEFAULT_SQLITE_DIR)
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        self._lock = threading.Lock()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS kv ("
+                " namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL,"
+                " expires_at REAL, updated_at REAL NOT NULL, PRIMARY KEY (namespace, key))"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        row = self._connection().execute(
+            "SELECT value, expires_at FROM kv WHERE namespace = ? AND key = ?", (namespace, key)
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] < time.time()):
+            metrics.inc("mcp_shared_cache_requests_total", backend="sqlite", namespace=namespace, result="miss")
+            return None
+        metrics.inc("mcp_shared_cache_requests_total", backend="sqlite", namespace=namespace, result="hit")
+        return row[0]
+
+    def set(self, namespace: str, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        now = time.time()
+        self._connection().execute(
+            "INSERT OR REPLACE INTO kv (namespace, key, value, expires_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (namespace, key, value, now + ttl if ttl else None, now),
+        )
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % self.PRUNE_EVERY == 0
+        if prune:
+            self._prune(namespace, now)
+
+    def delete(self, namespace: str, key: str) -> None:
+        self._connection().execute("DELETE FROM kv WHERE namespace = ? AND key = ?", (namespace, key))
+
+    def _prune(self, namespace: str, now: float) -> None:
+        conn = self._connection()
+        conn.execute("DELETE FROM kv WHERE expires_at IS NOT NULL AND expires_at < ?", (now,))
+        conn.execute(
+            "DELETE FROM kv WHERE namespace = ? AND key NOT IN ("
+            " SELECT key FROM kv WHERE namespace = ? ORDER BY updated_at DESC LIMIT ?)",
+            (namespace, namespace, self.max_entries),
+        )
+
+
+class RedisStore:
+    """
+    Key-value store in Redis, shared by workers on any number of hosts.
+
+    Keys are prefixed with the namespace. Entries without a ttl expire after default_ttl,
+    so Redis memory stays bounded without a separate eviction policy.
+
+    Args:
+        url: Redis URL, e.g. redis://redis:6379/1
+        default_ttl: Seconds an entry without its own ttl is kept
+        prefix: Prefix of every key
+    """
+
+    def __init__(self, url: str, default_ttl: float = 86400, prefix: str = "airflow-mcp"):
+        if redis is None:
+            raise RuntimeError("MCP_SHARED_CACHE_URL points to Redis but the redis package is not installed")
+        self.client = redis.Redis.from_url(url)
+        self.default_ttl = default_ttl
+        self.prefix = prefix
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        value = self.client.get(f"{self.prefix}:{namespace}:{key}")
+        metrics.inc(
+            "mcp_shared_cache_requests_total", backend="redis", namespace=namespace,
+            result="miss" if value is None else "hit",
+        )
+        return value
+
+    def set(self, namespace: str, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        self.client.set(f"{self.prefix}:{namespace}:{key}", value, px=int((ttl or self.default_ttl) * 1000))
+
+    def delete(self, namespace: str, key: str) -> None:
+        self.client.delete(f"{self.prefix}:{namespace}:{key}")
+
+
+def build_shared_store(url: Optional[str]):
+    """
+    Shared store for MCP_SHARED_CACHE_URL: sqlite:///<path> or redis://... . Returns None when
+    unset, in which case every process keeps its caches to itself.
+    """
+    if not url:
+        return None
+    scheme = urlparse(url).scheme
+    if scheme == "sqlite":
+        # sqlite:///relative.db and sqlite:////absolute.db, as in SQLAlchemy URLs
+        return SqliteStore(url[len("sqlite:///"):] or DEFAULT_SQLITE_PATH)
+    if scheme in ("redis", "rediss", "unix"):
+        return RedisStore(url)
+    raise ValueError(f"Unsupported MCP_SHARED_CACHE_URL scheme '{scheme}', expected sqlite or redis")
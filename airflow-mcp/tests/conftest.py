@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The server runs from its own directory and imports its modules top-level
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
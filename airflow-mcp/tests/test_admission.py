@@ -0,0 +1,73 @@
+import threading
+import time
+
+import pytest
+
+from admission import BACKGROUND, INTERACTIVE, AdmissionController, AdmissionRejected, ClassLimits, request_class
+
+
+def controller(
+    max_concurrency: int = 1,
+    background_concurrency: int = 1,
+    max_queue: int = 8,
+    queue_timeout: float = 5.0
+) -> AdmissionController:
+    return AdmissionController(max_concurrency, {
+        INTERACTIVE: ClassLimits(priority=0, max_concurrency=max_concurrency, max_queue=max_queue, queue_timeout=queue_timeout),
+        BACKGROUND: ClassLimits(priority=1, max_concurrency=background_concurrency, max_queue=max_queue, queue_timeout=queue_timeout),
+    })
+
+
+def wait_until(condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached in time"
+        time.sleep(0.005)
+
+
+def test_interactive_requests_overtake_waiting_background_ones() -> None:
+    admission = controller()
+    admission.acquire(INTERACTIVE)
+    admitted = []
+
+    def request(name: str) -> None:
+        with admission.slot(name):
+            admitted.append(name)
+
+    # The background request queues first
+    background = threading.Thread(target=request, args=(BACKGROUND,))
+    background.start()
+    wait_until(lambda: admission._waiting_by_class[BACKGROUND] == 1)
+    interactive = threading.Thread(target=request, args=(INTERACTIVE,))
+    interactive.start()
+    wait_until(lambda: admission._waiting_by_class[INTERACTIVE] == 1)
+
+    admission.release(INTERACTIVE)
+    background.join(5)
+    interactive.join(5)
+    assert admitted == [INTERACTIVE, BACKGROUND]
+    assert admission._in_flight == 0
+
+
+def test_class_limit_leaves_room_for_interactive_requests() -> None:
+    admission = controller(max_concurrency=4, background_concurrency=1, queue_timeout=0.05)
+    with request_class(BACKGROUND):
+        assert admission.acquire() == BACKGROUND
+    assert admission.acquire() == INTERACTIVE
+    with pytest.raises(AdmissionRejected, match="without getting a slot"):
+        admission.acquire(BACKGROUND)
+    assert admission._waiting_by_class[BACKGROUND] == 0
+
+
+def test_full_queue_is_rejected_at_once() -> None:
+    admission = controller(max_queue=0, queue_timeout=60)
+    admission.acquire(INTERACTIVE)
+    started = time.monotonic()
+    with pytest.raises(AdmissionRejected, match="already waiting"):
+        admission.acquire(INTERACTIVE)
+    assert time.monotonic() - started < 1
+
+
+def test_unknown_class_is_refused() -> None:
+    with pytest.raises(ValueError):
+        controller().acquire("batch")
@@ -0,0 +1,16 @@
+import clients
+
+
+def test_limits_are_shared_out_between_workers(monkeypatch):
+    monkeypatch.setattr(clients, "WORKER_COUNT", 4)
+    admission = clients.build_admission("airflow", 16)
+    assert admission.max_concurrency == 4
+    assert clients.per_worker(32) == 8
+    # A limit smaller than the worker count still lets each worker send one request
+    assert clients.per_worker(2) == 1
+    assert clients.per_worker(0, minimum=0) == 0
+
+
+def test_single_process_keeps_the_configured_limits(monkeypatch):
+    monkeypatch.setattr(clients, "WORKER_COUNT", 1)
+    assert clients.build_admission("airflow", 16).max_concurrency == 16
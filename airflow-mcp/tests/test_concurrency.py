@@ -0,0 +1,55 @@
+import pytest
+
+from admission import AdmissionRejected
+from concurrency import AdaptiveLimiter, AdaptiveLimiterRegistry
+
+
+def complete(limiter: AdaptiveLimiter, latency: float = 0.01, status_code: int = 200) -> None:
+    limiter.acquire(timeout=1)
+    limiter.release(latency, status_code)
+
+
+def test_fast_responses_grow_the_limit_by_about_one_per_round_trip() -> None:
+    limiter = AdaptiveLimiter("airflow", initial_limit=4, max_limit=6, latency_target=1.0)
+    for _ in range(4):
+        complete(limiter)
+    assert 4.9 < limiter.limit < 5
+    for _ in range(50):
+        complete(limiter)
+    assert limiter.limit == 6
+
+
+@pytest.mark.parametrize("latency, status_code", [(0.01, 503), (0.01, 429), (0.01, None), (5.0, 200)])
+def test_congestion_shrinks_the_limit(latency, status_code) -> None:
+    limiter = AdaptiveLimiter("airflow", initial_limit=10, latency_target=1.0, backoff_ratio=0.5)
+    complete(limiter, latency, status_code)
+    assert limiter.limit == 5
+
+
+def test_one_decrease_per_cooldown_and_never_below_the_minimum() -> None:
+    limiter = AdaptiveLimiter("airflow", initial_limit=10, min_limit=2, backoff_ratio=0.5, cooldown=60)
+    complete(limiter, status_code=503)
+    complete(limiter, status_code=503)
+    assert limiter.limit == 5
+    limiter.cooldown = 0
+    for _ in range(5):
+        complete(limiter, status_code=503)
+    assert limiter.limit == 2
+
+
+def test_requests_over_the_limit_wait_then_are_rejected() -> None:
+    limiter = AdaptiveLimiter("airflow", initial_limit=1)
+    limiter.acquire()
+    with pytest.raises(AdmissionRejected, match="adaptive concurrency limit"):
+        limiter.acquire(timeout=0.05)
+    limiter.release(0.01, 200)
+    limiter.acquire(timeout=0.05)
+    assert limiter.in_flight == 1
+
+
+def test_registry_keeps_one_limiter_per_host() -> None:
+    registry = AdaptiveLimiterRegistry(initial_limit=3)
+    first = registry.for_url("http://airflow:8080/api/v1/dags")
+    assert registry.for_url("http://airflow:8080/api/v1/pools") is first
+    assert registry.for_url("http://other:8080/api/v1/dags") is not first
+    assert first.limit == 3
@@ -0,0 +1,99 @@
+import pytest
+import requests
+
+import credentials
+from credentials import (
+    PASSTHROUGH_OPTIONAL,
+    PASSTHROUGH_REQUIRED,
+    SERVICE_IDENTITY,
+    IdentityClientPool,
+    MissingCredentials,
+    identity_of,
+)
+from http_cache import RevalidationCache
+from http_utils import HTTPUtils
+
+ALICE = "Basic YWxpY2U6c2VjcmV0"
+BOB = "Basic Ym9iOnNlY3JldA=="
+
+
+@pytest.fixture
+def airflow(monkeypatch):
+    """Airflow answers each caller with the DAGs it may see and records the requests it got."""
+    sent = []
+
+    def send(self, url, method, body, headers, params, timeout, **kwargs):
+        merged = self._merge_headers(headers)
+        caller = merged.get("Authorization", "service")
+        sent.append({"caller": caller, "If-None-Match": merged.get("If-None-Match")})
+        response = requests.Response()
+        response.status_code = 200
+        response._content = f'{{"dags": [{{"dag_id": "{caller[-8:]}"}}]}}'.encode("utf-8")
+        response.headers["ETag"] = f'"{caller[-8:]}"'
+        response.url = url
+        return response
+
+    monkeypatch.setattr(HTTPUtils, "_send", send)
+    return sent
+
+
+@pytest.fixture
+def caller(monkeypatch):
+    current = {"credential": None}
+    monkeypatch.setattr(credentials, "request_credential", lambda header=None: current["credential"])
+    return current
+
+
+def service_client() -> HTTPUtils:
+    return HTTPUtils(base_url="http://airflow:8080/api/v1", auth=("vayu", "pw"), cache=RevalidationCache(fresh_for=60))
+
+
+def test_cached_responses_never_cross_identities(airflow, caller) -> None:
+    pool = IdentityClientPool(mode=PASSTHROUGH_OPTIONAL)
+    service = service_client()
+    service_dags = service.get_json_response("dags")
+
+    caller["credential"] = ALICE
+    alice = pool.client_for("default", service)
+    alice_dags = alice.get_json_response("dags")
+    assert alice_dags != service_dags
+    # Alice's request was not conditional on the service account's cached entry
+    assert airflow[-1] == {"caller": ALICE, "If-None-Match": None}
+
+    caller["credential"] = BOB
+    pool.client_for("default", service).get_json_response("dags")
+    assert airflow[-1] == {"caller": BOB, "If-None-Match": None}
+
+    # Alice's own entry is served to her again without a request
+    caller["credential"] = ALICE
+    assert pool.client_for("default", service) is alice
+    assert alice.get_json_response("dags") == alice_dags
+    assert len(airflow) == 3
+
+
+def test_clients_are_kept_per_instance_and_identity(caller) -> None:
+    pool = IdentityClientPool(mode=PASSTHROUGH_OPTIONAL, max_clients=2)
+    service = service_client()
+    caller["credential"] = ALICE
+    alice = pool.client_for("default", service)
+    assert alice is not service and alice.cache is service.cache
+    assert alice.cache_partition == identity_of(ALICE) != SERVICE_IDENTITY
+    assert pool.client_for("other", service) is not alice
+    # Least recently used clients are evicted
+    caller["credential"] = BOB
+    pool.client_for("default", service)
+    caller["credential"] = ALICE
+    assert pool.client_for("default", service) is not alice
+
+
+def test_missing_credentials(caller) -> None:
+    service = service_client()
+    assert IdentityClientPool(mode=PASSTHROUGH_OPTIONAL).client_for("default", service) is service
+    with pytest.raises(MissingCredentials):
+        IdentityClientPool(mode=PASSTHROUGH_REQUIRED).client_for("default", service)
+
+
+def test_identity_does_not_reveal_the_credential() -> None:
+    assert identity_of(None) == SERVICE_IDENTITY
+    assert identity_of(ALICE) != identity_of(BOB)
+    assert "YWxpY2U" not in identity_of(ALICE)
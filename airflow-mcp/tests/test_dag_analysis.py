@@ -0,0 +1,138 @@
+from pathlib import Path
+
+import pytest
+
+from tools.dag_analysis import MAX_LOOP_ITERATIONS, MAX_SEQUENCE_LENGTH, analyze_dag_source
+
+DAGS = Path(__file__).resolve().parents[2] / "airflow_home" / "dags"
+
+
+def analyze(source: str, **kwargs) -> dict:
+    return analyze_dag_source(source, **kwargs)
+
+
+def only_dag(result: dict) -> dict:
+    assert len(result["dags"]) == 1
+    return result["dags"][0]
+
+
+def edges(dag: dict) -> set:
+    return {(edge["upstream"], edge["downstream"]) for edge in dag["dependencies"]}
+
+
+def test_sample_dag() -> None:
+    result = analyze((DAGS / "sample_dag.py").read_text())
+    dag = only_dag(result)
+    assert dag["dag_id"] == "sample_dag"
+    assert [(task["task_id"], task["operator"]) for task in dag["tasks"]] == [
+        ("start_task", "EmptyOperator"),
+        ("bash_task", "BashOperator"),
+        ("python_task", "PythonOperator"),
+    ]
+    assert edges(dag) == {("start_task", "bash_task"), ("bash_task", "python_task")}
+    assert dag["roots"] == ["start_task"]
+    assert dag["leaves"] == ["python_task"]
+    assert result["warnings"] == []
+
+
+def test_error_sample_dag() -> None:
+    result = analyze((DAGS / "error_sample_dag.py").read_text())
+    dag = only_dag(result)
+    assert dag["dag_id"] == "error_check_dag"
+    assert dag["schedule"] == "0 0 * * *"
+    task_ids = [task["task_id"] for task in dag["tasks"]]
+    assert {"runme_0", "runme_1", "runme_2", "run_after_loop", "run_this_last"} <= set(task_ids)
+    assert {(f"runme_{i}", "run_after_loop") for i in range(3)} <= edges(dag)
+    assert ("run_after_loop", "run_this_last") in edges(dag)
+    assert dag["leaves"] == ["run_this_last"]
+
+
+def test_syntax_error() -> None:
+    result = analyze("with DAG('broken' as dag:\n    pass\n")
+    assert result["dags"] == []
+    assert result["syntax_error"]["line"] == 1
+
+
+LOOP_DAG = """
+from airflow import DAG
+from airflow.operators.bash import BashOperator
+
+with DAG("loops") as dag:
+    done = BashOperator(task_id="done", bash_command="true")
+    for table in ["orders", "customers"]:
+        for i in range(2):
+            BashOperator(task_id=f"load_{table}_{i}", bash_command="true") >> done
+"""
+
+
+def test_loops_are_unrolled() -> None:
+    dag = only_dag(analyze(LOOP_DAG))
+    loads = {f"load_{table}_{i}" for table in ("orders", "customers") for i in range(2)}
+    assert {task["task_id"] for task in dag["tasks"]} == loads | {"done"}
+    assert edges(dag) == {(task_id, "done") for task_id in loads}
+
+
+def test_loop_over_runtime_value_keeps_placeholder() -> None:
+    source = LOOP_DAG.replace('["orders", "customers"]', "get_tables()")
+    dag = only_dag(analyze(source))
+    templated = [task for task in dag["tasks"] if task.get("templated")]
+    assert {task["task_id"] for task in templated} == {"load_{table}_0", "load_{table}_1"}
+
+
+def test_loop_unrolling_is_capped() -> None:
+    source = f"""
+from airflow import DAG
+from airflow.operators.empty import EmptyOperator
+
+with DAG("many") as dag:
+    for i in {list(range(MAX_LOOP_ITERATIONS + 1))}:
+        EmptyOperator(task_id=f"task_{{i}}")
+"""
+    result = analyze(source)
+    assert [task["task_id"] for task in only_dag(result)["tasks"]] == ["task_{i}"]
+    assert any("not unrolled" in warning for warning in result["warnings"])
+
+
+@pytest.mark.parametrize("expression", [
+    '"ab" * 200000000',
+    '200000000 * ["ab"]',
+    '"x" * 60000 + "y" * 60000',
+    '(1,) * 100001',
+    '"%0999999999d" % 1',
+    '"{:>999999999}".format(1)',
+    'f"{1:>999999999}"',
+])
+def test_values_past_the_size_cap_are_unknown(expression: str) -> None:
+    source = f"""
+from airflow import DAG
+from airflow.operators.bash import BashOperator
+
+x = {expression}
+y = x * 5
+
+with DAG("big") as dag:
+    BashOperator(task_id="run", bash_command=x)
+"""
+    result = analyze(source, include_task_arguments=True)
+    command = only_dag(result)["tasks"][0]["arguments"]["bash_command"]
+    assert len(command) <= MAX_SEQUENCE_LENGTH
+
+
+def test_repeated_squaring_is_capped() -> None:
+    source = """
+x = 3
+for _ in range(100):
+    x = x * x
+"""
+    assert analyze(source)["dags"] == []
+
+
+def test_values_under_the_size_cap_are_computed() -> None:
+    source = """
+from airflow import DAG
+from airflow.operators.bash import BashOperator
+
+with DAG("small") as dag:
+    BashOperator(task_id="run_" + "ab" * 3, bash_command="true")
+"""
+    assert only_dag(analyze(source))["tasks"][0]["task_id"] == "run_ababab"
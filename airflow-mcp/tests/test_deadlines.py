@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import deadlines
+from admission import INTERACTIVE, AdmissionController, ClassLimits
+from deadlines import Deadline, DeadlineExceeded, RequestCancelled, deadline_scope
+from tools.deadline import with_deadline
+
+
+def saturated_admission() -> AdmissionController:
+    """Admission controller whose only slot is taken, so the next request waits for a minute."""
+    admission = AdmissionController(1, {
+        INTERACTIVE: ClassLimits(priority=0, max_concurrency=1, max_queue=8, queue_timeout=60),
+    })
+    admission.acquire(INTERACTIVE)
+    return admission
+
+
+def test_deadline_bounds_timeouts_and_stops_once_cancelled() -> None:
+    deadline = Deadline(10)
+    assert deadline.bound(30) <= 10
+    assert deadline.bound(1) == 1
+    deadline.cancel()
+    with pytest.raises(RequestCancelled):
+        deadline.check()
+    # Backing off past the deadline is pointless
+    assert Deadline(0.05).sleep(1) is False
+    with pytest.raises(DeadlineExceeded):
+        Deadline(0).check()
+
+
+def test_no_deadline_outside_a_tool_call() -> None:
+    assert deadlines.bound(30) == 30
+    deadlines.check()
+    with deadline_scope(5):
+        assert deadlines.bound(30) <= 5
+    assert deadlines.current_deadline.get() is None
+
+
+def test_timed_out_call_stops_its_queued_request() -> None:
+    admission = saturated_admission()
+    stopped = []
+
+    async def tool():
+        try:
+            await asyncio.to_thread(admission.acquire)
+        except BaseException as e:
+            stopped.append(e)
+            raise
+
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded, match="did not finish within"):
+        asyncio.run(with_deadline(tool, "slow_tool", default_timeout=0.1)())
+    # The worker thread gave up its queue wait instead of waiting for the queue timeout
+    assert time.monotonic() - started < 5
+    assert len(stopped) == 1 and isinstance(stopped[0], (DeadlineExceeded, RequestCancelled))
+    assert admission._waiting_by_class[INTERACTIVE] == 0
+
+
+def test_client_cancellation_reaches_the_worker_thread() -> None:
+    admission = saturated_admission()
+    waiting, stopped = threading.Event(), threading.Event()
+
+    def request():
+        waiting.set()
+        try:
+            admission.acquire()
+        except RequestCancelled:
+            stopped.set()
+
+    async def tool():
+        await asyncio.to_thread(request)
+
+    async def cancel_while_waiting():
+        call = asyncio.create_task(with_deadline(tool, "slow_tool", default_timeout=60)())
+        await asyncio.to_thread(waiting.wait, 5)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+
+    asyncio.run(cancel_while_waiting())
+    assert stopped.wait(5)
+    assert admission._waiting_by_class[INTERACTIVE] == 0
@@ -0,0 +1,81 @@
+import asyncio
+from collections import Counter
+
+from tools import dependency_index
+from tools.dependency_index import DependencyIndex
+from tools.progress import ProgressStream
+
+UPSTREAM = '''
+from airflow import DAG
+from airflow.operators.trigger_dagrun import TriggerDagRunOperator
+
+with DAG("upstream") as dag:
+    TriggerDagRunOperator(task_id="trigger", trigger_dag_id="downstream")
+'''
+DOWNSTREAM = '''
+from airflow import DAG
+from airflow.operators.empty import EmptyOperator
+
+with DAG("downstream") as dag:
+    EmptyOperator(task_id="noop")
+'''
+
+
+class FakeAirflow:
+    def __init__(self):
+        self.sources = {"up": UPSTREAM, "down": DOWNSTREAM}
+        self.parsed = {"up": "2024-01-05T00:00:00+00:00", "down": "2024-01-05T00:00:00+00:00"}
+        self.fetched = Counter()
+
+    async def aget_json_response(self, endpoint, params=None):
+        if endpoint == "dags":
+            dags = [
+                {"dag_id": "upstream", "file_token": "up", "last_parsed_time": self.parsed["up"]},
+                {"dag_id": "downstream", "file_token": "down", "last_parsed_time": self.parsed["down"]},
+            ]
+            return {"dags": dags[params["offset"]:], "total_entries": len(dags)}
+        token = endpoint.rsplit("/", 1)[-1]
+        self.fetched[token] += 1
+        return {"content": self.sources[token]}
+
+
+def refresh(index: DependencyIndex, airflow: FakeAirflow) -> None:
+    asyncio.run(index.refresh(airflow, ProgressStream("test_tool"), force=True))
+
+
+def test_refresh_reuses_files_airflow_only_reparsed(monkeypatch):
+    analyzed = []
+    analyze = dependency_index.analysis_cache.analyze
+
+    async def counting_analyze(source):
+        analyzed.append(source)
+        return await analyze(source)
+
+    monkeypatch.setattr(dependency_index.analysis_cache, "analyze", counting_analyze)
+    airflow, index = FakeAirflow(), DependencyIndex()
+    refresh(index, airflow)
+    assert [edge["downstream"] for edge in index.downstream["upstream"]] == ["downstream"]
+    assert len(analyzed) == 2
+
+    # Airflow re-parsed the upstream file without any edit, the downstream file was not re-parsed
+    airflow.parsed["up"] = "2024-01-05T00:00:30+00:00"
+    refresh(index, airflow)
+    assert airflow.fetched == Counter({"up": 2, "down": 1})
+    assert len(analyzed) == 2
+    assert index.last_refresh == {"fetched_files": 1, "analyzed_files": 0, "reused_files": 2}
+    assert [edge["downstream"] for edge in index.downstream["upstream"]] == ["downstream"]
+
+    # Not re-parsed since, nothing is fetched again
+    refresh(index, airflow)
+    assert airflow.fetched == Counter({"up": 2, "down": 1})
+
+
+def test_refresh_analyzes_edited_files():
+    airflow, index = FakeAirflow(), DependencyIndex()
+    refresh(index, airflow)
+    airflow.sources["up"] = UPSTREAM.replace('trigger_dag_id="downstream"', 'trigger_dag_id="elsewhere"')
+    airflow.parsed["up"] = "2024-01-05T00:00:30+00:00"
+    refresh(index, airflow)
+    assert index.last_refresh["analyzed_files"] == 1
+    assert "upstream" not in index.downstream
+    assert index.unresolved["upstream"][0]["target"] == "elsewhere"
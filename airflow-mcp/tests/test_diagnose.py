@@ -0,0 +1,43 @@
+import asyncio
+
+from instances import InstanceRegistry
+from tools import diagnose
+
+DAG_ID, RUN_ID = "etl", "manual__1"
+RUN = f"dags/{DAG_ID}/dagRuns/{RUN_ID}"
+TASK_INSTANCES = (
+    [{"task_id": f"ok_{i}", "state": "success", "map_index": -1} for i in range(150)]
+    + [{"task_id": "load", "state": "failed", "map_index": index, "try_number": 1} for index in (0, 1)]
+    + [{"task_id": "report", "state": "upstream_failed", "map_index": index} for index in (0, 1)]
+)
+
+
+class FakeAirflow:
+    def __init__(self):
+        self.requests = []
+
+    async def aget_json_response(self, endpoint, params=None):
+        self.requests.append((endpoint, params))
+        if endpoint == f"dags/{DAG_ID}":
+            return {"dag_id": DAG_ID}
+        if endpoint == RUN:
+            return {"dag_run_id": RUN_ID, "state": "failed"}
+        if endpoint == f"{RUN}/taskInstances":
+            offset, limit = params["offset"], params["limit"]
+            return {"task_instances": TASK_INSTANCES[offset:offset + limit], "total_entries": len(TASK_INSTANCES)}
+        if endpoint.endswith("/tries"):
+            return {"task_instance_tries": []}
+        return {"content": f"ERROR map_index={params.get('map_index')}"}
+
+
+def test_failed_mapped_tasks_beyond_the_first_page(monkeypatch) -> None:
+    airflow = FakeAirflow()
+    monkeypatch.setattr(diagnose, "airflow_instances", InstanceRegistry({"default": airflow}, default="default"))
+    result = asyncio.run(diagnose.diagnose_failed_run_tool(DAG_ID, RUN_ID))
+
+    assert [(t["task_id"], t["map_index"]) for t in result["failed_tasks"]] == [("load", 0), ("load", 1)]
+    assert [t["error_windows"][0]["text"] for t in result["failed_tasks"]] == [
+        "ERROR map_index=0", "ERROR map_index=1"
+    ]
+    assert f"{RUN}/taskInstances/load/1/tries" in [endpoint for endpoint, _ in airflow.requests]
+    assert result["upstream_failed_task_ids"] == ["report"]
@@ -0,0 +1,35 @@
+import requests
+
+from http_cache import RevalidationCache
+from http_utils import HTTPUtils
+
+
+def response(status: int, body: bytes = b"", etag: str = None) -> requests.Response:
+    result = requests.Response()
+    result.status_code = status
+    result._content = body
+    if etag:
+        result.headers["ETag"] = etag
+    return result
+
+
+class EvictingClient(HTTPUtils):
+    """Answers with an ETag, then a 304 for a conditional request whose entry was evicted meanwhile."""
+
+    def __init__(self, cache: RevalidationCache):
+        super().__init__(base_url="http://airflow/api/v1", cache=cache)
+        self.requests = []
+
+    def make_request(self, endpoint, method="GET", body=None, headers=None, params=None, timeout=None, **kwargs):
+        self.requests.append(dict(headers or {}))
+        if headers and "If-None-Match" in headers:
+            self.cache._entries.clear()
+            return response(304)
+        return response(200, b'{"dags": []}', etag='"v1"')
+
+
+def test_not_modified_after_eviction_is_fetched_again() -> None:
+    client = EvictingClient(RevalidationCache())
+    assert client.get_json_response("dags") == {"dags": []}
+    assert client.get_json_response("dags") == {"dags": []}
+    assert [headers.get("If-None-Match") for headers in client.requests] == [None, '"v1"', None]
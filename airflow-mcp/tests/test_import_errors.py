@@ -0,0 +1,63 @@
+import asyncio
+
+from shared_cache import SqliteStore
+from tools.import_errors import ImportErrorScan
+from tools.progress import ProgressStream
+
+TRACE = "Traceback (most recent call last):\nModuleNotFoundError: No module named 'pandas'"
+
+
+class FakeClient:
+    def __init__(self):
+        self.errors = {}
+
+    def set(self, filename: str, timestamp: str, trace: str = TRACE) -> None:
+        self.errors[filename] = {"filename": filename, "timestamp": timestamp, "stack_trace": trace}
+
+    async def aget_json_response(self, endpoint, params=None):
+        errors = list(self.errors.values())
+        return {"import_errors": errors, "total_entries": len(errors)}
+
+
+def scan(scanner: ImportErrorScan, client: FakeClient) -> dict:
+    asyncio.run(scanner.refresh(client, ProgressStream("scan_import_errors"), force=True))
+    return {error["filename"]: error["first_seen"] for error in scanner.errors}
+
+
+def test_first_seen_survives_restarts_and_other_workers(tmp_path) -> None:
+    store = SqliteStore(str(tmp_path / "cache.db"))
+    client = FakeClient()
+    client.set("a.py", "2024-01-01T00:00:00+00:00")
+    assert scan(ImportErrorScan("default", store), client) == {"a.py": "2024-01-01T00:00:00+00:00"}
+
+    # Airflow re-records the error on every parse; a fresh worker still knows when it first appeared
+    client.set("a.py", "2024-01-02T00:00:00+00:00")
+    assert scan(ImportErrorScan("default", store), client) == {"a.py": "2024-01-01T00:00:00+00:00"}
+    # Other instances keep their own times
+    assert scan(ImportErrorScan("other", store), client) == {"a.py": "2024-01-02T00:00:00+00:00"}
+
+
+def test_changed_and_recurring_errors_are_new(tmp_path) -> None:
+    store = SqliteStore(str(tmp_path / "cache.db"))
+    client = FakeClient()
+    worker = ImportErrorScan("default", store)
+    client.set("a.py", "2024-01-01T00:00:00+00:00")
+    scan(worker, client)
+
+    client.set("a.py", "2024-01-02T00:00:00+00:00", trace=TRACE.replace("pandas", "numpy"))
+    assert scan(worker, client) == {"a.py": "2024-01-02T00:00:00+00:00"}
+
+    # The file parses again, then breaks the same way as before
+    del client.errors["a.py"]
+    assert scan(worker, client) == {}
+    client.set("a.py", "2024-01-03T00:00:00+00:00", trace=TRACE.replace("pandas", "numpy"))
+    assert scan(ImportErrorScan("default", store), client) == {"a.py": "2024-01-03T00:00:00+00:00"}
+
+
+def test_without_shared_store_first_seen_is_per_process() -> None:
+    client = FakeClient()
+    worker = ImportErrorScan("default")
+    client.set("a.py", "2024-01-01T00:00:00+00:00")
+    scan(worker, client)
+    client.set("a.py", "2024-01-02T00:00:00+00:00")
+    assert scan(worker, client) == {"a.py": "2024-01-01T00:00:00+00:00"}
@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from instances import ALL_INSTANCES, InstanceRegistry
+
+
+class FakeInstance:
+    """Answers a page of DAGs after a short delay, or fails like an unreachable deployment."""
+
+    in_flight = 0
+    max_in_flight = 0
+
+    def __init__(self, dag_ids, error: Exception = None):
+        self.dag_ids = dag_ids
+        self.error = error
+
+    async def aget_json_response(self, endpoint, **kwargs):
+        FakeInstance.in_flight += 1
+        FakeInstance.max_in_flight = max(FakeInstance.max_in_flight, FakeInstance.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if self.error is not None:
+                raise self.error
+            return {"dags": [{"dag_id": dag_id} for dag_id in self.dag_ids], "total_entries": len(self.dag_ids)}
+        finally:
+            FakeInstance.in_flight -= 1
+
+
+@pytest.fixture(autouse=True)
+def reset_counters():
+    FakeInstance.in_flight = FakeInstance.max_in_flight = 0
+
+
+def registry(**instances) -> InstanceRegistry:
+    return InstanceRegistry(instances, default=next(iter(instances)))
+
+
+def test_all_queries_every_instance_concurrently_and_tags_items() -> None:
+    fleet = registry(eu=FakeInstance(["etl", "reports"]), us=FakeInstance(["etl"]))
+    result = asyncio.run(fleet.collect(ALL_INSTANCES, "dags", "dags"))
+    assert FakeInstance.max_in_flight == 2
+    assert result["dags"] == [
+        {"dag_id": "etl", "instance": "eu"},
+        {"dag_id": "reports", "instance": "eu"},
+        {"dag_id": "etl", "instance": "us"},
+    ]
+    assert result["total_entries"] == 3
+    assert result["instances"] == {"eu": {"total_entries": 2}, "us": {"total_entries": 1}}
+
+
+def test_unreachable_instance_is_reported_without_failing_the_query() -> None:
+    fleet = registry(eu=FakeInstance(["etl"]), us=FakeInstance([], error=ConnectionError("refused")))
+    result = asyncio.run(fleet.collect(ALL_INSTANCES, "dags", "dags"))
+    assert result["dags"] == [{"dag_id": "etl", "instance": "eu"}]
+    assert result["instances"]["us"] == {"error": "refused"}
+
+
+def test_all_instances_failing_raises() -> None:
+    fleet = registry(eu=FakeInstance([], error=ConnectionError("down")), us=FakeInstance([], error=ConnectionError("down")))
+    with pytest.raises(RuntimeError, match="All Airflow instances failed"):
+        asyncio.run(fleet.collect(ALL_INSTANCES, "dags", "dags"))
+
+
+def test_single_instance_queries_are_not_merged() -> None:
+    fleet = registry(eu=FakeInstance(["etl"]), us=FakeInstance(["reports"]))
+    assert asyncio.run(fleet.collect("us", "dags", "dags")) == {"dags": [{"dag_id": "reports"}], "total_entries": 1}
+    assert asyncio.run(fleet.collect(None, "dags", "dags"))["dags"] == [{"dag_id": "etl"}]
+    with pytest.raises(ValueError, match="single instance"):
+        fleet.get(ALL_INSTANCES)
+    with pytest.raises(ValueError, match="Unknown Airflow instance"):
+        fleet.get("apac")
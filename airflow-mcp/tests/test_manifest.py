@@ -0,0 +1,7 @@
+from tools.manifest import load_manifest
+
+
+def test_manifest_is_current() -> None:
+    # A stale manifest makes the server import every tool at startup; regenerate it with
+    # `python -m tools.manifest` after changing a tool or a schema
+    assert load_manifest() is not None
@@ -0,0 +1,62 @@
+import asyncio
+
+from tools.progress import ProgressStream
+
+
+class FakeContext:
+    def __init__(self):
+        self.partials = []
+        self.progress = []
+
+    async def report_progress(self, progress, total=None, message=None):
+        self.progress.append(progress)
+
+    async def log(self, message, level=None, logger_name=None, extra=None):
+        self.partials.append(extra["chunk"])
+
+
+class FakeClient:
+    BODY = '{"content": "café ✓ done"}'.encode("utf-8")
+
+    def get_json_response(self, endpoint, on_chunk=None, **kwargs):
+        # Split inside the multi-byte characters
+        for start in range(0, len(self.BODY), 5):
+            on_chunk(self.BODY[start:start + 5])
+        return {"content": "café ✓ done"}
+
+    async def aget_json_response(self, endpoint, params=None):
+        offset, limit = params["offset"], params["limit"]
+        return {"items": list(range(offset, min(offset + limit, 250))), "total_entries": 250}
+
+
+def listening_stream() -> ProgressStream:
+    stream = ProgressStream("test_tool")
+    stream._context, stream.enabled = FakeContext(), True
+    return stream
+
+
+def test_fetch_json_forwards_body_chunks() -> None:
+    stream = listening_stream()
+    result = asyncio.run(stream.fetch_json(FakeClient(), "logs"))
+    assert result == {"content": "café ✓ done"}
+    chunks = stream._context.partials
+    assert "".join(chunk["text"] for chunk in chunks) == FakeClient.BODY.decode("utf-8")
+    assert chunks[0]["offset"] == 0
+    assert stream._context.progress[-1] == len(FakeClient.BODY)
+
+
+def test_paginate_forwards_each_page() -> None:
+    stream = listening_stream()
+    result = asyncio.run(stream.paginate(FakeClient(), "things", "items"))
+    assert result == {"items": list(range(250)), "total_entries": 250}
+    pages = sorted(stream._context.partials, key=lambda page: page["offset"])
+    assert [page["offset"] for page in pages] == [0, 100, 200]
+    assert [item for page in pages for item in page["items"]] == list(range(250))
+
+
+def test_scans_do_not_forward_pages() -> None:
+    stream = listening_stream()
+    result = asyncio.run(stream.paginate(FakeClient(), "things", "items", partial_results=False))
+    assert len(result["items"]) == 250
+    assert stream._context.partials == []
+    assert stream._context.progress[-1] == 250
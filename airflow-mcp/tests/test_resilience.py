@@ -0,0 +1,136 @@
+import pytest
+import requests
+
+from admission import AdmissionRejected
+from deadlines import RequestCancelled
+from http_utils import HTTPUtils
+from resilience import CircuitBreaker, CircuitBreakerRegistry, CircuitOpenError, RetryBudget, RetryPolicy
+
+URL = "http://airflow:8080/api/v1/dags"
+
+
+class ScriptedClient(HTTPUtils):
+    """Each attempt raises or returns the next outcome of the script."""
+
+    def __init__(self, breakers: CircuitBreakerRegistry, outcomes: list, **kwargs):
+        super().__init__(breakers=breakers, **kwargs)
+        self.outcomes = outcomes
+
+    def _send(self, url, *args, **kwargs):
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+
+def ok() -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    return response
+
+
+def http_error(status_code: int) -> requests.exceptions.HTTPError:
+    response = requests.Response()
+    response.status_code = status_code
+    return requests.exceptions.HTTPError(f"HTTP {status_code}", response=response)
+
+
+def half_open_breakers() -> CircuitBreakerRegistry:
+    breakers = CircuitBreakerRegistry(failure_threshold=1, reset_timeout=0)
+    breakers.for_url(URL).record_failure()
+    return breakers
+
+
+def test_breaker_opens_probes_and_closes() -> None:
+    breaker = CircuitBreaker("airflow", failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.before_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+    breaker.reset_timeout = 0
+    breaker.before_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # Only one probe at a time
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_failed_probe_opens_again() -> None:
+    breaker = CircuitBreaker("airflow", failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    breaker.before_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+@pytest.mark.parametrize("error", [AdmissionRejected("saturated"), RequestCancelled("cancelled")])
+def test_locally_rejected_probe_is_released(error) -> None:
+    breakers = half_open_breakers()
+    client = ScriptedClient(breakers, [error, ok()])
+    with pytest.raises(type(error)):
+        client.make_request(URL)
+    assert breakers.for_url(URL).state == CircuitBreaker.HALF_OPEN
+    # The next request probes instead of failing fast
+    assert client.make_request(URL).status_code == 200
+    assert breakers.for_url(URL).state == CircuitBreaker.CLOSED
+
+
+def test_probe_cut_off_mid_stream_counts_as_failure() -> None:
+    breakers = half_open_breakers()
+    client = ScriptedClient(breakers, [requests.exceptions.RequestException("body cut off")])
+    with pytest.raises(requests.exceptions.RequestException):
+        client.make_request(URL)
+    assert breakers.for_url(URL).state == CircuitBreaker.OPEN
+
+
+def test_retry_policy_only_retries_idempotent_failures() -> None:
+    policy = RetryPolicy(max_attempts=3)
+    assert policy.is_retryable("GET", None)
+    assert policy.is_retryable("GET", 503)
+    assert not policy.is_retryable("GET", 404)
+    assert not policy.is_retryable("POST", 503)
+
+
+def test_retry_budget_caps_retries() -> None:
+    budget = RetryBudget(ratio=0.5, min_per_second=0, max_tokens=1)
+    assert budget.try_spend()
+    assert not budget.try_spend()
+    budget.record_request()
+    budget.record_request()
+    assert budget.try_spend()
+
+
+def test_retries_stop_when_the_budget_is_spent() -> None:
+    outage = [requests.exceptions.ConnectionError("refused") for _ in range(5)]
+    client = ScriptedClient(
+        CircuitBreakerRegistry(failure_threshold=100),
+        outage,
+        retry_policy=RetryPolicy(max_attempts=5, base_delay=0),
+        retry_budget=RetryBudget(ratio=0, min_per_second=0, max_tokens=1),
+    )
+    with pytest.raises(requests.exceptions.ConnectionError):
+        client.make_request(URL)
+    # The first attempt and the single budgeted retry
+    assert len(client.outcomes) == 3
+
+
+def test_only_server_errors_open_the_breaker() -> None:
+    breakers = CircuitBreakerRegistry(failure_threshold=2, reset_timeout=60)
+    client = ScriptedClient(breakers, [http_error(404), http_error(404), http_error(503), http_error(503), ok()])
+    for _ in range(2):
+        with pytest.raises(requests.exceptions.HTTPError):
+            client.make_request(URL)
+    assert breakers.for_url(URL).state == CircuitBreaker.CLOSED
+    for _ in range(2):
+        with pytest.raises(requests.exceptions.HTTPError):
+            client.make_request(URL)
+    assert breakers.for_url(URL).state == CircuitBreaker.OPEN
+    # Fails fast without contacting Airflow
+    with pytest.raises(CircuitOpenError):
+        client.make_request(URL)
+    assert len(client.outcomes) == 1
@@ -0,0 +1,15 @@
+import os
+import stat
+
+import shared_cache
+from shared_cache import SqliteStore
+
+
+def test_default_directory_is_private(tmp_path, monkeypatch) -> None:
+    directory = tmp_path / "airflow-mcp"
+    directory.mkdir(mode=0o777)
+    monkeypatch.setattr(shared_cache, "DEFAULT_SQLITE_DIR", str(directory))
+    store = SqliteStore(str(directory / "cache.db"))
+    store.set("ns", "key", b"value")
+    assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+    assert store.get("ns", "key") == b"value"
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+import json_codec
+from tools.truncation import MAX_ELIDED_NOTES, apply_budget, get_truncated_output_tool
+
+
+def size(payload) -> int:
+    return len(json_codec.dumps(payload).encode("utf-8"))
+
+
+def read_all(cursor: str, max_bytes: int = 4096) -> str:
+    text = ""
+    while cursor:
+        chunk = asyncio.run(get_truncated_output_tool(cursor, max_bytes=max_bytes))
+        assert len(chunk["content"].encode("utf-8")) <= max(max_bytes, 4)
+        text += chunk["content"]
+        cursor = chunk["next_cursor"]
+    return text
+
+
+def task_instances(count: int) -> dict:
+    return {
+        "task_instances": [
+            {"task_id": f"task_{i}", "state": "failed" if i % 7 == 0 else "success", "log": "INFO line\n" * 50}
+            for i in range(count)
+        ],
+        "total_entries": count,
+    }
+
+
+def test_response_within_budget_is_unchanged() -> None:
+    payload = {"content": "short"}
+    assert apply_budget(payload, 1024) is payload
+    assert apply_budget(task_instances(100), None) == task_instances(100)
+
+
+@pytest.mark.parametrize("budget", [64, 200, 500, 1000, 2000, 5000, 20000])
+def test_truncated_response_fits_the_budget(budget: int) -> None:
+    payload = task_instances(200)
+    result = apply_budget(payload, budget)
+    assert result["truncation"]["truncated"] is True
+    assert size(result) <= budget or result == {"truncation": result["truncation"]}
+    assert json_codec.loads(read_all(result["truncation"]["cursor"])) == payload
+
+
+def test_marker_is_counted_in_the_budget() -> None:
+    # Many long strings, each one a note in the marker
+    payload = {f"field_{i}": "x" * 5000 for i in range(200)}
+    result = apply_budget(payload, 8000)
+    assert size(result) <= 8000
+    assert len(result["truncation"]["elided"]) <= MAX_ELIDED_NOTES
+
+
+def test_elided_notes_are_capped() -> None:
+    payload = {f"field_{i}": "x" * 2000 for i in range(50)}
+    result = apply_budget(payload, 40000)
+    assert size(result) <= 40000
+    assert len(result["truncation"]["elided"]) == MAX_ELIDED_NOTES
+    assert result["truncation"]["elided_total"] == 50
+
+
+def test_skeleton_keeps_every_key_when_no_level_fits() -> None:
+    payload = {"content": "x" * 100000, "metadata": {"try_number": 2, "log": "y" * 1000}, "lines": list(range(5000))}
+    result = apply_budget(payload, 700)
+    assert size(result) <= 700
+    assert result["content"] == "" and result["lines"] == [] and result["metadata"] == {"try_number": 2, "log": ""}
+    assert result["truncation"]["summary"]["content"] == "string of 100000 chars"
+
+
+def test_failed_items_are_kept() -> None:
+    result = apply_budget(task_instances(200), 6000)
+    kept = result["task_instances"]
+    assert kept and all(ti["state"] == "failed" for ti in kept[:3])
+
+
+@pytest.mark.parametrize("max_bytes", [1, 3, 100])
+def test_chunks_are_sliced_on_utf8_bytes(max_bytes: int) -> None:
+    payload = {"log": "étape échouée ✗ 🚫 " * 200}
+    result = apply_budget(payload, 500)
+    cursor = result["truncation"]["cursor"]
+    first = asyncio.run(get_truncated_output_tool(cursor, max_bytes=max_bytes))
+    assert first["total_length"] == result["truncation"]["original_bytes"]
+    assert json_codec.loads(read_all(cursor, max_bytes)) == payload
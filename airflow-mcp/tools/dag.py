@@ -1,6 +1,9 @@
 
 from typing import Optional, List, Dict, Union
-from schema import load_schema, http_utils
+from instances import ALL_INSTANCES
+from clients import airflow_instances
+from schema import load_schema
+from tools.progress import ProgressStream
 
 
 TIME_DELTA_SCHEMA = load_schema("commons/time_delta")
@@ -51,7 +54,8 @@ async def get_dags_tool(
     fields: Optional[List[str]] = None,
     only_active: bool = True,
     paused: Optional[bool] = None,
-    dag_id_pattern: Optional[str] = None
+    dag_id_pattern: Optional[str] = None,
+    instance: Optional[str] = None
 ) -> str:
     """
     Get all DAGs with optional filtering and pagination.
@@ -65,6 +69,8 @@ async def get_dags_tool(
         only_active: Only filter active DAGs (default: True)
         paused: Only filter paused/unpaused DAGs
         dag_id_pattern: If set, only return DAGs with dag_ids matching this pattern
+        instance: Name of the Airflow instance to query (default: the default instance).
+                  Use "all" to query every instance concurrently and merge the results
     
     Returns:
         JSON response containing list of DAGs with their basic information
@@ -81,14 +87,15 @@ async def get_dags_tool(
     if tags: params["tags"] = ",".join(tags)
     if fields: params["fields"] = ",".join(fields)
     # Make the request
-    response = http_utils.get_json_response(endpoint, params=params)
+    response = await airflow_instances.collect(instance, endpoint, "dags", params=params)
     return response
 
 
 
 async def get_dag_tool(
     dag_id: str,
-    fields: Optional[List[str]] = None
+    fields: Optional[List[str]] = None,
+    instance: Optional[str] = None
 ) -> dict:
     """
     Get details of a specific DAG by its dag_id.
@@ -97,6 +104,7 @@ async def get_dag_tool(
         dag_id: The unique ID of the DAG to retrieve.
         fields: Optional list of fields to return. 
                 Example: ["dag_id", "is_paused", "is_active", "owners", "tags", "timetable_description"]
+        instance: Name of the Airflow instance to query (default: the default instance)
     
     Returns:
         JSON response containing detailed information about the specified DAG.
@@ -115,7 +123,7 @@ async def get_dag_tool(
     if fields:
         params["fields"] = ",".join(fields)
     
-    response = http_utils.get_json_response(endpoint, params=params)
+    response = await airflow_instances.get_json(instance, endpoint, params=params)
     return response
 
 
@@ -133,7 +141,9 @@ async def get_dag_runs_tool(
     updated_at_lte: Optional[str] = None,
     state: Optional[List[str]] = None,
     order_by: Optional[str] = None,
-    fields: Optional[List[str]] = None
+    fields: Optional[List[str]] = None,
+    fetch_all: bool = False,
+    instance: Optional[str] = None
 ) -> str:
     """
     Get DAG runs for a specific DAG or all DAGs.
@@ -167,6 +177,10 @@ async def get_dag_runs_tool(
         order_by: The name of the field to order the results by. 
                  Prefix a field name with - to reverse the sort order. (New in version 2.1.0)
         fields: List of field for return.
+        fetch_all: Page through every matching DAG run instead of one page, ignoring limit and offset
+                   (default: False). Progress is reported as the pages arrive.
+        instance: Name of the Airflow instance to query (default: the default instance).
+                  Use "all" to query every instance concurrently and merge the results
     
     Returns:
         JSON response containing list of DAG runs with their information
@@ -205,12 +219,41 @@ async def get_dag_runs_tool(
         params["fields"] = ",".join(fields)
     
     # Make the request
-    response = http_utils.get_json_response(endpoint, params=params)
+    if fetch_all:
+        if instance == ALL_INSTANCES:
+            raise ValueError("fetch_all pages through a single instance; choose one instead of 'all'")
+        return await ProgressStream("get_dag_runs").paginate(
+            airflow_instances.get(instance), endpoint, "dag_runs", params=params
+        )
+    response = await airflow_instances.collect(instance, endpoint, "dag_runs", params=params)
+    return response
+
+
+async def get_dag_run_tool(
+    dag_id: str,
+    dag_run_id: str,
+    instance: Optional[str] = None
+) -> dict:
+    """
+    Get a specific DAG run by its dag_run_id.
+
+    Args:
+        dag_id: The DAG ID the run belongs to (required)
+        dag_run_id: The DAG run ID (required)
+        instance: Name of the Airflow instance to query (default: the default instance)
+
+    Returns:
+        JSON response containing the DAG run: its state, run type, logical, start and end
+        dates, conf and note
+    """
+    endpoint = f"dags/{dag_id}/dagRuns/{dag_run_id}"
+    response = await airflow_instances.get_json(instance, endpoint)
     return response
 
 
 async def get_dag_source_tool(
-    file_token: str
+    file_token: str,
+    instance: Optional[str] = None
 ) -> dict:
     """
     Get the source code of a DAG using its file token.
@@ -221,6 +264,7 @@ async def get_dag_source_tool(
     Args:
         file_token: The encrypted file token obtained from DAG details.
                    This is a secure token that prevents unauthorized access to non-DAG files.
+        instance: Name of the Airflow instance to query (default: the default instance)
     
     Returns:
         JSON response containing the DAG source code with the following fields:
@@ -231,6 +275,6 @@ async def get_dag_source_tool(
     endpoint = f"dagSources/{file_token}"
     
     # Make the request - no additional parameters needed for this endpoint
-    response = http_utils.get_json_response(endpoint)
+    response = await airflow_instances.get_json(instance, endpoint)
     return response
 
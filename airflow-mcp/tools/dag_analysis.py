@@ -0,0 +1,1084 @@
+import ast
+import asyncio
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import json_codec
+from clients import airflow_instances, shared_store
+from schema import load_schema
+
+
+# ============================================================================
+# DAG Analysis Schema
+# ============================================================================
+
+DAG_ANALYSIS_SCHEMA = load_schema("dag/dag_analysis")
+
+ANALYSIS_CACHE_SIZE = int(os.getenv("MCP_DAG_ANALYSIS_CACHE", "256"))
+# Loops and comprehensions over statically known values are unrolled up to this many iterations per file
+MAX_LOOP_ITERATIONS = 500
+# Nesting depth of local helper functions that are followed when called
+MAX_CALL_DEPTH = 8
+# Longest rendered argument value, longer expressions are cut
+MAX_VALUE_LENGTH = 200
+# Longest string, list or tuple built by + and * or padded by a format spec, larger ones are unknown
+MAX_SEQUENCE_LENGTH = 100_000
+# Largest integer built by * in bits, so repeated squaring in an unrolled loop stays cheap
+MAX_INT_BITS = 4096
+# Part of every cache key, bump when the analysis output changes
+ANALYZER_VERSION = "3"
+
+DAG_SCHEDULE_ARGUMENTS = ("schedule", "schedule_interval", "timetable")
+DATASET_CLASSES = ("Dataset", "Asset")
+DATASET_CONDITION_CLASSES = ("DatasetAll", "DatasetAny", "AssetAll", "AssetAny")
+
+
+class _Unknown:
+    """Value the analyzer cannot know without running the file."""
+
+    def __repr__(self) -> str:
+        return "<unknown>"
+
+
+UNKNOWN = _Unknown()
+
+
+class _Template(str):
+    """String with parts only known at runtime, e.g. f"runme_{i}" in a loop over a variable."""
+
+
+class _Placeholder:
+    """Loop variable of a loop that could not be unrolled, rendered as {name} in strings."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+
+class _Symbol:
+    """Imported name, resolved to its qualified name, e.g. airflow.operators.bash.BashOperator."""
+
+    def __init__(self, qualified: str):
+        self.qualified = qualified
+
+    @property
+    def short(self) -> str:
+        return self.qualified.rsplit(".", 1)[-1]
+
+
+class _Dataset:
+    def __init__(self, uri: str):
+        self.uri = uri
+
+
+class _Dag:
+    def __init__(self, dag_id: str, line: int, arguments: Dict[str, Any]):
+        self.dag_id = dag_id
+        self.line = line
+        self.arguments = arguments
+        # Datasets whose updates trigger the DAG
+        self.datasets: List[str] = []
+        # Pool of tasks that do not set their own, from default_args
+        self.pool: Optional[str] = None
+
+
+class _Task:
+    def __init__(self, task_id: str, operator: str, line: int, dag: Optional[_Dag], group: Optional["_Group"]):
+        self.task_id = task_id
+        self.operator = operator
+        self.line = line
+        self.dag = dag
+        self.group = group
+        self.mapped = False
+        self.arguments: Dict[str, Any] = {}
+        # Pools, datasets and other DAGs the task refers to
+        self.references: Dict[str, Any] = {}
+
+
+class _Group:
+    """Task group; as a dependency it stands for its leaves upstream and its roots downstream."""
+
+    def __init__(self, group_id: str, prefix: str, parent: Optional["_Group"]):
+        self.group_id = group_id
+        self.prefix = prefix
+        self.parent = parent
+        self.tasks: List[_Task] = []
+
+
+class _Function:
+    """Function defined in the file, with its role given by its decorator."""
+
+    def __init__(
+        self,
+        node: ast.AST,
+        kind: str,
+        label: str = "",
+        overrides: Optional[Dict[str, Any]] = None,
+        decorator: Optional[ast.Call] = None,
+    ):
+        self.node = node
+        # "dag", "task", "task_group" or "function"
+        self.kind = kind
+        self.label = label
+        self.overrides = overrides or {}
+        self.decorator = decorator
+        self.called = False
+
+
+class _Partial:
+    """Result of Operator.partial(...) or task_function.partial(...), a mapped task once expanded."""
+
+    def __init__(self, create: Any, node: ast.Call):
+        self.create = create
+        self.node = node
+
+
+class _Return(Exception):
+    def __init__(self, value: Any):
+        self.value = value
+
+
+def _short_name(qualified: str) -> str:
+    return qualified.rsplit(".", 1)[-1]
+
+
+def _result_too_large(op: ast.operator, left: Any, right: Any) -> bool:
+    """Whether left op right would build a value past the size caps, checked before computing it."""
+    sequences = (str, list, tuple)
+    if isinstance(op, ast.Add) and isinstance(left, sequences) and isinstance(right, sequences):
+        return len(left) + len(right) > MAX_SEQUENCE_LENGTH
+    if isinstance(op, ast.Mult):
+        if isinstance(left, int) and isinstance(right, sequences):
+            left, right = right, left
+        if isinstance(left, sequences) and isinstance(right, int):
+            return len(left) * max(right, 0) > MAX_SEQUENCE_LENGTH
+        if isinstance(left, int) and isinstance(right, int):
+            return left.bit_length() + right.bit_length() > MAX_INT_BITS
+    if isinstance(op, ast.Mod) and isinstance(left, str):
+        return _format_too_wide(left)
+    return False
+
+
+def _format_too_wide(spec: str) -> bool:
+    """Whether a format spec pads or repeats past MAX_SEQUENCE_LENGTH, e.g. {x:>999999999}."""
+    return any(int(width) > MAX_SEQUENCE_LENGTH for width in re.findall(r"\d+", spec))
+
+
+def _is_plain(value: Any) -> bool:
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return True
+    if isinstance(value, (list, tuple)):
+        return all(_is_plain(item) for item in value)
+    if isinstance(value, dict):
+        return all(isinstance(key, str) and _is_plain(item) for key, item in value.items())
+    return False
+
+
+class DagSourceAnalyzer:
+    """
+    Static analysis of a DAG file: the DAGs it declares, their tasks and the dependencies
+    between them, without importing the file.
+
+    The module is walked statement by statement, tracking the values it can know: string and
+    number constants, imported names, DAGs, tasks and task groups. Loops and comprehensions
+    over values known statically (range(3), a list of names) are unrolled, so tasks created in
+    a loop get their real task_ids; loops over anything else are walked once and their task_ids
+    keep the loop variable as a {placeholder}. Local helper functions are followed when called.
+    Conditions are not evaluated, so both branches of an if contribute tasks.
+
+    Args:
+        source: Python source of the DAG file
+        include_task_arguments: Also render the keyword arguments of every task
+    """
+
+    def __init__(self, source: str, include_task_arguments: bool = False):
+        self.source = source
+        self.include_task_arguments = include_task_arguments
+        self.env: Dict[str, Any] = {}
+        self.imports: Dict[str, str] = {}
+        self.dags: List[_Dag] = []
+        self.tasks: List[_Task] = []
+        self.edges: "OrderedDict[Tuple[int, int], None]" = OrderedDict()
+        self.warnings: List[str] = []
+        self.dag: Optional[_Dag] = None
+        self.group: Optional[_Group] = None
+        self.iterations = 0
+        self.depth = 0
+        self._dag_functions: List[_Function] = []
+
+    # ------------------------------------------------------------------
+    # Entry point
+    # ------------------------------------------------------------------
+
+    def analyze(self) -> Dict[str, Any]:
+        try:
+            tree = ast.parse(self.source)
+        except SyntaxError as e:
+            return {
+                "dags": [],
+                "warnings": [],
+                "syntax_error": {"message": e.msg, "line": e.lineno, "text": (e.text or "").strip()},
+            }
+        try:
+            self._exec_block(tree.body)
+        except _Return:
+            pass
+        for function in self._dag_functions:
+            if not function.called:
+                self._warn(function.node, f"@dag function {function.node.name} is never called, so Airflow does not load it")
+                self._run_dag_function(function)
+        orphans = [task for task in self.tasks if task.dag is None]
+        if orphans and len(self.dags) != 1:
+            self.warnings.append(f"line {orphans[0].line}: {len(orphans)} task(s) are not attached to any DAG")
+        return {"dags": [self._summarize(dag) for dag in self.dags], "warnings": self.warnings}
+
+    # ------------------------------------------------------------------
+    # Statements
+    # ------------------------------------------------------------------
+
+    def _warn(self, node: ast.AST, message: str) -> None:
+        text = f"line {getattr(node, 'lineno', '?')}: {message}"
+        if text not in self.warnings:
+            self.warnings.append(text)
+
+    def _exec_block(self, statements: List[ast.stmt]) -> None:
+        for statement in statements:
+            try:
+                self._exec(statement)
+            except _Return:
+                raise
+            except RecursionError:
+                self._warn(statement, "statement nested too deeply to analyze")
+            except Exception as e:
+                self._warn(statement, f"statement could not be analyzed ({type(e).__name__})")
+
+    def _exec(self, node: ast.stmt) -> None:
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.asname:
+                    self.imports[alias.asname] = alias.name
+                else:
+                    top = alias.name.split(".")[0]
+                    self.imports[top] = top
+        elif isinstance(node, ast.ImportFrom):
+            for alias in node.names:
+                self.imports[alias.asname or alias.name] = f"{node.module or ''}.{alias.name}".lstrip(".")
+        elif isinstance(node, ast.Assign):
+            value = self._eval(node.value)
+            for target in node.targets:
+                self._bind(target, value)
+        elif isinstance(node, ast.AnnAssign):
+            if node.value is not None:
+                self._bind(node.target, self._eval(node.value))
+        elif isinstance(node, ast.AugAssign):
+            self._eval(node.value)
+            self._bind(node.target, UNKNOWN)
+        elif isinstance(node, ast.Expr):
+            self._eval(node.value)
+        elif isinstance(node, (ast.With, ast.AsyncWith)):
+            self._exec_with(node)
+        elif isinstance(node, (ast.For, ast.AsyncFor)):
+            self._exec_for(node)
+        elif isinstance(node, ast.While):
+            self._exec_block(node.body)
+            self._exec_block(node.orelse)
+        elif isinstance(node, ast.If):
+            self._exec_block(node.body)
+            self._exec_block(node.orelse)
+        elif isinstance(node, ast.Try) or type(node).__name__ == "TryStar":
+            self._exec_block(node.body)
+            for handler in node.handlers:
+                self._exec_block(handler.body)
+            self._exec_block(node.orelse)
+            self._exec_block(node.finalbody)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            self._define_function(node)
+        elif isinstance(node, ast.Return):
+            raise _Return(self._eval(node.value) if node.value is not None else None)
+
+    def _bind(self, target: ast.AST, value: Any) -> None:
+        if isinstance(target, ast.Name):
+            self.env[target.id] = value
+        elif isinstance(target, (ast.Tuple, ast.List)):
+            values = list(value) if isinstance(value, (list, tuple)) and len(value) == len(target.elts) else None
+            for index, element in enumerate(target.elts):
+                self._bind(element, values[index] if values is not None else UNKNOWN)
+        elif isinstance(target, ast.Starred):
+            self._bind(target.value, UNKNOWN)
+
+    def _exec_with(self, node: ast.AST) -> None:
+        saved_dag, saved_group = self.dag, self.group
+        for item in node.items:
+            value = self._eval(item.context_expr)
+            if isinstance(value, _Dag):
+                self.dag = value
+            elif isinstance(value, _Group):
+                self.group = value
+            if item.optional_vars is not None:
+                self._bind(item.optional_vars, value)
+        try:
+            self._exec_block(node.body)
+        finally:
+            self.dag, self.group = saved_dag, saved_group
+
+    def _exec_for(self, node: ast.AST) -> None:
+        values = self._iteration_values(node.iter)
+        if values is None:
+            self._bind_placeholders(node.target)
+            self._exec_block(node.body)
+        else:
+            for value in values:
+                self._bind(node.target, value)
+                self._exec_block(node.body)
+        self._exec_block(node.orelse)
+
+    def _iteration_values(self, node: ast.expr) -> Optional[List[Any]]:
+        """Values a loop iterates over, or None when they are not known statically or are too many."""
+        value = self._eval(node)
+        if isinstance(value, dict):
+            value = list(value)
+        if isinstance(value, str) and not isinstance(value, _Template):
+            value = list(value)
+        if not isinstance(value, (list, tuple)):
+            self._warn(node, "loop over a value known only at runtime, its task_ids keep the loop variable as {placeholder}")
+            return None
+        if self.iterations + len(value) > MAX_LOOP_ITERATIONS:
+            self._warn(node, f"loop not unrolled beyond {MAX_LOOP_ITERATIONS} iterations, its task_ids keep the loop variable as {{placeholder}}")
+            return None
+        self.iterations += len(value)
+        return list(value)
+
+    def _bind_placeholders(self, target: ast.AST) -> None:
+        if isinstance(target, ast.Name):
+            self.env[target.id] = _Placeholder(target.id)
+        elif isinstance(target, (ast.Tuple, ast.List)):
+            for element in target.elts:
+                self._bind_placeholders(element)
+
+    def _define_function(self, node: ast.AST) -> None:
+        function = _Function(node, "function")
+        for decorator in node.decorator_list:
+            target = decorator.func if isinstance(decorator, ast.Call) else decorator
+            name = self._qualified_name(target)
+            if name is None:
+                continue
+            short = _short_name(name)
+            kwargs = self._eval_keywords(decorator.keywords) if isinstance(decorator, ast.Call) else {}
+            if short == "dag" or (short == "DAG" and isinstance(decorator, ast.Call)):
+                function = _Function(node, "dag", overrides=kwargs, decorator=decorator if isinstance(decorator, ast.Call) else None)
+                self._dag_functions.append(function)
+            elif short == "task_group":
+                function = _Function(node, "task_group", overrides=kwargs)
+            elif name.split(".")[-2:-1] == ["task"] or short == "task":
+                # @task, @task(), @task.bash, @task.virtualenv(...)
+                label = "@task" if short == "task" else f"@task.{short}"
+                function = _Function(node, "task", label, overrides=kwargs)
+        self.env[node.name] = function
+
+    # ------------------------------------------------------------------
+    # Expressions
+    # ------------------------------------------------------------------
+
+    def _qualified_name(self, node: ast.AST) -> Optional[str]:
+        """Qualified name of a (possibly dotted) imported name, the bare name when not imported."""
+        if isinstance(node, ast.Name):
+            if node.id in self.env:
+                value = self.env[node.id]
+                return value.qualified if isinstance(value, _Symbol) else None
+            return self.imports.get(node.id, node.id)
+        if isinstance(node, ast.Attribute):
+            base = self._qualified_name(node.value)
+            return f"{base}.{node.attr}" if base is not None else None
+        return None
+
+    def _eval(self, node: Optional[ast.AST]) -> Any:
+        if node is None:
+            return None
+        try:
+            return self._eval_node(node)
+        except _Return:
+            raise
+        except RecursionError:
+            self._warn(node, "expression nested too deeply to analyze")
+            return UNKNOWN
+        except Exception:
+            return UNKNOWN
+
+    def _eval_node(self, node: ast.AST) -> Any:
+        if isinstance(node, ast.Constant):
+            return node.value
+        if isinstance(node, ast.JoinedStr):
+            return self._render_fstring(node)
+        if isinstance(node, ast.Name):
+            if node.id in self.env:
+                return self.env[node.id]
+            if node.id in self.imports:
+                return _Symbol(self.imports[node.id])
+            return UNKNOWN
+        if isinstance(node, ast.Attribute):
+            base = self._eval(node.value)
+            if isinstance(base, _Symbol):
+                return _Symbol(f"{base.qualified}.{node.attr}")
+            return UNKNOWN
+        if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+            items = []
+            for element in node.elts:
+                if isinstance(element, ast.Starred):
+                    value = self._eval(element.value)
+                    items.extend(value if isinstance(value, (list, tuple)) else [value])
+                else:
+                    items.append(self._eval(element))
+            return tuple(items) if isinstance(node, ast.Tuple) else items
+        if isinstance(node, ast.Dict):
+            result = {}
+            for key, value in zip(node.keys, node.values):
+                evaluated = self._eval(value)
+                if key is None:
+                    if isinstance(evaluated, dict):
+                        result.update(evaluated)
+                    continue
+                key_value = self._eval(key)
+                if isinstance(key_value, (str, int, float, bool)):
+                    result[key_value] = evaluated
+            return result
+        if isinstance(node, ast.BinOp):
+            return self._eval_binop(node)
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            operand = self._eval(node.operand)
+            return -operand if isinstance(operand, (int, float)) else UNKNOWN
+        if isinstance(node, ast.Subscript):
+            return self._eval_subscript(node)
+        if isinstance(node, (ast.ListComp, ast.GeneratorExp, ast.SetComp)):
+            return self._eval_comprehension(node)
+        if isinstance(node, ast.Call):
+            return self._eval_call(node)
+        if isinstance(node, ast.NamedExpr):
+            value = self._eval(node.value)
+            self._bind(node.target, value)
+            return value
+        return UNKNOWN
+
+    def _render_fstring(self, node: ast.JoinedStr) -> str:
+        parts, templated = [], False
+        for value in node.values:
+            if isinstance(value, ast.Constant):
+                parts.append(str(value.value))
+                continue
+            evaluated = self._eval(value.value)
+            spec = self._eval(value.format_spec) if value.format_spec is not None else ""
+            if isinstance(evaluated, _Placeholder):
+                parts.append("{" + evaluated.name + "}")
+                templated = True
+            elif isinstance(evaluated, _Template):
+                parts.append(str(evaluated))
+                templated = True
+            elif isinstance(evaluated, (str, int, float, bool)) and isinstance(spec, str) and not _format_too_wide(spec):
+                if value.conversion == ord("r"):
+                    evaluated = repr(evaluated)
+                parts.append(format(evaluated, spec))
+            else:
+                parts.append("{" + ast.unparse(value.value) + "}")
+                templated = True
+        text = "".join(parts)
+        return _Template(text) if templated else text
+
+    def _eval_binop(self, node: ast.BinOp) -> Any:
+        left, right = self._eval(node.left), self._eval(node.right)
+        if isinstance(node.op, (ast.BitOr, ast.BitAnd)) and (self._dataset_uris(left) or self._dataset_uris(right)):
+            # Dataset conditions (ds1 | ds2) & ds3; any of their datasets can trigger the DAG
+            return [left, right]
+        if isinstance(node.op, (ast.RShift, ast.LShift)) and (self._has_tasks(left) or self._has_tasks(right)):
+            if isinstance(node.op, ast.RShift):
+                self._link(left, right, node)
+            else:
+                self._link(right, left, node)
+            return right
+        if isinstance(left, (_Unknown, _Placeholder)) or isinstance(right, (_Unknown, _Placeholder)):
+            if isinstance(node.op, ast.Add) and (isinstance(left, str) or isinstance(right, str)):
+                return _Template(self._as_text(left) + self._as_text(right))
+            return UNKNOWN
+        if _result_too_large(node.op, left, right):
+            self._warn(node, f"value larger than {MAX_SEQUENCE_LENGTH} items is not computed")
+            return UNKNOWN
+        if isinstance(node.op, ast.Add):
+            result = left + right
+        elif isinstance(node.op, ast.Sub):
+            result = left - right
+        elif isinstance(node.op, ast.Mult):
+            result = left * right
+        elif isinstance(node.op, ast.Mod):
+            result = left % right
+        elif isinstance(node.op, ast.FloorDiv):
+            result = left // right
+        else:
+            return UNKNOWN
+        if isinstance(result, str) and (isinstance(left, _Template) or isinstance(right, _Template)):
+            return _Template(result)
+        return result
+
+    @staticmethod
+    def _as_text(value: Any) -> str:
+        if isinstance(value, _Placeholder):
+            return "{" + value.name + "}"
+        if isinstance(value, (str, int, float)):
+            return str(value)
+        return "{?}"
+
+    def _eval_subscript(self, node: ast.Subscript) -> Any:
+        container = self._eval(node.value)
+        if isinstance(node.slice, ast.Slice):
+            if not isinstance(container, (list, tuple, str)):
+                return UNKNOWN
+            bounds = [self._eval(part) if part is not None else None for part in (node.slice.lower, node.slice.upper, node.slice.step)]
+            if any(bound is not None and not isinstance(bound, int) for bound in bounds):
+                return UNKNOWN
+            return container[slice(*bounds)]
+        index = self._eval(node.slice)
+        if isinstance(container, (list, tuple, str)) and isinstance(index, int):
+            return container[index]
+        if isinstance(container, dict) and isinstance(index, (str, int, float, bool)):
+            return container.get(index, UNKNOWN)
+        return UNKNOWN
+
+    def _eval_comprehension(self, node: ast.AST) -> Any:
+        saved = dict(self.env)
+        results: List[Any] = []
+
+        def walk(generators: List[ast.comprehension]) -> None:
+            if not generators:
+                results.append(self._eval(node.elt))
+                return
+            generator = generators[0]
+            if generator.ifs:
+                self._warn(node, "comprehension conditions are not evaluated, all its items are included")
+            values = self._iteration_values(generator.iter)
+            if values is None:
+                self._bind_placeholders(generator.target)
+                walk(generators[1:])
+                return
+            for value in values:
+                self._bind(generator.target, value)
+                walk(generators[1:])
+
+        try:
+            walk(node.generators)
+        finally:
+            self.env = saved
+        return results
+
+    def _eval_keywords(self, keywords: List[ast.keyword]) -> Dict[str, Any]:
+        kwargs: Dict[str, Any] = {}
+        for keyword in keywords:
+            value = self._eval(keyword.value)
+            if keyword.arg is None:
+                if isinstance(value, dict):
+                    kwargs.update({str(key): item for key, item in value.items()})
+            else:
+                kwargs[keyword.arg] = value
+        return kwargs
+
+    def _render(self, value: Any, node: Optional[ast.AST]) -> Any:
+        """JSON value of an argument: the value when known statically, else its source text."""
+        if isinstance(value, _Template):
+            return str(value)
+        if _is_plain(value):
+            return list(value) if isinstance(value, tuple) else value
+        if isinstance(value, _Dag):
+            return value.dag_id
+        if isinstance(value, (_Task, _Group, list, tuple)) and self._has_tasks(value):
+            return [task.task_id for task in self._flatten(value)]
+        text = ast.unparse(node) if node is not None else repr(value)
+        return text if len(text) <= MAX_VALUE_LENGTH else text[:MAX_VALUE_LENGTH - 3] + "..."
+
+    def _render_keywords(self, keywords: List[ast.keyword], values: Dict[str, Any], skip: Tuple[str, ...]) -> Dict[str, Any]:
+        rendered = {}
+        for keyword in keywords:
+            if keyword.arg is None or keyword.arg in skip:
+                continue
+            rendered[keyword.arg] = self._render(values.get(keyword.arg, UNKNOWN), keyword.value)
+        return rendered
+
+    # ------------------------------------------------------------------
+    # Calls: DAGs, tasks, groups and dependencies
+    # ------------------------------------------------------------------
+
+    def _eval_call(self, node: ast.Call) -> Any:
+        func = node.func
+        if isinstance(func, ast.Attribute):
+            handled, result = self._eval_method(node, func)
+            if handled:
+                return result
+        callee = self._eval(func)
+        if isinstance(callee, _Function):
+            return self._call_function(callee, node)
+        if isinstance(callee, _Partial):
+            return UNKNOWN
+
+        args = [self._eval(arg) for arg in node.args]
+        kwargs = self._eval_keywords(node.keywords)
+        name = callee.qualified if isinstance(callee, _Symbol) else self._qualified_name(func)
+        short = _short_name(name) if name else ""
+
+        if short == "range" and all(isinstance(arg, int) for arg in args):
+            bounds = range(*args)
+            return list(bounds) if len(bounds) <= MAX_LOOP_ITERATIONS else UNKNOWN
+        if short in ("list", "tuple", "sorted") and len(args) == 1 and isinstance(args[0], (list, tuple, dict)):
+            values = list(args[0])
+            return sorted(values) if short == "sorted" and _is_plain(values) else values
+        if short == "enumerate" and args and isinstance(args[0], (list, tuple)):
+            return list(enumerate(args[0]))
+        if short == "zip" and args and all(isinstance(arg, (list, tuple)) for arg in args):
+            return list(zip(*args))
+        if short == "str" and len(args) == 1 and isinstance(args[0], (str, int, float)):
+            return str(args[0])
+        if short in DATASET_CLASSES:
+            uri = kwargs.get("uri", args[0] if args else None)
+            return _Dataset(str(uri) if isinstance(uri, str) else "{" + ast.unparse(node) + "}")
+        if short in DATASET_CONDITION_CLASSES:
+            return args
+        if short == "DAG":
+            return self._create_dag(node, args, kwargs)
+        if short == "TaskGroup":
+            return self._create_group(node, args, kwargs)
+        if short == "chain":
+            self._chain(args, node)
+            return UNKNOWN
+        if short == "cross_downstream" and len(args) == 2:
+            for upstream in self._flatten(args[0]):
+                self._link(upstream, args[1], node)
+            return UNKNOWN
+        if "task_id" in kwargs:
+            return self._create_task(node, short or ast.unparse(func), kwargs)
+        return UNKNOWN
+
+    def _eval_method(self, node: ast.Call, func: ast.Attribute) -> Tuple[bool, Any]:
+        """Calls on a value: dependencies, mapping, str.format and dict views."""
+        owner = self._eval(func.value)
+        method = func.attr
+        if method in ("set_downstream", "set_upstream") and self._has_tasks(owner) and node.args:
+            other = self._eval(node.args[0])
+            if method == "set_downstream":
+                self._link(owner, other, node)
+            else:
+                self._link(other, owner, node)
+            return True, None
+        if method == "partial" and isinstance(owner, (_Symbol, _Function)):
+            return True, _Partial(owner, node)
+        if method in ("expand", "expand_kwargs") and (isinstance(owner, _Partial) or (isinstance(owner, _Function) and owner.kind == "task")):
+            expanded = [*[self._eval(arg) for arg in node.args], *self._eval_keywords(node.keywords).values()]
+            if isinstance(owner, _Partial):
+                task = self._create_mapped(owner.create, owner.node, node)
+            else:
+                task = self._create_mapped(owner, None, node)
+            # Mapping over another task's output makes it upstream
+            for value in expanded:
+                if self._has_tasks(value) and isinstance(task, _Task):
+                    self._link(value, task, node)
+            return True, task
+        if method == "override" and isinstance(owner, _Function):
+            return True, _Function(owner.node, owner.kind, owner.label, {**owner.overrides, **self._eval_keywords(node.keywords)})
+        if method in ("as_setup", "as_teardown") and self._has_tasks(owner):
+            return True, owner
+        if method == "format" and isinstance(owner, str):
+            args = [self._eval(arg) for arg in node.args]
+            kwargs = self._eval_keywords(node.keywords)
+            if _is_plain(args) and _is_plain(kwargs) and not _format_too_wide(owner):
+                return True, owner.format(*args, **kwargs)
+            return True, _Template(owner)
+        if isinstance(owner, dict) and method in ("items", "keys", "values") and not node.args:
+            return True, list(getattr(owner, method)())
+        return False, None
+
+    def _create_dag(self, node: ast.Call, args: List[Any], kwargs: Dict[str, Any]) -> _Dag:
+        dag_id = kwargs.get("dag_id", args[0] if args else UNKNOWN)
+        if not isinstance(dag_id, str):
+            dag_id = _Template("{" + ast.unparse(node.args[0] if node.args else node) + "}")
+        arguments = self._render_keywords(node.keywords, kwargs, ("dag_id",))
+        dag = _Dag(str(dag_id), node.lineno, arguments)
+        self._add_dag(dag, kwargs)
+        return dag
+
+    def _add_dag(self, dag: _Dag, kwargs: Dict[str, Any]) -> None:
+        dag.datasets = self._dataset_uris(kwargs.get("schedule"))
+        default_args = kwargs.get("default_args")
+        if isinstance(default_args, dict) and isinstance(default_args.get("pool"), str):
+            dag.pool = default_args["pool"]
+        self.dags.append(dag)
+
+    def _create_group(self, node: ast.Call, args: List[Any], kwargs: Dict[str, Any]) -> _Group:
+        group_id = kwargs.get("group_id", args[0] if args else None)
+        group_id = str(group_id) if isinstance(group_id, str) else "{" + ast.unparse(node) + "}"
+        parent = kwargs.get("parent_group") if isinstance(kwargs.get("parent_group"), _Group) else self.group
+        prefix = parent.prefix if parent is not None else ""
+        if kwargs.get("prefix_group_id", True) is not False:
+            prefix = f"{prefix}{group_id}."
+        return _Group(group_id, prefix, parent)
+
+    def _create_task(self, node: ast.Call, operator: str, kwargs: Dict[str, Any], mapped: bool = False) -> _Task:
+        task_id = kwargs.get("task_id")
+        if not isinstance(task_id, str):
+            keyword = next((k for k in node.keywords if k.arg == "task_id"), None)
+            task_id = _Template("{" + (ast.unparse(keyword.value) if keyword is not None else "task_id") + "}")
+        dag = kwargs.get("dag") if isinstance(kwargs.get("dag"), _Dag) else self.dag
+        group = kwargs.get("task_group") if isinstance(kwargs.get("task_group"), _Group) else self.group
+        full_id = f"{group.prefix}{task_id}" if group is not None else str(task_id)
+        if any(task.task_id == full_id and task.dag is dag for task in self.tasks) and not isinstance(task_id, _Template):
+            self._warn(node, f"task_id {full_id} is declared more than once")
+        task = _Task(_Template(full_id) if isinstance(task_id, _Template) else full_id, operator, node.lineno, dag, group)
+        task.mapped = mapped
+        task.references = self._references(kwargs)
+        if self.include_task_arguments:
+            task.arguments = self._render_keywords(node.keywords, kwargs, ("task_id", "dag", "task_group"))
+        self.tasks.append(task)
+        while group is not None:
+            group.tasks.append(task)
+            group = group.parent
+        return task
+
+    def _dataset_uris(self, value: Any) -> List[str]:
+        if isinstance(value, _Dataset):
+            return [value.uri]
+        if isinstance(value, (list, tuple)):
+            return [uri for item in value for uri in self._dataset_uris(item)]
+        return []
+
+    @staticmethod
+    def _reference_text(value: Any) -> str:
+        if isinstance(value, str):
+            return str(value)
+        if isinstance(value, _Placeholder):
+            return "{" + value.name + "}"
+        return "{?}"
+
+    def _references(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Pool, datasets and other DAGs a task refers to, from its arguments."""
+        references: Dict[str, Any] = {}
+        if isinstance(kwargs.get("pool"), str):
+            references["pool"] = kwargs["pool"]
+        for key in ("outlets", "inlets"):
+            uris = self._dataset_uris(kwargs.get(key))
+            if uris:
+                references[key] = uris
+        if "external_dag_id" in kwargs:
+            references["external_dag_id"] = self._reference_text(kwargs["external_dag_id"])
+            task_ids = kwargs.get("external_task_ids") or kwargs.get("external_task_id")
+            if task_ids is not None:
+                values = task_ids if isinstance(task_ids, (list, tuple)) else [task_ids]
+                references["external_task_ids"] = [self._reference_text(value) for value in values]
+        if "trigger_dag_id" in kwargs:
+            references["trigger_dag_id"] = self._reference_text(kwargs["trigger_dag_id"])
+        return references
+
+    def _create_mapped(self, create: Any, partial_node: Optional[ast.Call], expand_node: ast.Call) -> Any:
+        if isinstance(create, _Function):
+            task = self._call_function(create, partial_node or ast.Call(func=expand_node.func, args=[], keywords=[], lineno=expand_node.lineno))
+        else:
+            kwargs = self._eval_keywords(partial_node.keywords)
+            task = self._create_task(partial_node, create.short, kwargs) if "task_id" in kwargs else UNKNOWN
+        if isinstance(task, _Task):
+            task.mapped = True
+            task.line = expand_node.lineno
+        return task
+
+    def _call_function(self, function: _Function, node: ast.Call) -> Any:
+        function.called = True
+        args = [self._eval(arg) for arg in node.args]
+        kwargs = self._eval_keywords(node.keywords)
+        if function.kind == "task":
+            return self._call_task_function(function, node, args, kwargs)
+        if function.kind == "dag":
+            return self._run_dag_function(function)
+        if function.kind == "task_group":
+            group_id = function.overrides.get("group_id", function.node.name)
+            group = self._create_group(node, [group_id], {})
+            saved = self.group
+            self.group = group
+            try:
+                result = self._run_function(function, args, kwargs)
+            finally:
+                self.group = saved
+            return result if self._has_tasks(result) else group
+        return self._run_function(function, args, kwargs)
+
+    def _call_task_function(self, function: _Function, node: ast.Call, args: List[Any], kwargs: Dict[str, Any]) -> _Task:
+        task_id = function.overrides.get("task_id", function.node.name)
+        base_id = task_id if isinstance(task_id, str) else function.node.name
+        dag = self.dag
+        prefix = self.group.prefix if self.group is not None else ""
+        # Calling a @task function again creates a new task, suffixed like Airflow does
+        existing = {task.task_id for task in self.tasks if task.dag is dag}
+        task_id, suffix = base_id, 0
+        while f"{prefix}{task_id}" in existing:
+            suffix += 1
+            task_id = f"{base_id}__{suffix}"
+        task = self._create_task(node, function.label, {**function.overrides, "task_id": task_id})
+        # Passing one task's output to another makes it upstream
+        for value in [*args, *kwargs.values()]:
+            if self._has_tasks(value):
+                self._link(value, task, node)
+        return task
+
+    def _run_dag_function(self, function: _Function) -> Any:
+        node = function.node
+        function.called = True
+        kwargs = function.overrides
+        dag_id = kwargs.get("dag_id", node.name)
+        keywords = function.decorator.keywords if function.decorator is not None else []
+        arguments = self._render_keywords(keywords, kwargs, ("dag_id",))
+        dag = _Dag(str(dag_id), node.lineno, arguments)
+        self._add_dag(dag, kwargs)
+        saved = self.dag
+        self.dag = dag
+        try:
+            self._run_function(function, [], {})
+        finally:
+            self.dag = saved
+        return dag
+
+    def _run_function(self, function: _Function, args: List[Any], kwargs: Dict[str, Any]) -> Any:
+        """Walk a local function's body with its parameters bound to the call's arguments."""
+        if self.depth >= MAX_CALL_DEPTH:
+            self._warn(function.node, f"calls nested deeper than {MAX_CALL_DEPTH} levels are not followed")
+            return UNKNOWN
+        node = function.node
+        saved = self.env
+        self.env = dict(saved)
+        parameters = [*node.args.posonlyargs, *node.args.args]
+        defaults = [None] * (len(parameters) - len(node.args.defaults)) + list(node.args.defaults)
+        for index, (parameter, default) in enumerate(zip(parameters, defaults)):
+            if index < len(args):
+                value = args[index]
+            elif parameter.arg in kwargs:
+                value = kwargs[parameter.arg]
+            else:
+                value = self._eval(default) if default is not None else UNKNOWN
+            self.env[parameter.arg] = value
+        for parameter, default in zip(node.args.kwonlyargs, node.args.kw_defaults):
+            self.env[parameter.arg] = kwargs.get(parameter.arg, self._eval(default) if default is not None else UNKNOWN)
+        self.depth += 1
+        try:
+            self._exec_block(node.body)
+            return None
+        except _Return as returned:
+            return returned.value
+        finally:
+            self.depth -= 1
+            self.env = saved
+
+    # ------------------------------------------------------------------
+    # Dependencies
+    # ------------------------------------------------------------------
+
+    def _has_tasks(self, value: Any) -> bool:
+        if isinstance(value, (_Task, _Group)):
+            return True
+        if isinstance(value, (list, tuple)):
+            return any(self._has_tasks(item) for item in value)
+        return False
+
+    def _flatten(self, value: Any, as_upstream: bool = True) -> List[_Task]:
+        if isinstance(value, _Task):
+            return [value]
+        if isinstance(value, _Group):
+            return self._group_edge_tasks(value, leaves=as_upstream)
+        if isinstance(value, (list, tuple)):
+            return [task for item in value for task in self._flatten(item, as_upstream)]
+        return []
+
+    def _group_edge_tasks(self, group: _Group, leaves: bool) -> List[_Task]:
+        """A group's leaves (no downstream inside the group) or roots (no upstream inside it)."""
+        members = {id(task) for task in group.tasks}
+        linked = {(up if leaves else down) for up, down in self.edges if up in members and down in members}
+        return [task for task in group.tasks if id(task) not in linked]
+
+    def _link(self, upstream: Any, downstream: Any, node: ast.AST) -> None:
+        if isinstance(upstream, list) and isinstance(downstream, list) and upstream and downstream:
+            self._warn(node, "Airflow does not support list >> list, use cross_downstream()")
+        for up in self._flatten(upstream, as_upstream=True):
+            for down in self._flatten(downstream, as_upstream=False):
+                if up is not down:
+                    self.edges[(id(up), id(down))] = None
+
+    def _chain(self, args: List[Any], node: ast.AST) -> None:
+        for upstream, downstream in zip(args, args[1:]):
+            if isinstance(upstream, list) and isinstance(downstream, list):
+                if len(upstream) != len(downstream):
+                    self._warn(node, "chain() needs lists of the same length to be adjacent")
+                for up, down in zip(upstream, downstream):
+                    self._link(up, down, node)
+            else:
+                self._link(upstream, downstream, node)
+
+    # ------------------------------------------------------------------
+    # Summary
+    # ------------------------------------------------------------------
+
+    def _summarize(self, dag: _Dag) -> Dict[str, Any]:
+        single = len(self.dags) == 1
+        # Tasks created outside any DAG belong to the only DAG of the file, if there is just one
+        tasks = [task for task in self.tasks if task.dag is dag or (single and task.dag is None)]
+        by_id = {id(task): task for task in tasks}
+        dependencies = []
+        has_upstream, has_downstream = set(), set()
+        for up, down in self.edges:
+            if up in by_id and down in by_id:
+                dependencies.append({"upstream": str(by_id[up].task_id), "downstream": str(by_id[down].task_id)})
+                has_downstream.add(up)
+                has_upstream.add(down)
+
+        arguments = dict(dag.arguments)
+        schedule = next((arguments.pop(key) for key in DAG_SCHEDULE_ARGUMENTS if key in arguments), None)
+        task_summaries = []
+        for task in tasks:
+            summary: Dict[str, Any] = {"task_id": str(task.task_id), "operator": task.operator, "line": task.line}
+            if task.group is not None:
+                summary["group"] = task.group.prefix.rstrip(".") or task.group.group_id
+            if task.mapped:
+                summary["mapped"] = True
+            if isinstance(task.task_id, _Template):
+                summary["templated"] = True
+            references = dict(task.references)
+            if "pool" not in references and dag.pool is not None:
+                references["pool"] = dag.pool
+            summary.update(references)
+            if task.arguments:
+                summary["arguments"] = task.arguments
+            task_summaries.append(summary)
+        return {
+            "dag_id": dag.dag_id,
+            "line": dag.line,
+            "schedule": schedule,
+            "schedule_datasets": dag.datasets,
+            "arguments": arguments,
+            "task_count": len(tasks),
+            "tasks": task_summaries,
+            "dependencies": dependencies,
+            "roots": [str(task.task_id) for task in tasks if id(task) not in has_upstream],
+            "leaves": [str(task.task_id) for task in tasks if id(task) not in has_downstream],
+        }
+
+
+def analyze_dag_source(source: str, include_task_arguments: bool = False) -> Dict[str, Any]:
+    """Analyze DAG source code, see DagSourceAnalyzer."""
+    return DagSourceAnalyzer(source, include_task_arguments).analyze()
+
+
+def content_hash(source: str) -> str:
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+class _AnalysisCache:
+    """
+    Bounded LRU of analyses keyed by the content hash of the source, so an unchanged file
+    is never parsed twice. With a shared store, analyses are reused across worker processes.
+    """
+
+    SHARED_NAMESPACE = "dag_analysis"
+
+    def __init__(self, max_entries: int, shared: Optional[Any] = None):
+        self.max_entries = max_entries
+        self.shared = shared
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        if self.shared is not None:
+            raw = self.shared.get(self.SHARED_NAMESPACE, key)
+            if raw is not None:
+                entry = json_codec.loads(raw)
+                self._put_local(key, entry)
+                return entry
+        return None
+
+    def _put_local(self, key: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        self._put_local(key, entry)
+        if self.shared is not None:
+            self.shared.set(self.SHARED_NAMESPACE, key, json_codec.dumps(entry).encode("utf-8"))
+
+    async def analyze(self, source: str, include_task_arguments: bool = False) -> Tuple[Dict[str, Any], bool]:
+        """Analysis of a file's current source and whether it came from the cache."""
+        digest = content_hash(source)
+        key = f"{ANALYZER_VERSION}:{digest}:{int(include_task_arguments)}"
+        entry = self.get(key)
+        if entry is not None:
+            return entry, True
+        # Parsing a large file takes a while, keep the event loop responsive
+        entry = await asyncio.to_thread(analyze_dag_source, source, include_task_arguments)
+        self.put(key, entry)
+        return entry, False
+
+
+analysis_cache = _AnalysisCache(ANALYSIS_CACHE_SIZE, shared_store)
+
+
+async def analyze_dag_tool(
+    dag_id: Optional[str] = None,
+    file_token: Optional[str] = None,
+    include_task_arguments: bool = False,
+    instance: Optional[str] = None
+) -> dict:
+    """
+    Summarize a DAG file without shipping its source: DAGs, schedules, tasks and dependencies.
+
+    The source is parsed on the server, never imported or executed. Tasks created in loops
+    over known values get their real task_ids, `>>`/`<<`, set_upstream/set_downstream,
+    chain() and cross_downstream() become dependencies, and task groups, dynamic task
+    mapping and TaskFlow (@dag/@task) are understood. Analyses are cached by the content
+    hash of the file, so asking again about an unchanged file costs one revalidated request.
+
+    Args:
+        dag_id: The DAG to analyze; its file_token is looked up when file_token is not given.
+                When the file declares several DAGs, only this one is returned.
+        file_token: File token of the DAG file, from the file_token attribute of get_dag
+        include_task_arguments: Include each task's keyword arguments, such as bash_command (default: False)
+        instance: Name of the Airflow instance to query (default: the default instance)
+
+    Returns:
+        JSON response with the following fields:
+          - file_token: The analyzed file
+          - content_hash: SHA-256 of the analyzed source
+          - cached: Whether the analysis was served from the cache
+          - dags: Each DAG with its schedule, arguments, tasks (task_id, operator, line),
+            dependencies (upstream, downstream), roots and leaves
+          - warnings: Parts of the file that could only be analyzed approximately
+          - syntax_error: Message and line when the file does not parse
+    """
+    if not file_token:
+        if not dag_id:
+            raise ValueError("Pass a dag_id or a file_token")
+        details = await airflow_instances.get_json(instance, f"dags/{dag_id}")
+        file_token = details.get("file_token")
+        if not file_token:
+            raise ValueError(f"DAG {dag_id} has no file_token")
+    source = await airflow_instances.get_json(instance, f"dagSources/{file_token}")
+    content = source.get("content", "") if isinstance(source, dict) else str(source)
+
+    analysis, cached = await analysis_cache.analyze(content, include_task_arguments)
+    dags = analysis["dags"]
+    if dag_id and any(dag["dag_id"] == dag_id for dag in dags):
+        dags = [dag for dag in dags if dag["dag_id"] == dag_id]
+    response = {
+        "file_token": file_token,
+        "content_hash": content_hash(content),
+        "cached": cached,
+        "dags": dags,
+        "warnings": analysis["warnings"],
+    }
+    if "syntax_error" in analysis:
+        response["syntax_error"] = analysis["syntax_error"]
+    return response
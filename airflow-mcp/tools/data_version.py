@@ -0,0 +1,87 @@
+import asyncio
+import hashlib
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+import json_codec
+from clients import airflow_instances
+from instances import ALL_INSTANCES
+from schema import load_schema
+
+
+# ============================================================================
+# Data Version Schema
+# ============================================================================
+
+DATA_VERSION_SCHEMA = load_schema("monitor/data_version")
+
+# Most recent DAG runs and problem task instances that make up the version
+RECENT_RUNS = 100
+PROBLEM_TASK_STATES = ["failed", "up_for_retry", "upstream_failed"]
+RUN_FIELDS = ("dag_id", "dag_run_id", "state", "end_date", "updated_at")
+TASK_FIELDS = ("dag_id", "dag_run_id", "task_id", "map_index", "try_number", "state")
+
+
+def _fingerprint(items: Any, fields: tuple) -> list:
+    return sorted(json_codec.dumps([item.get(field) for field in fields]) for item in items)
+
+
+async def _instance_state(instance: Optional[str]) -> Dict[str, Any]:
+    client = airflow_instances.get(instance)
+    runs, tasks, dags, import_errors = await asyncio.gather(
+        client.aget_json_response(
+            "dags/~/dagRuns", params={"order_by": "-execution_date", "limit": RECENT_RUNS}
+        ),
+        # Most recently ended first, so the page always holds the latest changes
+        client.aget_json_response(
+            "dags/~/dagRuns/~/taskInstances",
+            params={"state": PROBLEM_TASK_STATES, "order_by": "-end_date", "limit": RECENT_RUNS},
+        ),
+        client.aget_json_response("dags", params={"limit": 1}),
+        client.aget_json_response("importErrors", params={"limit": RECENT_RUNS}),
+    )
+    return {
+        "dag_runs": _fingerprint(runs.get("dag_runs", []), RUN_FIELDS),
+        "dag_run_total": runs.get("total_entries"),
+        "task_instances": _fingerprint(tasks.get("task_instances", []), TASK_FIELDS),
+        "task_instance_total": tasks.get("total_entries"),
+        "dag_total": dags.get("total_entries"),
+        "import_errors": _fingerprint(import_errors.get("import_errors", []), ("filename", "stack_trace")),
+        "import_error_total": import_errors.get("total_entries"),
+    }
+
+
+def _total(states: Dict[str, Dict[str, Any]], field: str) -> Optional[int]:
+    values = [state[field] for state in states.values()]
+    return None if any(value is None for value in values) else sum(values)
+
+
+async def get_data_version(instance: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Fingerprint of the Airflow state that answers about failures and runs depend on.
+
+    The version changes when one of the most recent DAG runs is created or changes state, when a
+    task instance fails, is up for retry or upstream failed (or stops being so), and when the set
+    of DAGs or of import errors changes. Clients cache answers keyed on it and recompute them as
+    soon as it changes. The fetches are small and run concurrently.
+
+    Args:
+        instance: Name of the Airflow instance to query (default: the default instance).
+                  Use "all" for one version covering every instance; it fails if any instance does
+
+    Returns:
+        JSON response with the following fields:
+          - version: Hash of the fingerprinted state
+          - dag_runs, problem_task_instances, dags, import_errors: Totals the version covers
+          - computed_at: When the version was computed
+    """
+    names = airflow_instances.names() if instance == ALL_INSTANCES else [instance or airflow_instances.default]
+    states = dict(zip(names, await asyncio.gather(*[_instance_state(name) for name in names])))
+    return {
+        "version": hashlib.sha256(json_codec.dumps(states).encode("utf-8")).hexdigest()[:16],
+        "dag_runs": _total(states, "dag_run_total"),
+        "problem_task_instances": _total(states, "task_instance_total"),
+        "dags": _total(states, "dag_total"),
+        "import_errors": _total(states, "import_error_total"),
+        "computed_at": datetime.now(timezone.utc).isoformat(),
+    }
@@ -0,0 +1,50 @@
+import asyncio
+import functools
+import inspect
+import os
+from typing import Annotated, Any, Callable, Optional
+
+from pydantic import Field
+
+from deadlines import DeadlineExceeded, deadline_scope
+from metrics import metrics
+
+
+DEFAULT_TIMEOUT = float(os.getenv("MCP_TOOL_TIMEOUT", "30"))
+MAX_TIMEOUT = float(os.getenv("MCP_TOOL_MAX_TIMEOUT", "300"))
+
+
+def with_deadline(handler: Callable[..., Any], name: str, default_timeout: float = DEFAULT_TIMEOUT) -> Callable[..., Any]:
+    """
+    Wrap a tool handler so every call runs under a deadline and can be cancelled.
+
+    The caller may pass timeout_seconds (capped at MAX_TIMEOUT), otherwise the tool's default
+    applies. The deadline bounds every upstream request the call makes. When the call runs out
+    of time, or the MCP client cancels it, the deadline is cancelled so worker threads abort
+    their in-flight requests, retries and queue waits instead of running to their own timeouts.
+    """
+    @functools.wraps(handler)
+    async def wrapper(*args, timeout_seconds: Optional[float] = None, **kwargs):
+        timeout = min(timeout_seconds, MAX_TIMEOUT) if timeout_seconds and timeout_seconds > 0 else default_timeout
+        with deadline_scope(timeout) as deadline:
+            try:
+                return await asyncio.wait_for(handler(*args, **kwargs), timeout)
+            except asyncio.TimeoutError as e:
+                deadline.cancel()
+                metrics.inc("mcp_tool_deadline_exceeded_total", tool=name)
+                raise DeadlineExceeded(f"{name} did not finish within {timeout:g}s") from e
+            except asyncio.CancelledError:
+                deadline.cancel()
+                metrics.inc("mcp_tool_cancelled_total", tool=name)
+                raise
+
+    timeout_param = Annotated[Optional[float], Field(
+        description=f"Seconds the call may take, bounding every Airflow request it makes (default: {default_timeout:g})"
+    )]
+    signature = inspect.signature(handler)
+    wrapper.__signature__ = signature.replace(parameters=[
+        *signature.parameters.values(),
+        inspect.Parameter("timeout_seconds", inspect.Parameter.KEYWORD_ONLY, default=None, annotation=timeout_param),
+    ])
+    wrapper.__annotations__ = {**handler.__annotations__, "timeout_seconds": timeout_param}
+    return wrapper
@@ -0,0 +1,302 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from clients import airflow_instances
+from credentials import current_identity
+from http_utils import HTTPUtils
+from schema import load_schema
+from tools.dag_analysis import analysis_cache, content_hash
+from tools.progress import ProgressStream
+
+
+# ============================================================================
+# DAG Dependencies Schema
+# ============================================================================
+
+DAG_DEPENDENCIES_SCHEMA = load_schema("dag/dag_dependencies")
+
+# Seconds an index is used before a query refreshes it
+INDEX_TTL = float(os.getenv("MCP_DEPENDENCY_INDEX_TTL", "300"))
+# DAG sources fetched and analyzed concurrently during a refresh
+INDEX_CONCURRENCY = int(os.getenv("MCP_DEPENDENCY_INDEX_CONCURRENCY", "8"))
+# Indexes kept, one per instance and caller identity
+MAX_INDEXES = 16
+DEFAULT_POOL = "default_pool"
+DIRECTIONS = ("downstream", "upstream", "both")
+
+
+class DependencyIndex:
+    """
+    Cross-DAG dependency graph of one Airflow instance.
+
+    Built from the DAG list and the static analysis of every DAG file (see tools.dag_analysis).
+    Edges point from the DAG that runs first to the DAG that depends on it:
+      - dataset: a task of the upstream DAG updates a dataset that schedules the downstream DAG
+      - trigger: a TriggerDagRunOperator of the upstream DAG triggers the downstream DAG
+      - sensor: an ExternalTaskSensor of the downstream DAG waits for the upstream DAG
+      - marker: an ExternalTaskMarker of the upstream DAG clears the downstream DAG
+    DAGs whose tasks run in the same pool (other than default_pool) are listed per pool.
+
+    Refreshes are incremental. Airflow re-parses every file every few seconds without exposing
+    a content fingerprint, so only files that are new or were re-parsed since the last refresh
+    (their last_parsed_time changed) are fetched, through the revalidating HTTP cache, and only
+    those whose source hash changed are analyzed again. Analyses are shared with analyze_dag
+    through the content-hash cache. Queries are breadth-first walks over in-memory adjacency lists.
+    """
+
+    def __init__(self):
+        # file_token -> last_parsed_time, content_hash and analyzed DAGs of the file
+        self.files: Dict[str, Dict[str, Any]] = {}
+        # dag_id -> file_token, is_paused, is_active from the DAG list
+        self.dags: Dict[str, Dict[str, Any]] = {}
+        self.downstream: Dict[str, List[Dict[str, Any]]] = {}
+        self.upstream: Dict[str, List[Dict[str, Any]]] = {}
+        self.pools: Dict[str, Set[str]] = {}
+        self.unresolved: Dict[str, List[Dict[str, Any]]] = {}
+        self.failed_files: Dict[str, str] = {}
+        self.refreshed_at: Optional[float] = None
+        self.refreshed_on: Optional[str] = None
+        self.last_refresh: Dict[str, int] = {}
+        self._lock = asyncio.Lock()
+
+    def stale(self, ttl: float = INDEX_TTL) -> bool:
+        return self.refreshed_at is None or time.monotonic() - self.refreshed_at > ttl
+
+    async def refresh(self, client: HTTPUtils, stream: ProgressStream, force: bool = False) -> None:
+        """Bring the index up to date; concurrent callers wait for a single refresh."""
+        async with self._lock:
+            if not force and not self.stale():
+                return
+            listing = await stream.paginate(client, "dags", "dags", params={"only_active": True}, partial_results=False)
+            dags = listing.get("dags", [])
+            by_file: Dict[str, List[Dict[str, Any]]] = {}
+            for dag in dags:
+                if dag.get("file_token"):
+                    by_file.setdefault(dag["file_token"], []).append(dag)
+
+            def parsed_at(file_dags: List[Dict[str, Any]]) -> str:
+                return max(str(dag.get("last_parsed_time") or "") for dag in file_dags)
+
+            reparsed = [
+                token for token, file_dags in by_file.items()
+                if token not in self.files or self.files[token]["last_parsed_time"] != parsed_at(file_dags)
+                or token in self.failed_files
+            ]
+            semaphore = asyncio.Semaphore(INDEX_CONCURRENCY)
+            done = 0
+            changed = 0
+
+            async def analyze(token: str) -> None:
+                nonlocal done, changed
+                try:
+                    async with semaphore:
+                        source = await client.aget_json_response(f"dagSources/{token}")
+                    content = source.get("content", "") if isinstance(source, dict) else str(source)
+                    digest = content_hash(content)
+                    entry = self.files.get(token)
+                    if entry is not None and entry["content_hash"] == digest and token not in self.failed_files:
+                        # Re-parsed by Airflow but not edited, the DAGs found last time still hold
+                        entry["last_parsed_time"] = parsed_at(by_file[token])
+                    else:
+                        analysis, _ = await analysis_cache.analyze(content)
+                        self.files[token] = {
+                            "last_parsed_time": parsed_at(by_file[token]),
+                            "content_hash": digest,
+                            "dags": analysis["dags"],
+                        }
+                        self.failed_files.pop(token, None)
+                        changed += 1
+                except Exception as e:
+                    self.failed_files[token] = str(e)
+                done += 1
+                await stream.progress(done, len(reparsed), f"Checked {done} of {len(reparsed)} re-parsed DAG files")
+
+            await asyncio.gather(*[analyze(token) for token in reparsed])
+            for token in set(self.files) - set(by_file):
+                del self.files[token]
+            for token in set(self.failed_files) - set(by_file):
+                del self.failed_files[token]
+
+            self.dags = {
+                dag["dag_id"]: {
+                    "file_token": dag.get("file_token"),
+                    "is_paused": dag.get("is_paused"),
+                    "is_active": dag.get("is_active"),
+                }
+                for dag in dags
+            }
+            self._build_graph()
+            self.refreshed_at = time.monotonic()
+            self.refreshed_on = datetime.now(timezone.utc).isoformat()
+            self.last_refresh = {
+                "fetched_files": len(reparsed),
+                "analyzed_files": changed,
+                "reused_files": len(by_file) - changed,
+            }
+
+    def _build_graph(self) -> None:
+        downstream: Dict[str, List[Dict[str, Any]]] = {}
+        upstream: Dict[str, List[Dict[str, Any]]] = {}
+        pools: Dict[str, Set[str]] = {}
+        unresolved: Dict[str, List[Dict[str, Any]]] = {}
+        producers: Dict[str, List[Tuple[str, str]]] = {}
+        consumers: Dict[str, List[str]] = {}
+
+        def add_edge(up: str, down: str, kind: str, task_id: str, **detail: Any) -> None:
+            if down not in self.dags or up not in self.dags:
+                holder = up if up in self.dags else down
+                unresolved.setdefault(holder, []).append({
+                    "kind": kind, "task_id": task_id, "target": down if holder == up else up, **detail
+                })
+                return
+            edge = {"upstream": up, "downstream": down, "kind": kind, "task_id": task_id, **detail}
+            downstream.setdefault(up, []).append(edge)
+            upstream.setdefault(down, []).append(edge)
+
+        for entry in self.files.values():
+            for dag in entry["dags"]:
+                dag_id = dag["dag_id"]
+                if dag_id not in self.dags:
+                    # Declared with an id only known at runtime, or not loaded by Airflow
+                    continue
+                for uri in dag.get("schedule_datasets", []):
+                    consumers.setdefault(uri, []).append(dag_id)
+                for task in dag.get("tasks", []):
+                    task_id = task["task_id"]
+                    for uri in task.get("outlets", []):
+                        producers.setdefault(uri, []).append((dag_id, task_id))
+                    if task.get("trigger_dag_id"):
+                        add_edge(dag_id, task["trigger_dag_id"], "trigger", task_id)
+                    if task.get("external_dag_id"):
+                        detail = {"external_task_ids": task["external_task_ids"]} if task.get("external_task_ids") else {}
+                        if "Marker" in task["operator"]:
+                            add_edge(dag_id, task["external_dag_id"], "marker", task_id, **detail)
+                        else:
+                            add_edge(task["external_dag_id"], dag_id, "sensor", task_id, **detail)
+                    if task.get("pool") and task["pool"] != DEFAULT_POOL:
+                        pools.setdefault(task["pool"], set()).add(dag_id)
+
+        for uri, producing in producers.items():
+            for dag_id, task_id in producing:
+                for consumer in consumers.get(uri, []):
+                    add_edge(dag_id, consumer, "dataset", task_id, dataset=uri)
+        self.downstream, self.upstream, self.pools, self.unresolved = downstream, upstream, pools, unresolved
+
+    def walk(self, dag_id: str, direction: str, max_depth: Optional[int] = None) -> List[Dict[str, Any]]:
+        """DAGs reachable from dag_id, nearest first, each with the edges that reached it."""
+        adjacency = self.downstream if direction == "downstream" else self.upstream
+        neighbour = "downstream" if direction == "downstream" else "upstream"
+        distances = {dag_id: 0}
+        reached: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        queue = deque([dag_id])
+        while queue:
+            current = queue.popleft()
+            if max_depth is not None and distances[current] >= max_depth:
+                continue
+            for edge in adjacency.get(current, []):
+                other = edge[neighbour]
+                if other not in distances:
+                    distances[other] = distances[current] + 1
+                    reached[other] = []
+                    queue.append(other)
+                if other in reached and distances[other] == distances[current] + 1:
+                    reached[other].append(edge)
+        return [
+            {
+                "dag_id": other,
+                "direction": direction,
+                "distance": distances[other],
+                "is_paused": self.dags[other].get("is_paused"),
+                "via": via,
+            }
+            for other, via in reached.items()
+        ]
+
+    def shared_pools(self, dag_id: str) -> List[Dict[str, Any]]:
+        return [
+            {"pool": pool, "dags": sorted(dags - {dag_id})}
+            for pool, dags in sorted(self.pools.items())
+            if dag_id in dags and len(dags) > 1
+        ]
+
+
+_indexes: "OrderedDict[Tuple[str, str], DependencyIndex]" = OrderedDict()
+
+
+def get_index(instance: Optional[str]) -> DependencyIndex:
+    """Index of an instance as seen by the caller, who may not see every DAG."""
+    key = (instance or airflow_instances.default, current_identity())
+    index = _indexes.get(key)
+    if index is None:
+        index = _indexes[key] = DependencyIndex()
+        while len(_indexes) > MAX_INDEXES:
+            _indexes.popitem(last=False)
+    _indexes.move_to_end(key)
+    return index
+
+
+async def get_dag_dependencies_tool(
+    dag_id: str,
+    direction: str = "downstream",
+    max_depth: Optional[int] = None,
+    refresh: bool = False,
+    instance: Optional[str] = None
+) -> dict:
+    """
+    Find the DAGs upstream or downstream of a DAG across the whole deployment.
+
+    Answers questions like "what breaks downstream if this DAG fails?" from an in-memory
+    index of dataset producers and consumers, TriggerDagRunOperator, ExternalTaskSensor and
+    ExternalTaskMarker references and shared pools. The index is built from the DAG list and
+    the static analysis of each DAG file, and is refreshed incrementally (only edited files
+    are analyzed again) when it is older than MCP_DEPENDENCY_INDEX_TTL or refresh is set.
+
+    Args:
+        dag_id: The DAG whose impact to find
+        direction: "downstream" (DAGs affected when this DAG fails or is late), "upstream"
+                   (DAGs this DAG depends on) or "both" (default: "downstream")
+        max_depth: Maximum number of hops to follow (default: unlimited)
+        refresh: Refresh the index before answering, e.g. right after deploying DAG changes
+        instance: Name of the Airflow instance to query (default: the default instance)
+
+    Returns:
+        JSON response with the following fields:
+          - dag_id, direction: The query
+          - dags: Reachable DAGs, nearest first, with their direction, distance, is_paused
+            and the edges (kind, task_id, dataset) that reach them
+          - shared_pools: Pools the DAG shares with other DAGs, and those DAGs
+          - unresolved: References of the DAG to DAGs that do not exist or are only known at runtime
+          - index: Size, age and last refresh of the index
+    """
+    if direction not in DIRECTIONS:
+        raise ValueError(f"direction must be one of {', '.join(DIRECTIONS)}")
+    client = airflow_instances.get(instance)
+    index = get_index(instance)
+    await index.refresh(client, ProgressStream("get_dag_dependencies"), force=refresh)
+    if dag_id not in index.dags:
+        raise ValueError(f"DAG {dag_id} is not an active DAG of this instance")
+
+    dags = []
+    for side in ("downstream", "upstream"):
+        if direction in (side, "both"):
+            dags.extend(index.walk(dag_id, side, max_depth))
+    return {
+        "dag_id": dag_id,
+        "direction": direction,
+        "dags": dags,
+        "shared_pools": index.shared_pools(dag_id),
+        "unresolved": index.unresolved.get(dag_id, []),
+        "index": {
+            "dags": len(index.dags),
+            "files": len(index.files),
+            "analyzed_dags": sum(len(entry["dags"]) for entry in index.files.values()),
+            "failed_files": len(index.failed_files),
+            "refreshed_at": index.refreshed_on,
+            "age_seconds": round(time.monotonic() - index.refreshed_at, 3),
+            **index.last_refresh,
+        },
+    }
@@ -0,0 +1,267 @@
+import asyncio
+import re
+from typing import Optional, List, Dict, Any, Tuple
+from clients import airflow_instances
+from schema import load_schema
+from tools.progress import ProgressStream
+
+
+# ============================================================================
+# Failed Run Diagnosis Schema
+# ============================================================================
+
+FAILED_RUN_DIAGNOSIS_SCHEMA = load_schema("dag/failed_run_diagnosis")
+
+FAILED_TASK_STATES = {"failed", "upstream_failed", "up_for_retry"}
+ERROR_LINE_PATTERN = re.compile(r"(ERROR|CRITICAL|Traceback|Exception|Error:|exit code|returned non-zero)")
+
+
+async def _fetch(instance: Optional[str], endpoint: str, params: Optional[Dict[str, Any]] = None) -> Any:
+    return await airflow_instances.get_json(instance, endpoint, params=params)
+
+
+def _extract_error_windows(content: str, context_lines: int, max_windows: int = 3) -> List[Dict[str, Any]]:
+    """
+    Return the last few regions of a log that look like errors, with surrounding context.
+    Overlapping windows are merged so a traceback is reported once.
+    """
+    lines = content.splitlines()
+    hits = [i for i, line in enumerate(lines) if ERROR_LINE_PATTERN.search(line)]
+    windows: List[Tuple[int, int]] = []
+    for i in hits:
+        start, end = max(0, i - context_lines), min(len(lines), i + context_lines + 1)
+        if windows and start <= windows[-1][1]:
+            windows[-1] = (windows[-1][0], end)
+        else:
+            windows.append((start, end))
+    if not windows and lines:
+        # No recognisable error marker, fall back to the tail of the log
+        windows.append((max(0, len(lines) - context_lines), len(lines)))
+    return [
+        {"start_line": start + 1, "end_line": end, "text": "\n".join(lines[start:end])}
+        for start, end in windows[-max_windows:]
+    ]
+
+
+def _extract_source_snippet(source: str, task_ids: List[str], context_lines: int) -> List[Dict[str, Any]]:
+    """Return the source lines around each failed task's task_id declaration."""
+    lines = source.splitlines()
+    snippets = []
+    for task_id in task_ids:
+        # Mapped/looped task_ids such as runme_0 are usually declared with an f-string prefix
+        candidates = [task_id, re.sub(r"_?\d+$", "", task_id)]
+        for candidate in candidates:
+            if not candidate:
+                continue
+            pattern = re.compile(r"task_id\s*=\s*f?['\"]" + re.escape(candidate))
+            match = next((i for i, line in enumerate(lines) if pattern.search(line)), None)
+            if match is not None:
+                start, end = max(0, match - context_lines), min(len(lines), match + context_lines + 1)
+                snippets.append({
+                    "task_id": task_id,
+                    "start_line": start + 1,
+                    "end_line": end,
+                    "text": "\n".join(lines[start:end]),
+                })
+                break
+    return snippets
+
+
+async def _diagnose_task(
+    dag_id: str,
+    dag_run_id: str,
+    task_instance: Dict[str, Any],
+    log_context_lines: int,
+    instance: Optional[str],
+) -> Dict[str, Any]:
+    """Fetch retry history and the latest log for one failed task concurrently."""
+    task_id = task_instance["task_id"]
+    map_index = task_instance.get("map_index")
+    base = f"dags/{dag_id}/dagRuns/{dag_run_id}/taskInstances/{task_id}"
+    try_number = task_instance.get("try_number") or 1
+    log_params: Dict[str, Any] = {"full_content": True}
+    tries_endpoint = f"{base}/tries"
+    if map_index is not None and map_index >= 0:
+        # Each mapped instance has its own tries and logs
+        tries_endpoint = f"{base}/{map_index}/tries"
+        log_params["map_index"] = map_index
+    tries, log = await asyncio.gather(
+        _fetch(instance, tries_endpoint),
+        _fetch(instance, f"{base}/logs/{try_number}", params=log_params),
+        return_exceptions=True,
+    )
+    result: Dict[str, Any] = {
+        "task_id": task_id,
+        "map_index": map_index,
+        "state": task_instance.get("state"),
+        "operator": task_instance.get("operator"),
+        "try_number": task_instance.get("try_number"),
+        "max_tries": task_instance.get("max_tries"),
+        "duration": task_instance.get("duration"),
+        "errors": [],
+    }
+    if isinstance(tries, BaseException):
+        result["errors"].append(f"tries: {tries}")
+        result["retry_history"] = []
+    else:
+        result["retry_history"] = [
+            {
+                "try_number": t.get("try_number"),
+                "state": t.get("state"),
+                "start_date": t.get("start_date"),
+                "end_date": t.get("end_date"),
+                "duration": t.get("duration"),
+                "hostname": t.get("hostname"),
+            }
+            for t in tries.get("task_instance_tries", [])
+        ]
+    if isinstance(log, BaseException):
+        result["errors"].append(f"log: {log}")
+        result["error_windows"] = []
+    else:
+        result["error_windows"] = _extract_error_windows(str(log.get("content", "")), log_context_lines)
+    return result
+
+
+async def diagnose_failed_run_tool(
+    dag_id: str,
+    dag_run_id: Optional[str] = None,
+    max_tasks: int = 5,
+    log_context_lines: int = 10,
+    source_context_lines: int = 8,
+    instance: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Diagnose a failed DAG run in a single call.
+
+    This tool runs the whole troubleshooting chain server-side and concurrently:
+    DAG run lookup, failed task instances, retry history, task logs, DAG details
+    and DAG source. Instead of returning the raw payloads it returns a compact bundle
+    with only the parts needed to explain the failure.
+
+    Use this tool when you need to:
+    - Find out why a DAG run failed
+    - Get the error messages and stack traces of the failed tasks
+    - See the retry history of the failed tasks
+    - See the source code that declares the failed tasks
+
+    Args:
+        dag_id: The DAG ID to diagnose (required)
+        dag_run_id: The DAG run ID to diagnose. When omitted, the most recent failed run is used
+        max_tasks: The maximum number of failed task instances to inspect (default: 5)
+        log_context_lines: Number of log lines kept around each error line (default: 10)
+        source_context_lines: Number of source lines kept around each failed task declaration (default: 8)
+        instance: Name of the Airflow instance to query (default: the default instance)
+
+    Returns:
+        JSON bundle containing:
+        - dag_id, dag_run_id: The diagnosed run
+        - dag_run: State, dates and conf of the run
+        - dag: Schedule, owners, paused/active flags and file location
+        - failed_tasks: For each failed task instance (each mapped instance apart), its state, retry
+          history and error windows from the log
+        - source_snippets: Source lines around the declaration of each failed task
+        - errors: Any sub-request that could not be completed
+    """
+    errors: List[str] = []
+    runs_endpoint = f"dags/{dag_id}/dagRuns"
+
+    if dag_run_id:
+        dag, dag_run = await asyncio.gather(
+            _fetch(instance, f"dags/{dag_id}"),
+            _fetch(instance, f"{runs_endpoint}/{dag_run_id}"),
+            return_exceptions=True,
+        )
+    else:
+        dag, runs = await asyncio.gather(
+            _fetch(instance, f"dags/{dag_id}"),
+            _fetch(instance, runs_endpoint, params={"state": "failed", "order_by": "-execution_date", "limit": 1}),
+            return_exceptions=True,
+        )
+        if isinstance(runs, BaseException):
+            dag_run = runs
+        elif not runs.get("dag_runs"):
+            return {
+                "dag_id": dag_id,
+                "dag_run_id": None,
+                "failed_tasks": [],
+                "source_snippets": [],
+                "errors": [f"No failed DAG runs found for {dag_id}"],
+            }
+        else:
+            dag_run = runs["dag_runs"][0]
+            dag_run_id = dag_run["dag_run_id"]
+
+    if isinstance(dag_run, BaseException):
+        raise dag_run
+    if isinstance(dag, BaseException):
+        errors.append(f"dag: {dag}")
+        dag = {}
+
+    # Each task diagnosis is streamed as soon as it is ready, the result keeps the original order
+    stream = ProgressStream("diagnose_failed_run")
+
+    # Task instances and source only depend on the run and the DAG, fetch them together. Every
+    # page of task instances is read, failed states are filtered here
+    file_token = dag.get("file_token")
+    task_instances, source = await asyncio.gather(
+        stream.paginate(
+            airflow_instances.get(instance), f"{runs_endpoint}/{dag_run_id}/taskInstances", "task_instances",
+            partial_results=False,
+        ),
+        _fetch(instance, f"dagSources/{file_token}") if file_token else asyncio.sleep(0, result=None),
+        return_exceptions=True,
+    )
+    if isinstance(task_instances, BaseException):
+        raise task_instances
+    if isinstance(source, BaseException):
+        errors.append(f"source: {source}")
+        source = None
+
+    failed = [
+        ti for ti in task_instances.get("task_instances", [])
+        if ti.get("state") in FAILED_TASK_STATES
+    ]
+    # Only tasks that failed on their own are inspected, not those that failed because of an upstream
+    inspected = [ti for ti in failed if ti.get("state") != "upstream_failed"][:max_tasks]
+
+    diagnosed = 0
+
+    async def diagnose(ti: Dict[str, Any]) -> Dict[str, Any]:
+        nonlocal diagnosed
+        diagnosis = await _diagnose_task(dag_id, dag_run_id, ti, log_context_lines, instance)
+        diagnosed += 1
+        await stream.partial({"failed_task": diagnosis})
+        map_index = ti.get("map_index")
+        mapped = f"[{map_index}]" if map_index is not None and map_index >= 0 else ""
+        await stream.progress(diagnosed, len(inspected), f"Diagnosed {diagnosis['task_id']}{mapped}")
+        return diagnosis
+
+    failed_tasks = await asyncio.gather(*[diagnose(ti) for ti in inspected])
+
+    source_snippets: List[Dict[str, Any]] = []
+    if source:
+        content = source.get("content", "") if isinstance(source, dict) else str(source)
+        source_snippets = _extract_source_snippet(
+            # Mapped instances of a task share its declaration
+            content, list(dict.fromkeys(t["task_id"] for t in failed_tasks)), source_context_lines
+        )
+
+    return {
+        "dag_id": dag_id,
+        "dag_run_id": dag_run_id,
+        "dag_run": {
+            key: dag_run.get(key)
+            for key in ("state", "run_type", "execution_date", "start_date", "end_date", "conf", "note")
+        },
+        "dag": {
+            key: dag.get(key)
+            for key in ("is_paused", "is_active", "owners", "timetable_description", "fileloc")
+        },
+        "failed_tasks": failed_tasks,
+        "upstream_failed_task_ids": list(dict.fromkeys(
+            ti["task_id"] for ti in failed if ti.get("state") == "upstream_failed"
+        )),
+        "source_snippets": source_snippets,
+        "errors": errors,
+    }
@@ -0,0 +1,259 @@
+import asyncio
+import hashlib
+import os
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from clients import airflow_instances, shared_store
+from credentials import current_identity
+from http_utils import HTTPUtils
+from schema import load_schema
+from tools.progress import ProgressStream
+
+
+# ============================================================================
+# Import Errors Schema
+# ============================================================================
+
+IMPORT_ERRORS_SCHEMA = load_schema("monitor/import_errors")
+
+# Seconds a scan is reused before the import errors are fetched again
+SCAN_TTL = float(os.getenv("MCP_IMPORT_ERRORS_TTL", "30"))
+# Scans kept, one per instance and caller identity
+MAX_SCANS = 16
+# Lines kept from the end of a signature's sample trace
+SAMPLE_TRACE_LINES = 12
+ADDRESS_PATTERN = re.compile(r"0x[0-9a-fA-F]+")
+# Shared-store namespace of when each file's trace was first seen, kept across workers and restarts
+FIRST_SEEN_NAMESPACE = "import_error_first_seen"
+FIRST_SEEN_TTL = 30 * 86400
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo is not None else parsed.replace(tzinfo=timezone.utc)
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+
+
+def _error_line(trace: str) -> str:
+    """The exception line of a trace, e.g. ModuleNotFoundError: No module named 'foo'."""
+    lines = [line.strip() for line in trace.strip().splitlines() if line.strip()]
+    return lines[-1] if lines else ""
+
+
+def _signature(filename: str, trace: str) -> str:
+    """
+    The trace with everything specific to the failing file masked: its path, the line numbers
+    of its frames and object addresses. Files failing for the same reason share a signature.
+    """
+    masked = ADDRESS_PATTERN.sub("0x?", trace.strip())
+    if filename:
+        masked = re.sub(re.escape(filename) + r'(", line )\d+', r"<dag file>\g<1>?", masked)
+        masked = masked.replace(filename, "<dag file>")
+    return masked
+
+
+class ImportErrorScan:
+    """
+    Import errors of one Airflow instance, grouped by file and by signature.
+
+    Airflow re-creates a failing file's import error on every parse, so its timestamp moves
+    even when nothing changed. The scan therefore remembers, per file, a fingerprint of the
+    trace and when that trace was first seen: a file is only new or changed since a point in
+    time when its trace first appeared after it. With a shared store the first-seen times are
+    kept there, keyed on the instance, file and fingerprint, so every worker and a restarted
+    server agree on them. Without one they only cover the lifetime of this process.
+
+    Args:
+        instance: Name of the Airflow instance the scan belongs to
+        shared: Store for first-seen times shared by worker processes (optional)
+    """
+
+    def __init__(self, instance: str, shared: Optional[Any] = None):
+        self.instance = instance
+        self.shared = shared
+        self.errors: List[Dict[str, Any]] = []
+        self.scanned_at: Optional[float] = None
+        self.scanned_on: Optional[str] = None
+        # filename -> (trace fingerprint, first seen)
+        self.first_seen: Dict[str, Tuple[str, str]] = {}
+        self._lock = asyncio.Lock()
+
+    def _shared_key(self, filename: str, fingerprint: str) -> str:
+        return _digest(f"{self.instance}\0{filename}\0{fingerprint}")
+
+    def _sync_first_seen(self, seen: Dict[str, Tuple[str, str]], gone: Dict[str, Tuple[str, str]]) -> Dict[str, Tuple[str, str]]:
+        """
+        Replace the first-seen times of traces new to this process with those in the shared
+        store, recording the ones no worker has seen yet, and forget the traces that are gone.
+        """
+        for filename, (fingerprint, timestamp) in list(seen.items()):
+            key = self._shared_key(filename, fingerprint)
+            stored = self.shared.get(FIRST_SEEN_NAMESPACE, key)
+            if stored is not None:
+                seen[filename] = (fingerprint, stored.decode("utf-8"))
+            else:
+                self.shared.set(FIRST_SEEN_NAMESPACE, key, timestamp.encode("utf-8"), FIRST_SEEN_TTL)
+        for filename, (fingerprint, _) in gone.items():
+            self.shared.delete(FIRST_SEEN_NAMESPACE, self._shared_key(filename, fingerprint))
+        return seen
+
+    def stale(self, ttl: float = SCAN_TTL) -> bool:
+        return self.scanned_at is None or time.monotonic() - self.scanned_at > ttl
+
+    async def refresh(self, client: HTTPUtils, stream: ProgressStream, force: bool = False) -> bool:
+        """Fetch the import errors again when stale; returns whether the cached scan was used."""
+        async with self._lock:
+            if not force and not self.stale():
+                return True
+            listing = await stream.paginate(client, "importErrors", "import_errors", partial_results=False)
+            # Several errors for one file only happen while Airflow replaces them, keep the latest
+            latest: Dict[str, Dict[str, Any]] = {}
+            for error in listing.get("import_errors", []):
+                filename = error.get("filename") or ""
+                if filename not in latest or str(error.get("timestamp") or "") > str(latest[filename].get("timestamp") or ""):
+                    latest[filename] = error
+
+            first_seen: Dict[str, Tuple[str, str]] = {}
+            unseen: Dict[str, Tuple[str, str]] = {}
+            for filename, error in latest.items():
+                fingerprint = _digest((error.get("stack_trace") or "").strip())
+                previous = self.first_seen.get(filename)
+                if previous is not None and previous[0] == fingerprint:
+                    first_seen[filename] = previous
+                else:
+                    unseen[filename] = (fingerprint, str(error.get("timestamp") or ""))
+            # Traces that changed or whose file parses again are forgotten, so a recurrence counts as new
+            gone = {filename: entry for filename, entry in self.first_seen.items() if first_seen.get(filename) != entry}
+            if self.shared is not None and (unseen or gone):
+                unseen = await asyncio.to_thread(self._sync_first_seen, unseen, gone)
+            first_seen.update(unseen)
+
+            errors = []
+            for filename, error in latest.items():
+                trace = error.get("stack_trace") or ""
+                fingerprint, seen = first_seen[filename]
+                timestamp = str(error.get("timestamp") or "")
+                signature = _signature(filename, trace)
+                errors.append({
+                    "filename": filename,
+                    "import_error_id": error.get("import_error_id"),
+                    "timestamp": timestamp,
+                    "first_seen": seen,
+                    "fingerprint": fingerprint,
+                    "signature_id": _digest(signature),
+                    "signature": signature,
+                    "error": _error_line(trace),
+                })
+            errors.sort(key=lambda item: (item["first_seen"], item["filename"]), reverse=True)
+            self.first_seen = first_seen
+            self.errors = errors
+            self.scanned_at = time.monotonic()
+            self.scanned_on = datetime.now(timezone.utc).isoformat()
+            return False
+
+
+_scans: "OrderedDict[Tuple[str, str], ImportErrorScan]" = OrderedDict()
+
+
+def get_scan(instance: Optional[str]) -> ImportErrorScan:
+    name = instance or airflow_instances.default
+    key = (name, current_identity())
+    scan = _scans.get(key)
+    if scan is None:
+        scan = _scans[key] = ImportErrorScan(name, shared_store)
+        while len(_scans) > MAX_SCANS:
+            _scans.popitem(last=False)
+    _scans.move_to_end(key)
+    return scan
+
+
+async def scan_import_errors_tool(
+    since: Optional[str] = None,
+    filename_contains: Optional[str] = None,
+    limit: int = 50,
+    offset: int = 0,
+    files_per_signature: int = 5,
+    refresh: bool = False,
+    instance: Optional[str] = None
+) -> dict:
+    """
+    Summarize the DAG files that currently fail to import, in one call.
+
+    Fetches every import error, keeps the latest per file and groups files failing with the
+    same trace (paths, line numbers and addresses of the failing file masked) into signatures,
+    so a storm of hundreds of broken files reads as a handful of causes, each with one sample
+    trace. The scan is cached for MCP_IMPORT_ERRORS_TTL seconds.
+
+    Args:
+        since: ISO timestamp; only return files whose error is new or whose trace changed after it.
+               Errors Airflow merely re-recorded on a later parse are not counted as changed.
+               First-seen times are shared across workers and restarts when MCP_SHARED_CACHE_URL is set,
+               otherwise they start with this server process.
+        filename_contains: Only return files whose path contains this text
+        limit: Maximum number of files to return (default: 50)
+        offset: Number of files to skip, for paging through the file list (default: 0)
+        files_per_signature: Example files listed per signature (default: 5)
+        refresh: Fetch the import errors again instead of using a recent scan
+        instance: Name of the Airflow instance to query (default: the default instance)
+
+    Returns:
+        JSON response with the following fields:
+          - total_files: Number of matching files with import errors
+          - signatures: Distinct failure causes, most files first, each with its error line,
+            file count, example files, first/last seen and one sample trace
+          - files: One page of matching files, newest first, with filename, error line,
+            timestamp, first_seen and signature_id
+          - scanned_at, cached: When the errors were fetched and whether the scan was reused
+    """
+    since_at = _parse_timestamp(since)
+    client = airflow_instances.get(instance)
+    scan = get_scan(instance)
+    cached = await scan.refresh(client, ProgressStream("scan_import_errors"), force=refresh)
+
+    errors = scan.errors
+    if since_at is not None:
+        errors = [error for error in errors if (_parse_timestamp(error["first_seen"]) or since_at) > since_at]
+    if filename_contains:
+        errors = [error for error in errors if filename_contains in error["filename"]]
+
+    signatures: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+    for error in errors:
+        group = signatures.get(error["signature_id"])
+        if group is None:
+            group = signatures[error["signature_id"]] = {
+                "signature_id": error["signature_id"],
+                "error": error["error"],
+                "file_count": 0,
+                "files": [],
+                "first_seen": error["first_seen"],
+                "last_seen": error["timestamp"],
+                "sample_trace": "\n".join(error["signature"].splitlines()[-SAMPLE_TRACE_LINES:]),
+            }
+        group["file_count"] += 1
+        if len(group["files"]) < files_per_signature:
+            group["files"].append(error["filename"])
+        group["first_seen"] = min(group["first_seen"], error["first_seen"])
+        group["last_seen"] = max(group["last_seen"], error["timestamp"])
+
+    page = errors[offset:offset + limit]
+    return {
+        "total_files": len(errors),
+        "signatures": sorted(signatures.values(), key=lambda group: group["file_count"], reverse=True),
+        "files": [
+            {key: error[key] for key in ("filename", "error", "timestamp", "first_seen", "signature_id", "import_error_id")}
+            for error in page
+        ],
+        "offset": offset,
+        "limit": limit,
+        "scanned_at": scan.scanned_on,
+        "cached": cached,
+    }
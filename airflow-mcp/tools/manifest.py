@@ -0,0 +1,77 @@
+"""
+Tool manifest: the name, description and input/output schemas of every tool, rendered ahead
+of time so the server can list its tools without importing the tool modules.
+
+Regenerate after changing a tool, a schema or the tool defaults:
+    python -m tools.manifest
+"""
+import glob
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MANIFEST_PATH = os.path.join(BASE_DIR, "tools", "manifest.json")
+# Settings that appear in rendered parameter descriptions
+RENDERED_SETTINGS = ("MCP_TOOL_TIMEOUT", "MCP_TOOL_MAX_BYTES")
+
+
+def _source_files() -> List[str]:
+    return sorted(
+        glob.glob(os.path.join(BASE_DIR, "tools", "*.py"))
+        + glob.glob(os.path.join(BASE_DIR, "schema", "**", "*.json"), recursive=True)
+    )
+
+
+def source_hash() -> str:
+    """Hash of the tool modules, the schemas and the rendered settings a manifest was built from."""
+    digest = hashlib.sha256()
+    for path in _source_files():
+        digest.update(os.path.relpath(path, BASE_DIR).replace(os.sep, "/").encode("utf-8"))
+        with open(path, "rb") as f:
+            # Line endings depend on the checkout, not on the tool
+            digest.update(f.read().replace(b"\r\n", b"\n"))
+    for name in RENDERED_SETTINGS:
+        digest.update(f"{name}={os.getenv(name, '')}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def load_manifest(path: str = MANIFEST_PATH) -> Optional[Dict[str, Dict[str, Any]]]:
+    """Manifest entries by tool name, or None when the manifest is missing or out of date."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("source_hash") != source_hash():
+        return None
+    return {entry["name"]: entry for entry in manifest.get("tools", [])}
+
+
+def build_manifest() -> Dict[str, Any]:
+    """Import every tool and render its metadata as registered."""
+    from tools.registry import build_tool, get_all_tool_specs
+
+    tools = []
+    for spec in get_all_tool_specs():
+        tool = build_tool(spec)
+        tools.append({
+            "name": tool.name,
+            "description": tool.description,
+            "parameters": tool.parameters,
+            "output_schema": tool.output_schema,
+        })
+    return {"source_hash": source_hash(), "tools": tools}
+
+
+def write_manifest(path: str = MANIFEST_PATH) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(build_manifest(), f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+if __name__ == "__main__":
+    write_manifest()
+    print(f"Wrote {MANIFEST_PATH}")
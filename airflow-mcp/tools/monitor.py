@@ -1,20 +1,24 @@
-from typing import Dict, Any
-from schema import load_schema, http_utils
+from typing import Dict, Any, Optional
+from clients import airflow_instances
+from schema import load_schema
 
 
 HEALTH_SCHEMA = load_schema("monitor/health")
 
 
-async def get_health() -> Dict[str, Any]:
+async def get_health(instance: Optional[str] = None) -> Dict[str, Any]:
     """
     Fetch Airflow health information from /health. 
     Get the status of Airflow's metadatabase, triggerer and scheduler. It includes info about metadatabase and last heartbeat of scheduler and triggerer.
     Use this tool to check the health and status of Airflow components.
+
+    Args:
+        instance: Name of the Airflow instance to query (default: the default instance)
     Returns:
         JSON response containing Airflow health information
     """
     endpoint = "health"
-    response = http_utils.get_json_response(endpoint)
+    response = await airflow_instances.get_json(instance, endpoint)
     return response
 
 
@@ -0,0 +1,158 @@
+import asyncio
+import codecs
+import os
+from typing import Any, Dict, List, Optional
+
+from http_utils import HTTPUtils
+from metrics import metrics
+
+
+# Logger name of the log notifications that carry partial results
+PARTIAL_RESULT_LOGGER = "partial_result"
+PAGE_SIZE = 100
+PAGINATION_MAX_ITEMS = int(os.getenv("MCP_PAGINATION_MAX_ITEMS", "5000"))
+PAGINATION_CONCURRENCY = int(os.getenv("MCP_PAGINATION_CONCURRENCY", "4"))
+
+
+def _current_context() -> Optional[Any]:
+    from fastmcp.server.dependencies import get_context
+
+    try:
+        return get_context()
+    except RuntimeError:
+        return None
+
+
+class ProgressStream:
+    """
+    Progress notifications and partial results for one long-running tool call.
+
+    Streaming is only enabled when the client asked for progress by sending a progressToken,
+    so clients that do not listen get no extra traffic. Progress goes out as MCP progress
+    notifications. Partial results go out as log notifications on the "partial_result" logger
+    whose data carries the tool name, a sequence number and the chunk, in the order they were
+    produced: log text as it downloads, pages as they arrive. They give listening clients an
+    early view; the final result still holds the whole response and is the same whether or
+    not progress was requested.
+
+    Args:
+        tool: Name of the tool, included with every partial result
+    """
+
+    def __init__(self, tool: str):
+        self.tool = tool
+        self._context = _current_context()
+        meta = self._context.request_context.meta if self._context is not None else None
+        self.enabled = meta is not None and meta.progressToken is not None
+        self._sequence = 0
+
+    async def progress(self, progress: float, total: Optional[float] = None, message: Optional[str] = None) -> None:
+        if not self.enabled:
+            return
+        try:
+            await self._context.report_progress(progress, total, message)
+        except Exception:
+            # A client that went away should not fail the call, stop streaming to it
+            self.enabled = False
+
+    async def partial(self, chunk: Dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        try:
+            await self._context.log(
+                f"{self.tool} partial result {self._sequence}",
+                level="info",
+                logger_name=PARTIAL_RESULT_LOGGER,
+                extra={"tool": self.tool, "sequence": self._sequence, "chunk": chunk},
+            )
+        except Exception:
+            self.enabled = False
+            return
+        self._sequence += 1
+        metrics.inc("mcp_partial_results_total", tool=self.tool)
+
+    async def fetch_json(self, client: HTTPUtils, endpoint: str, **kwargs) -> Any:
+        """
+        GET a JSON response like client.aget_json_response(), forwarding the body as partial
+        results while it downloads, each chunk with the byte offset it starts at, and reporting
+        the bytes received as progress. Joined in order, the chunks' text is the JSON body.
+        Chunks are forwarded from the event loop, the download itself runs in a worker thread.
+        """
+        if not self.enabled:
+            return await client.aget_json_response(endpoint, **kwargs)
+
+        loop = asyncio.get_running_loop()
+        chunks: "asyncio.Queue[bytes]" = asyncio.Queue()
+        download = asyncio.ensure_future(asyncio.to_thread(
+            client.get_json_response,
+            endpoint,
+            on_chunk=lambda chunk: loop.call_soon_threadsafe(chunks.put_nowait, chunk),
+            **kwargs,
+        ))
+        # A multi-byte character may be split across chunks
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        received = 0
+        try:
+            while True:
+                next_chunk = asyncio.ensure_future(chunks.get())
+                done, _ = await asyncio.wait({next_chunk, download}, return_when=asyncio.FIRST_COMPLETED)
+                if next_chunk not in done:
+                    next_chunk.cancel()
+                    break
+                # Chunks that arrived meanwhile are forwarded together
+                data = [next_chunk.result()]
+                while not chunks.empty():
+                    data.append(chunks.get_nowait())
+                body = b"".join(data)
+                await self.partial({"offset": received, "text": decoder.decode(body)})
+                received += len(body)
+                await self.progress(received, message=f"Received {received} bytes")
+        finally:
+            if not download.done():
+                download.cancel()
+        return download.result()
+
+    async def paginate(
+        self,
+        client: HTTPUtils,
+        endpoint: str,
+        items_key: str,
+        params: Optional[Dict[str, Any]] = None,
+        max_items: int = PAGINATION_MAX_ITEMS,
+        partial_results: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Fetch every page of a collection, up to max_items, and merge them in order.
+
+        The first page gives total_entries, the remaining pages are fetched concurrently.
+        Each page is forwarded as a partial result with its offset as soon as it arrives, so
+        pages may arrive out of order, and the number of items fetched so far is reported as
+        progress. Tools that only scan the collection to compute their result pass
+        partial_results=False.
+        """
+        params = {key: value for key, value in (params or {}).items() if key not in ("limit", "offset")}
+        first = await client.aget_json_response(endpoint, params={**params, "limit": PAGE_SIZE, "offset": 0})
+        total = min(first.get("total_entries", 0), max_items)
+        pages: Dict[int, List[Any]] = {0: first.get(items_key, [])}
+        fetched = len(pages[0])
+        if partial_results:
+            await self.partial({"offset": 0, items_key: pages[0]})
+        await self.progress(fetched, total, f"Fetched {fetched} of {total} {items_key}")
+
+        semaphore = asyncio.Semaphore(PAGINATION_CONCURRENCY)
+
+        async def fetch_page(offset: int) -> None:
+            nonlocal fetched
+            async with semaphore:
+                page = await client.aget_json_response(
+                    endpoint, params={**params, "limit": min(PAGE_SIZE, total - offset), "offset": offset}
+                )
+            pages[offset] = page.get(items_key, [])
+            fetched += len(pages[offset])
+            if partial_results:
+                await self.partial({"offset": offset, items_key: pages[offset]})
+            await self.progress(fetched, total, f"Fetched {fetched} of {total} {items_key}")
+
+        await asyncio.gather(*[fetch_page(offset) for offset in range(PAGE_SIZE, total, PAGE_SIZE)])
+        items = [item for offset in sorted(pages) for item in pages[offset]][:max_items]
+        return {items_key: items, "total_entries": first.get("total_entries", len(items))}
@@ -1,39 +1,39 @@
-from typing import Callable, Dict, Any, List, TypedDict
-
-# Import tool handlers and schemas from modules
-from tools.dag import (
-    DAG_COLLECTION_SCHEMA,
-    DAG_SCHEMA,
-    DAG_RUN_COLLECTION_SCHEMA,
-    DAG_SOURCE_SCHEMA,
-    get_dags_tool,
-    get_dag_tool,
-    get_dag_runs_tool,
-    get_dag_source_tool,
-)
-from tools.monitor import (
-    HEALTH_SCHEMA,
-    get_health,
-)
-from tools.task_instance import (
-    TASK_INSTANCE_COLLECTION_SCHEMA,
-    TASK_INSTANCE_SCHEMA,
-    TASK_INSTANCE_TRIES_SCHEMA,
-    TASK_INSTANCE_TRY_DETAILS_SCHEMA,
-    TASK_INSTANCE_LOG_SCHEMA,
-    list_task_instances_tool,
-    get_task_instance_tool,
-    get_task_instance_tries_tool,
-    get_task_instance_try_details_tool,
-    get_task_instance_log_tool,
+import importlib
+import logging
+from typing import Any, Dict, List, Optional, TypedDict
+
+from fastmcp.tools.tool import FunctionTool, Tool, ToolResult
+from pydantic import PrivateAttr
+
+import json_codec
+from tools.deadline import DEFAULT_TIMEOUT, with_deadline
+from tools.manifest import load_manifest
+
+
+logger = logging.getLogger(__name__)
+
+# Tools that already bound their own output and are registered without a byte/token budget
+UNBUDGETED_TOOLS = {"get_truncated_output", "get_data_version"}
+# Tools that fan out over many requests get a longer default deadline
+TOOL_TIMEOUTS = {
+    "diagnose_failed_run": DEFAULT_TIMEOUT * 2,
+    "get_task_instance_log": DEFAULT_TIMEOUT * 2,
+    "get_dag_dependencies": DEFAULT_TIMEOUT * 2,
+}
+BUDGET_DESCRIPTION = (
+    " Accepts max_bytes/max_tokens to bound the response size; oversized responses keep errors,"
+    " summarize dropped items, elide the middle of long strings and carry a `truncation` marker"
+    " with a cursor for get_truncated_output."
 )
 
 
 class ToolSpec(TypedDict):
     name: str
     description: str
-    output_schema: Dict[str, Any]
-    handler: Callable[..., Any]
+    # Schema name for load_schema(), e.g. "dag/dag_run_collection"
+    output_schema: str
+    # Handler as "module:function", imported the first time the tool is called
+    handler: str
 
 
 def get_all_tool_specs() -> List[ToolSpec]:
@@ -41,72 +41,168 @@ def get_all_tool_specs() -> List[ToolSpec]:
         {
             "name": "get_dags",
             "description": "Get all DAGs with optional filtering and pagination.",
-            "output_schema": DAG_COLLECTION_SCHEMA,
-            "handler": get_dags_tool,
+            "output_schema": "dag/dag_collection",
+            "handler": "tools.dag:get_dags_tool",
         },
         {
             "name": "get_dag",
             "description": "Get a specific DAG by its dag_id.",
-            "output_schema": DAG_SCHEMA,
-            "handler": get_dag_tool,
+            "output_schema": "dag/dag",
+            "handler": "tools.dag:get_dag_tool",
         },
         {
             "name": "get_dag_runs",
             "description": "Get DAG runs for a specific DAG or all DAGs. Use '~' as dag_id to retrieve runs for all DAGs.",
-            "output_schema": DAG_RUN_COLLECTION_SCHEMA,
-            "handler": get_dag_runs_tool,
+            "output_schema": "dag/dag_run_collection",
+            "handler": "tools.dag:get_dag_runs_tool",
+        },
+        {
+            "name": "get_dag_run",
+            "description": "Get a specific DAG run by its dag_run_id: its state, dates, conf and note.",
+            "output_schema": "dag/dag_run",
+            "handler": "tools.dag:get_dag_run_tool",
         },
         {
             "name": "get_dag_source",
             "description": "Get the source code of a DAG using its file token. The file_token is obtained from get_dag_details response file_token attribute.",
-            "output_schema": DAG_SOURCE_SCHEMA,
-            "handler": get_dag_source_tool,
+            "output_schema": "dag/dag_source",
+            "handler": "tools.dag:get_dag_source_tool",
+        },
+        {
+            "name": "analyze_dag",
+            "description": "Summarize a DAG file without reading its source: DAG ids, schedules, tasks with their operators, and task dependencies, extracted by parsing the file on the server (tasks created in loops, task groups, dynamic mapping and TaskFlow included). Pass a dag_id or a file_token. Use this to explain what a DAG does or how its tasks are wired; use get_dag_source only when the actual code is needed.",
+            "output_schema": "dag/dag_analysis",
+            "handler": "tools.dag_analysis:analyze_dag_tool",
+        },
+        {
+            "name": "get_dag_dependencies",
+            "description": "Find the DAGs downstream (affected if this DAG fails or is late) or upstream (what this DAG depends on) of a DAG across the deployment, linked by datasets, TriggerDagRunOperator, ExternalTaskSensor and ExternalTaskMarker, plus the pools it shares with other DAGs. Answers from an in-memory index of every DAG file, refreshed incrementally.",
+            "output_schema": "dag/dag_dependencies",
+            "handler": "tools.dependency_index:get_dag_dependencies_tool",
         },
         {
             "name": "get_health",
             "description": "Get Airflow health (metadatabase, scheduler, triggerer, version) from /health. This will be called to check airflow health, status of components",
-            "output_schema": HEALTH_SCHEMA,
-            "handler": get_health,
+            "output_schema": "monitor/health",
+            "handler": "tools.monitor:get_health",
+        },
+        {
+            "name": "get_data_version",
+            "description": "Get a version fingerprint of the Airflow state (recent DAG runs, failed and retrying task instances, DAGs, import errors). It changes whenever that state changes; use it to tell whether a cached answer is still current.",
+            "output_schema": "monitor/data_version",
+            "handler": "tools.data_version:get_data_version",
+        },
+        {
+            "name": "scan_import_errors",
+            "description": "Diagnose DAG import errors: list the DAG files that fail to parse, grouped by failure signature so a storm of hundreds of broken files reads as a few causes with one sample trace each. Filter to errors new or changed since a timestamp, or by file path; page through the files with limit/offset.",
+            "output_schema": "monitor/import_errors",
+            "handler": "tools.import_errors:scan_import_errors_tool",
         },
         {
             "name": "list_task_instances",
             "description": "List all task instances for a specific DAG run. Use this to monitor task status, analyze performance, debug failures, and get detailed execution information within a DAG run.",
-            "output_schema": TASK_INSTANCE_COLLECTION_SCHEMA,
-            "handler": list_task_instances_tool,
+            "output_schema": "dag/task_instance_collection",
+            "handler": "tools.task_instance:list_task_instances_tool",
         },
         {
             "name": "get_task_instance",
             "description": "Get details of a specific task instance. Use this to debug individual tasks, analyze execution details, check status and configuration of a single task within a DAG run.",
-            "output_schema": TASK_INSTANCE_SCHEMA,
-            "handler": get_task_instance_tool,
+            "output_schema": "dag/task_instance",
+            "handler": "tools.task_instance:get_task_instance_tool",
         },
         {
             "name": "get_task_instance_tries",
             "description": "Get all tries for a specific task instance. Use this to analyze retry history, debug repeated failures, monitor execution attempts, and get detailed information about each retry attempt.",
-            "output_schema": TASK_INSTANCE_TRIES_SCHEMA,
-            "handler": get_task_instance_tries_tool,
+            "output_schema": "dag/task_instance_tries",
+            "handler": "tools.task_instance:get_task_instance_tries_tool",
         },
         {
             "name": "get_task_instance_try_details",
             "description": "Get detailed information about a specific try of a task instance. Use this to debug particular executions, analyze configuration, get logs, and investigate exact conditions of a specific attempt.",
-            "output_schema": TASK_INSTANCE_TRY_DETAILS_SCHEMA,
-            "handler": get_task_instance_try_details_tool,
+            "output_schema": "dag/task_instance_try_details",
+            "handler": "tools.task_instance:get_task_instance_try_details_tool",
         },
         {
             "name": "get_task_instance_log",
             "description": "Get logs for a specific task instance try. Use this to debug task failures, monitor execution progress, analyze error messages, and review task output and debugging information.",
-            "output_schema": TASK_INSTANCE_LOG_SCHEMA,
-            "handler": get_task_instance_log_tool,
+            "output_schema": "dag/task_instance_log",
+            "handler": "tools.task_instance:get_task_instance_log_tool",
+        },
+        {
+            "name": "diagnose_failed_run",
+            "description": "Diagnose a failed DAG run in one call. Concurrently fetches the run, failed task instances, their retry history, error windows from their logs and the source lines declaring them, and returns a compact bundle. Omit dag_run_id to diagnose the most recent failed run.",
+            "output_schema": "dag/failed_run_diagnosis",
+            "handler": "tools.diagnose:diagnose_failed_run_tool",
+        },
+        {
+            "name": "get_truncated_output",
+            "description": "Read the full JSON of a truncated tool response in chunks, using the cursor from its `truncation` marker.",
+            "output_schema": "commons/truncated_output",
+            "handler": "tools.truncation:get_truncated_output_tool",
         },
     ]
 
 
-def register_all(mcp) -> None:
-    for spec in get_all_tool_specs():
-        mcp.tool(
-            name=spec["name"],
-            description=spec["description"],
-            output_schema=spec["output_schema"],
-        )(spec["handler"]) 
+def build_tool(spec: ToolSpec) -> FunctionTool:
+    """
+    Import a tool's handler, load its output schema and wrap it with a deadline and, unless
+    it bounds its own output, a response budget.
+    """
+    from schema import load_schema
+    from tools.truncation import with_output_budget, with_truncation_marker
+
+    module_name, function_name = spec["handler"].split(":")
+    handler = getattr(importlib.import_module(module_name), function_name)
+    handler = with_deadline(handler, spec["name"], TOOL_TIMEOUTS.get(spec["name"], DEFAULT_TIMEOUT))
+    description = spec["description"]
+    output_schema = load_schema(spec["output_schema"])
+    if spec["name"] not in UNBUDGETED_TOOLS:
+        handler = with_output_budget(handler)
+        description += BUDGET_DESCRIPTION
+        output_schema = with_truncation_marker(output_schema)
+    return FunctionTool.from_function(
+        handler,
+        name=spec["name"],
+        description=description,
+        output_schema=output_schema,
+        serializer=json_codec.dumps,
+    )
 
 
+class LazyTool(Tool):
+    """
+    Tool registered from its manifest entry. Listing it needs only the name, description and
+    schemas recorded in the manifest; the handler module, and the Airflow clients it uses, are
+    imported when the tool is first called.
+    """
+
+    spec: Dict[str, Any]
+    _tool: Optional[FunctionTool] = PrivateAttr(default=None)
+
+    def resolve(self) -> FunctionTool:
+        if self._tool is None:
+            self._tool = build_tool(self.spec)
+        return self._tool
+
+    async def run(self, arguments: Dict[str, Any]) -> ToolResult:
+        return await self.resolve().run(arguments)
+
+
+def register_all(mcp) -> None:
+    specs = get_all_tool_specs()
+    manifest = load_manifest()
+    if manifest is None:
+        logger.warning("Tool manifest is missing or stale, importing all tools (run: python -m tools.manifest)")
+    for spec in specs:
+        entry = manifest.get(spec["name"]) if manifest is not None else None
+        if entry is None:
+            mcp.add_tool(build_tool(spec))
+            continue
+        mcp.add_tool(LazyTool(
+            name=spec["name"],
+            description=entry["description"],
+            parameters=entry["parameters"],
+            output_schema=entry["output_schema"],
+            serializer=json_codec.dumps,
+            spec=dict(spec),
+        ))
@@ -1,5 +1,8 @@
 from typing import Optional, List, Dict, Union
-from schema import load_schema, http_utils
+from instances import ALL_INSTANCES
+from clients import airflow_instances
+from schema import load_schema
+from tools.progress import ProgressStream
 
 
 # ============================================================================
@@ -50,7 +53,9 @@ async def list_task_instances_tool(
     pool: Optional[List[str]] = None,
     queue: Optional[List[str]] = None,
     order_by: Optional[str] = None,
-    fields: Optional[List[str]] = None
+    fields: Optional[List[str]] = None,
+    fetch_all: bool = False,
+    instance: Optional[str] = None
 ) -> str:
     """
     List all task instances for a specific DAG run.
@@ -85,6 +90,10 @@ async def list_task_instances_tool(
         queue: Filter by queue name(s)
         order_by: The name of the field to order the results by. Prefix a field name with '-' to reverse the sort order
         fields: List of fields to return in the response
+        fetch_all: Page through every matching task instance instead of one page, ignoring limit and offset
+                   (default: False). Progress is reported as the pages arrive.
+        instance: Name of the Airflow instance to query (default: the default instance).
+                  Use "all" to query every instance concurrently and merge the results
     
     Returns:
         JSON response containing a paginated list of task instances with their detailed information.
@@ -129,7 +138,13 @@ async def list_task_instances_tool(
     if fields: params["fields"] = ",".join(fields)
     
     # Make the request
-    response = http_utils.get_json_response(endpoint, params=params)
+    if fetch_all:
+        if instance == ALL_INSTANCES:
+            raise ValueError("fetch_all pages through a single instance; choose one instead of 'all'")
+        return await ProgressStream("list_task_instances").paginate(
+            airflow_instances.get(instance), endpoint, "task_instances", params=params
+        )
+    response = await airflow_instances.collect(instance, endpoint, "task_instances", params=params)
     return response
 
 
@@ -137,7 +152,8 @@ async def get_task_instance_tool(
     dag_id: str,
     dag_run_id: str,
     task_id: str,
-    fields: Optional[List[str]] = None
+    fields: Optional[List[str]] = None,
+    instance: Optional[str] = None
 ) -> dict:
     """
     Get details of a specific task instance.
@@ -158,6 +174,7 @@ async def get_task_instance_tool(
         dag_run_id: The DAG run ID that contains the task instance (required)
         task_id: The task ID of the specific task instance to retrieve (required)
         fields: Optional list of fields to return in the response
+        instance: Name of the Airflow instance to query (default: the default instance)
     
     Returns:
         JSON response containing detailed information about the specified task instance.
@@ -190,7 +207,7 @@ async def get_task_instance_tool(
     if fields: params["fields"] = ",".join(fields)
     
     # Make the request
-    response = http_utils.get_json_response(endpoint, params=params)
+    response = await airflow_instances.get_json(instance, endpoint, params=params)
     return response
 
 
@@ -198,7 +215,8 @@ async def get_task_instance_tries_tool(
     dag_id: str,
     dag_run_id: str,
     task_id: str,
-    fields: Optional[List[str]] = None
+    fields: Optional[List[str]] = None,
+    instance: Optional[str] = None
 ) -> str:
     """
     Get all tries for a specific task instance.
@@ -220,6 +238,7 @@ async def get_task_instance_tries_tool(
         dag_run_id: The DAG run ID that contains the task instance (required)
         task_id: The task ID of the specific task instance to retrieve tries for (required)
         fields: Optional list of fields to return in the response
+        instance: Name of the Airflow instance to query (default: the default instance)
     
     Returns:
         JSON response containing a list of all tries for the specified task instance.
@@ -247,7 +266,7 @@ async def get_task_instance_tries_tool(
     if fields: params["fields"] = ",".join(fields)
     
     # Make the request
-    response = http_utils.get_json_response(endpoint, params=params)
+    response = await airflow_instances.get_json(instance, endpoint, params=params)
     return response
 
 
@@ -256,7 +275,8 @@ async def get_task_instance_try_details_tool(
     dag_run_id: str,
     task_id: str,
     try_number: int,
-    fields: Optional[List[str]] = None
+    fields: Optional[List[str]] = None,
+    instance: Optional[str] = None
 ) -> dict:
     """
     Get detailed information about a specific try of a task instance.
@@ -279,6 +299,7 @@ async def get_task_instance_try_details_tool(
         task_id: The task ID of the specific task instance (required)
         try_number: The specific try number to get details for (required)
         fields: Optional list of fields to return in the response
+        instance: Name of the Airflow instance to query (default: the default instance)
     
     Returns:
         JSON response containing detailed information about the specified try.
@@ -317,7 +338,7 @@ async def get_task_instance_try_details_tool(
     if fields: params["fields"] = ",".join(fields)
     
     # Make the request
-    response = http_utils.get_json_response(endpoint, params=params)
+    response = await airflow_instances.get_json(instance, endpoint, params=params)
     return response
 
 
@@ -326,7 +347,9 @@ async def get_task_instance_log_tool(
     dag_run_id: str,
     task_id: str,
     try_number: int,
-    full_content: bool = False
+    full_content: bool = False,
+    map_index: Optional[int] = None,
+    instance: Optional[str] = None
 ) -> dict:
     """
     Get logs for a specific task instance try.
@@ -350,6 +373,12 @@ async def get_task_instance_log_tool(
         try_number: The specific try number to get logs for (required)
         full_content: Whether to return the full log content (default: False)
                       When False, returns a truncated version for performance
+        map_index: Map index of a mapped task instance (default: the unmapped task instance)
+        instance: Name of the Airflow instance to query (default: the default instance)
+    
+    When the client requests progress, the response body is forwarded as partial results and
+    the bytes received are reported as progress while the log downloads; the result is the
+    same either way.
     
     Returns:
         JSON response containing log content and metadata for the specified try.
@@ -367,9 +396,11 @@ async def get_task_instance_log_tool(
     endpoint = f"dags/{dag_id}/dagRuns/{dag_run_id}/taskInstances/{task_id}/logs/{try_number}"
     
     # Build query params
-    params: Dict[str, Union[str, bool]] = {}
+    params: Dict[str, Union[str, bool, int]] = {}
     if full_content is not None: params["full_content"] = bool(full_content)
+    if map_index is not None and map_index >= 0: params["map_index"] = int(map_index)
     
-    # Make the request
-    response = http_utils.get_json_response(endpoint, params=params)
-    return response
+    # Clients that listen for progress see the download advance
+    return await ProgressStream("get_task_instance_log").fetch_json(
+        airflow_instances.get(instance), endpoint, params=params
+    )
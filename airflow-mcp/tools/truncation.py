@@ -0,0 +1,322 @@
+import functools
+import inspect
+import os
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Annotated, Any, Callable, Dict, List, Optional, Tuple
+
+from pydantic import Field
+
+import json_codec
+from credentials import current_identity
+from clients import shared_store
+from schema import load_schema
+
+
+# ============================================================================
+# Truncated Output Schema
+# ============================================================================
+
+TRUNCATED_OUTPUT_SCHEMA = load_schema("commons/truncated_output")
+TRUNCATION_MARKER_SCHEMA = load_schema("commons/truncation_marker")
+
+DEFAULT_MAX_BYTES = int(os.getenv("MCP_TOOL_MAX_BYTES", "32768"))
+BYTES_PER_TOKEN = 4
+CURSOR_STORE_SIZE = int(os.getenv("MCP_TRUNCATION_CURSORS", "64"))
+
+IMPORTANT_STATES = {"failed", "upstream_failed", "up_for_retry", "error"}
+ERROR_LINE_PATTERN = re.compile(r"(ERROR|CRITICAL|Traceback|Exception|Error:)")
+
+# Shortened strings and lists listed in a truncation marker, and top-level keys in its summary
+MAX_ELIDED_NOTES = 20
+
+# (max string length, max list items) tried in order until the payload fits the budget
+SHRINK_LEVELS: List[Tuple[int, int]] = [
+    (4096, 50), (2048, 25), (1024, 10), (512, 5), (256, 3), (128, 1),
+]
+
+
+class _CursorStore:
+    """
+    Bounded LRU of full serialized responses that were truncated, keyed by cursor id.
+    Each response belongs to the identity that produced it and is only returned to that identity.
+    With a shared store, cursors also resolve on other worker processes.
+    """
+
+    SHARED_NAMESPACE = "cursor"
+    SHARED_TTL = 3600
+
+    def __init__(self, max_entries: int, shared: Optional[Any] = None):
+        self.max_entries = max_entries
+        self.shared = shared
+        self._entries: "OrderedDict[str, Tuple[str, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, text: str, owner: str) -> str:
+        key = uuid.uuid4().hex[:16]
+        with self._lock:
+            self._entries[key] = (owner, text)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        if self.shared is not None:
+            self.shared.set(self.SHARED_NAMESPACE, key, json_codec.dumps([owner, text]).encode("utf-8"), self.SHARED_TTL)
+        return key
+
+    def get(self, key: str, owner: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None and self.shared is not None:
+            data = self.shared.get(self.SHARED_NAMESPACE, key)
+            entry = tuple(json_codec.loads(data)) if data is not None else None
+        if entry is None or entry[0] != owner:
+            return None
+        return entry[1]
+
+
+cursor_store = _CursorStore(CURSOR_STORE_SIZE, shared_store)
+
+
+def _dumps(payload: Any) -> str:
+    return json_codec.dumps(payload)
+
+
+def resolve_budget(max_bytes: Optional[int], max_tokens: Optional[int]) -> Optional[int]:
+    """
+    Turn the caller's byte and token budgets into a single byte budget.
+    Tokens are approximated as BYTES_PER_TOKEN bytes. A non-positive budget disables truncation.
+    """
+    candidates = [b for b in (max_bytes, max_tokens * BYTES_PER_TOKEN if max_tokens else None) if b is not None]
+    budget = min(candidates) if candidates else DEFAULT_MAX_BYTES
+    return budget if budget > 0 else None
+
+
+def _is_important(item: Any) -> bool:
+    """Errors and failed items are kept when a list has to be shortened."""
+    if not isinstance(item, dict):
+        return False
+    if str(item.get("state", "")).lower() in IMPORTANT_STATES:
+        return True
+    return any(item.get(key) for key in ("error", "errors", "exception", "stack_trace"))
+
+
+def _elide_string(text: str, max_chars: int, path: str, notes: List[Dict[str, Any]]) -> str:
+    """Keep the head and tail of a long string and any error lines from the elided middle."""
+    if len(text) <= max_chars:
+        return text
+    head, tail = text[: max_chars // 2], text[-(max_chars // 4):]
+    middle = text[len(head): len(text) - len(tail)]
+    kept_errors: List[str] = []
+    error_budget = max_chars // 4
+    for line in middle.splitlines():
+        if ERROR_LINE_PATTERN.search(line) and len(line) <= error_budget:
+            kept_errors.append(line)
+            error_budget -= len(line) + 1
+    notes.append({"path": path, "kind": "string", "original_length": len(text), "kept_error_lines": len(kept_errors)})
+    marker = f"\n...[{len(middle)} chars elided]...\n"
+    if kept_errors:
+        marker = marker + "\n".join(kept_errors) + marker
+    return head + marker + tail
+
+
+def _shrink_list(items: List[Any], max_items: int, path: str, notes: List[Dict[str, Any]]) -> List[Any]:
+    """Keep important items first, then the leading items, and summarize what was dropped."""
+    if len(items) <= max_items:
+        return items
+    important = [i for i, item in enumerate(items) if _is_important(item)]
+    important_set = set(important)
+    others = [i for i in range(len(items)) if i not in important_set]
+    kept_indexes = sorted((important + others)[:max_items])
+    kept = set(kept_indexes)
+    summary: Dict[str, int] = {}
+    for i, item in enumerate(items):
+        if i not in kept:
+            key = str(item.get("state")) if isinstance(item, dict) and "state" in item else type(item).__name__
+            summary[key] = summary.get(key, 0) + 1
+    notes.append({
+        "path": path,
+        "kind": "list",
+        "original_length": len(items),
+        "kept": len(kept_indexes),
+        "omitted_by_state": summary,
+    })
+    return [items[i] for i in kept_indexes]
+
+
+def _shrink(node: Any, max_chars: int, max_items: int, path: str, notes: List[Dict[str, Any]]) -> Any:
+    if isinstance(node, str):
+        return _elide_string(node, max_chars, path, notes)
+    if isinstance(node, list):
+        node = _shrink_list(node, max_items, path, notes)
+        return [_shrink(item, max_chars, max_items, f"{path}[{i}]", notes) for i, item in enumerate(node)]
+    if isinstance(node, dict):
+        return {k: _shrink(v, max_chars, max_items, f"{path}.{k}", notes) for k, v in node.items()}
+    return node
+
+
+def _skeleton(node: Any) -> Any:
+    """The structure of a response with its strings and lists emptied, so it still has every key."""
+    if isinstance(node, str):
+        return ""
+    if isinstance(node, list):
+        return []
+    if isinstance(node, dict):
+        return {k: _skeleton(v) for k, v in node.items()}
+    return node
+
+
+def _summary(payload: Dict[str, Any]) -> Dict[str, str]:
+    """What each top-level field of a response held, for a response cut down to its skeleton."""
+    summary = {}
+    for key, value in list(payload.items())[:MAX_ELIDED_NOTES]:
+        if isinstance(value, str):
+            summary[key] = f"string of {len(value)} chars"
+        elif isinstance(value, list):
+            summary[key] = f"list of {len(value)} items"
+        elif isinstance(value, dict):
+            summary[key] = f"object with {len(value)} keys"
+    return summary
+
+
+def _fits(payload: Any, budget: int) -> bool:
+    return len(_dumps(payload).encode("utf-8")) <= budget
+
+
+def apply_budget(payload: Any, budget: Optional[int]) -> Any:
+    """
+    Cut a tool response down to the byte budget, truncation marker included.
+
+    Long strings lose their middle (error lines are kept), long lists keep failed items and
+    their leading items, and what was dropped is listed in a `truncation` marker together
+    with a cursor for get_truncated_output. When no shrink level fits, the response keeps
+    only its skeleton (every key, with strings and lists emptied) and a summary, or only the
+    marker for the smallest budgets. Only object responses are truncated.
+    """
+    if budget is None or not isinstance(payload, dict):
+        return payload
+    full_text = _dumps(payload)
+    original_bytes = len(full_text.encode("utf-8"))
+    if original_bytes <= budget:
+        return payload
+
+    cursor = f"{cursor_store.put(full_text, current_identity())}:0"
+
+    def marker(notes: List[Dict[str, Any]], summary: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        truncation = {
+            "truncated": True,
+            "original_bytes": original_bytes,
+            "budget_bytes": budget,
+            "elided": notes[:MAX_ELIDED_NOTES],
+            "cursor": cursor,
+            "hint": "Call get_truncated_output with this cursor to read the full response in chunks.",
+        }
+        if len(notes) > MAX_ELIDED_NOTES:
+            truncation["elided_total"] = len(notes)
+        if summary:
+            truncation["summary"] = summary
+        return truncation
+
+    for max_chars, max_items in SHRINK_LEVELS:
+        notes: List[Dict[str, Any]] = []
+        shrunk = _shrink(payload, max_chars, max_items, "$", notes)
+        shrunk["truncation"] = marker(notes)
+        if _fits(shrunk, budget):
+            return shrunk
+
+    # Nothing fits: keep the shape of the response, the data stays behind the cursor
+    skeleton = _skeleton(payload)
+    skeleton["truncation"] = marker([], _summary(payload))
+    if _fits(skeleton, budget):
+        return skeleton
+    minimal = {"truncation": marker([], _summary(payload))}
+    return minimal if _fits(minimal, budget) else {"truncation": marker([])}
+
+
+def with_output_budget(handler: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Wrap a tool handler so it accepts max_bytes/max_tokens and truncates its response to fit.
+    The wrapper advertises the handler's own parameters plus the two budget parameters.
+    """
+    @functools.wraps(handler)
+    async def wrapper(*args, max_bytes: Optional[int] = None, max_tokens: Optional[int] = None, **kwargs):
+        result = await handler(*args, **kwargs)
+        return apply_budget(result, resolve_budget(max_bytes, max_tokens))
+
+    budget_params = {
+        "max_bytes": Annotated[Optional[int], Field(
+            description=f"Maximum response size in bytes (default: {DEFAULT_MAX_BYTES}, 0 disables truncation)"
+        )],
+        "max_tokens": Annotated[Optional[int], Field(
+            description="Maximum response size in tokens, approximated as 4 bytes per token"
+        )],
+    }
+    signature = inspect.signature(handler)
+    wrapper.__signature__ = signature.replace(parameters=[
+        *signature.parameters.values(),
+        *[
+            inspect.Parameter(name, inspect.Parameter.KEYWORD_ONLY, default=None, annotation=annotation)
+            for name, annotation in budget_params.items()
+        ],
+    ])
+    wrapper.__annotations__ = {**handler.__annotations__, **budget_params}
+    return wrapper
+
+
+def with_truncation_marker(output_schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a copy of an object output schema that also allows the `truncation` marker."""
+    if output_schema.get("type") != "object":
+        return output_schema
+    properties = {**output_schema.get("properties", {}), "truncation": TRUNCATION_MARKER_SCHEMA}
+    return {**output_schema, "properties": properties}
+
+
+async def get_truncated_output_tool(
+    cursor: str,
+    max_bytes: int = DEFAULT_MAX_BYTES
+) -> Dict[str, Any]:
+    """
+    Read the full JSON of a truncated tool response in chunks.
+
+    When a tool response exceeds its byte budget it is returned with a `truncation` marker
+    containing a cursor. Pass that cursor here to read the original, untruncated response
+    as JSON text, one chunk at a time. Chunks are cut between characters, so a chunk holding
+    a single multi-byte character may exceed max_bytes.
+
+    Args:
+        cursor: The cursor from a `truncation` marker or from next_cursor of a previous call (required)
+        max_bytes: Maximum chunk size to return, in UTF-8 bytes (default: 32768)
+
+    Returns:
+        JSON response containing:
+        - content: The next chunk of the original response JSON
+        - offset: Byte position of this chunk in the original response
+        - total_length: Length of the original response JSON in bytes
+        - next_cursor: Cursor for the following chunk, or null when this is the last chunk
+    """
+    key, _, offset_text = cursor.partition(":")
+    text = cursor_store.get(key, current_identity())
+    if text is None:
+        raise ValueError(f"Cursor {cursor} has expired or is unknown; call the original tool again")
+    data = text.encode("utf-8")
+    offset = int(offset_text or 0)
+    end = min(len(data), offset + max(1, int(max_bytes)))
+    # Back off to the start of a character, or take the whole first one when it alone is over budget
+    while end < len(data) and _is_continuation_byte(data[end]):
+        end -= 1
+    if end <= offset:
+        end = offset + 1
+        while end < len(data) and _is_continuation_byte(data[end]):
+            end += 1
+    return {
+        "content": data[offset:end].decode("utf-8"),
+        "offset": offset,
+        "total_length": len(data),
+        "next_cursor": f"{key}:{end}" if end < len(data) else None,
+    }
+
+
+def _is_continuation_byte(byte: int) -> bool:
+    return byte & 0xC0 == 0x80
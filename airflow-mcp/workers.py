@@ -0,0 +1,194 @@
+import itertools
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from shared_cache import DEFAULT_SQLITE_PATH
+
+
+WORKER_BASE_PORT = int(os.getenv("MCP_WORKER_BASE_PORT", "3100"))
+# Headers that describe a single connection and must not be forwarded
+HOP_BY_HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailers", "transfer-encoding", "upgrade", "host", "content-length",
+}
+
+
+def _exit_with_parent(parent_pid: int) -> None:
+    """Shut the worker down once the launcher is gone, however it exited."""
+    while os.getppid() == parent_pid:
+        time.sleep(1)
+    os.kill(os.getpid(), signal.SIGTERM)
+
+
+def run_worker(index: int, transport: str, port: int, log_level: str, parent_pid: int) -> None:
+    """
+    Entry point of one worker process: the regular MCP server on an internal port.
+
+    SSE workers post messages under /messages/<index>/, so the proxy can route a session's
+    messages to the worker holding its stream. Streamable HTTP workers run stateless, so
+    any worker can serve any request.
+    """
+    threading.Thread(target=_exit_with_parent, args=(parent_pid,), daemon=True).start()
+    os.environ["MCP_WORKER_INDEX"] = str(index)
+    from fastmcp.server.http import create_sse_app
+    from server import mcp
+
+    if transport == "sse":
+        app = create_sse_app(server=mcp, message_path=f"/messages/{index}/", sse_path="/sse")
+    else:
+        app = mcp.http_app(transport="http", stateless_http=True)
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level=log_level)
+
+
+class _ClosingStreamingResponse(StreamingResponse):
+    """Streaming response that closes its body when the client disconnects mid-chunk too."""
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.body_iterator.aclose()
+
+
+class AffinityProxy:
+    """
+    Front for the worker processes, listening on the public MCP port.
+
+    New SSE streams go to the worker with the fewest open streams, and messages for a
+    session go to the worker named in their /messages/<index>/ path. All other requests
+    (streamable HTTP, health checks) are spread round-robin. /metrics merges the metrics
+    of all workers, each series labelled with its worker.
+
+    Args:
+        ports: Internal port of each worker, in worker index order
+    """
+
+    def __init__(self, ports: List[int]):
+        self.ports = ports
+        self.open_streams = [0] * len(ports)
+        self._next = itertools.cycle(range(len(ports)))
+        self.client = httpx.AsyncClient(timeout=httpx.Timeout(None, connect=5.0))
+        self.app = Starlette(
+            routes=[
+                Route("/sse", self.sse, methods=["GET"]),
+                Route("/messages/{index:int}/", self.messages, methods=["POST"]),
+                Route("/metrics", self.metrics, methods=["GET"]),
+                Route("/{path:path}", self.round_robin, methods=["GET", "POST", "DELETE"]),
+            ],
+            on_shutdown=[self.client.aclose],
+        )
+
+    async def _forward(self, request: Request, index: int, on_close=None) -> Response:
+        headers = [(k, v) for k, v in request.headers.items() if k.lower() not in HOP_BY_HOP_HEADERS]
+        upstream_request = self.client.build_request(
+            request.method,
+            f"http://127.0.0.1:{self.ports[index]}{request.url.path}",
+            params=request.query_params,
+            headers=headers,
+            content=await request.body(),
+        )
+        try:
+            upstream = await self.client.send(upstream_request, stream=True)
+        except httpx.TransportError:
+            if on_close is not None:
+                on_close()
+            return PlainTextResponse(f"MCP worker {index} is unavailable", status_code=503)
+
+        async def body():
+            # Runs when the stream ends, fails or the client disconnects, unlike a background task
+            try:
+                async for chunk in upstream.aiter_raw():
+                    yield chunk
+            finally:
+                if on_close is not None:
+                    on_close()
+                await upstream.aclose()
+
+        return _ClosingStreamingResponse(
+            body(),
+            status_code=upstream.status_code,
+            headers={k: v for k, v in upstream.headers.items() if k.lower() not in HOP_BY_HOP_HEADERS},
+        )
+
+    async def sse(self, request: Request) -> Response:
+        index = min(range(len(self.ports)), key=lambda i: self.open_streams[i])
+        self.open_streams[index] += 1
+
+        def closed() -> None:
+            self.open_streams[index] -= 1
+
+        return await self._forward(request, index, on_close=closed)
+
+    async def messages(self, request: Request) -> Response:
+        index = request.path_params["index"]
+        if index >= len(self.ports):
+            return PlainTextResponse(f"Unknown MCP worker {index}", status_code=404)
+        return await self._forward(request, index)
+
+    async def round_robin(self, request: Request) -> Response:
+        return await self._forward(request, next(self._next))
+
+    async def metrics(self, request: Request) -> PlainTextResponse:
+        # Series of the same metric must stay together, so group them under their TYPE line
+        families: "OrderedDict[str, Tuple[str, List[str]]]" = OrderedDict()
+        for port in self.ports:
+            try:
+                response = await self.client.get(f"http://127.0.0.1:{port}/metrics")
+            except httpx.TransportError:
+                continue
+            name = ""
+            for line in response.text.splitlines():
+                if line.startswith("# TYPE "):
+                    name = line.split()[2]
+                    families.setdefault(name, (line, []))
+                elif line and name:
+                    families[name][1].append(line)
+        lines = [line for type_line, series in families.values() for line in (type_line, *series)]
+        return PlainTextResponse("\n".join(lines) + "\n")
+
+
+def run_workers(transport: str, host: str, port: int, log_level: str, workers: int) -> None:
+    """
+    Run `workers` server processes behind an affinity proxy on host:port.
+
+    Workers share the HTTP response cache and truncation cursors through MCP_SHARED_CACHE_URL,
+    which defaults to a SQLite file in a directory private to the server's user, so one worker's
+    Airflow responses are reused by the others, served without revalidation for
+    MCP_HTTP_CACHE_TTL seconds (default: 5). Each worker gets 1/workers of the upstream
+    concurrency limits and retry budget floor, so the workers together stay within them.
+    """
+    if transport not in ("sse", "http", "streamable-http"):
+        raise ValueError(f"MCP_WORKERS > 1 needs the sse or http transport, not '{transport}'")
+    os.environ.setdefault("MCP_SHARED_CACHE_URL", f"sqlite:///{DEFAULT_SQLITE_PATH}")
+    # A worker's fresh responses are reused by the others without asking Airflow
+    os.environ.setdefault("MCP_HTTP_CACHE_TTL", "5")
+    # Each worker takes its share of the upstream limits
+    os.environ["MCP_WORKER_COUNT"] = str(workers)
+
+    ports = [WORKER_BASE_PORT + index for index in range(workers)]
+    context = multiprocessing.get_context("spawn")
+    processes: Dict[int, multiprocessing.Process] = {}
+    for index, worker_port in enumerate(ports):
+        processes[index] = context.Process(
+            target=run_worker, args=(index, transport, worker_port, log_level, os.getpid()), daemon=True
+        )
+        processes[index].start()
+    try:
+        uvicorn.run(AffinityProxy(ports).app, host=host, port=port, log_level=log_level)
+    finally:
+        for process in processes.values():
+            process.terminate()
+        for process in processes.values():
+            process.join(timeout=10)
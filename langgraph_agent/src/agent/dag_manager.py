@@ -1,32 +1,197 @@
-from langchain_mcp_adapters.client import MultiServerMCPClient
-# from langgraph.prebuilt import create_react_agent  # Temporarily disabled due to import issue
-from langgraph.prebuilt import create_react_agent
-import os
+"""DAG manager agent: a ReAct agent over the tools of the Airflow MCP server.
+
+Nothing connects or builds at import. The MCP tools are loaded on first use over one
+session that stays open for the life of the process, and the agent is compiled once on
+top of them; both are reused by every invocation of the graph.
+"""
+
 import asyncio
+import json
+import logging
+import os
+from typing import TYPE_CHECKING, Any, AsyncContextManager, Dict, List, Optional
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph import add_messages
+from typing_extensions import Annotated, TypedDict
+
+if TYPE_CHECKING:
+    from langchain_core.tools import BaseTool
+    from langgraph.graph.state import CompiledStateGraph
+    from mcp import ClientSession
+
+logger = logging.getLogger(__name__)
 
 # Configuration
 AIRFLOW_MCP_URL = os.getenv("AIRFLOW_MCP_URL", "http://localhost:8000/sse")
 DAGMANAGER_LLM = os.getenv("DAGMANAGER_LLM", "google_genai:gemini-2.0-flash")
+MCP_SERVER_NAME = "airflow"
+
+DAG_MANAGER_PROMPT = """You are the DAG Manager for Apache Airflow.
+
+Use the Airflow MCP tools to answer questions about DAGs, DAG runs, task instances,
+their logs and the health of the Airflow deployment. Look things up instead of guessing,
+request independent tool calls together, and when something failed, explain the cause
+and suggest a fix. Keep answers concise and cite the DAG, run and task IDs you used."""
+
+
+class DagManagerState(TypedDict):
+    """Conversation handled by the DAG manager node."""
+
+    # add_messages upserts messages by ID and deletes those named by a RemoveMessage
+    messages: Annotated[List[Any], add_messages]
+
+
+class MCPToolLoader:
+    """Loads the tools of an MCP server once and keeps their session open.
+
+    Tools loaded by ``MultiServerMCPClient.get_tools()`` open a new connection for every
+    call. Here a background task holds one session for the life of the process and the
+    tools are bound to it, so invocations share the connection. Concurrent callers wait
+    for a single load, and if the session drops, the next ``get_tools()`` reconnects.
+    """
+
+    def __init__(self, url: str = AIRFLOW_MCP_URL, server_name: str = MCP_SERVER_NAME):
+        """Configure the loader; nothing connects until ``get_tools()`` is awaited."""
+        self.url = url
+        self.server_name = server_name
+        self._tools: Optional[List[BaseTool]] = None
+        self._holder: Optional[asyncio.Task[None]] = None
+        self._closing: Optional[asyncio.Event] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def session(self) -> AsyncContextManager["ClientSession"]:
+        """Open an initialized session to the server."""
+        from langchain_mcp_adapters.client import MultiServerMCPClient
+
+        client = MultiServerMCPClient(
+            {self.server_name: {"url": self.url, "transport": "sse"}}
+        )
+        session: AsyncContextManager[ClientSession] = client.session(self.server_name)
+        return session
+
+    async def load_tools(self, session: "ClientSession") -> List["BaseTool"]:
+        """List the server's tools as LangChain tools bound to ``session``."""
+        from langchain_mcp_adapters.tools import load_mcp_tools
+
+        tools: List[BaseTool] = await load_mcp_tools(session)
+        return tools
+
+    async def get_tools(self) -> List["BaseTool"]:
+        """Return the server's tools, connecting on the first call."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # A session and lock belong to the event loop they were created in
+            self._discard_session()
+            self._loop, self._lock = loop, asyncio.Lock()
+        assert self._lock is not None
+        async with self._lock:
+            if self._tools is None or self._holder is None or self._holder.done():
+                self._tools = await self._connect()
+            return self._tools
+
+    async def call(self, name: str, **arguments: Any) -> Any:
+        """Call one tool outside of an agent and return its result, parsed from JSON when possible."""
+        tool = next(
+            (tool for tool in await self.get_tools() if tool.name == name), None
+        )
+        if tool is None:
+            raise LookupError(f"The MCP server has no tool named {name}")
+        result = await tool.ainvoke(arguments)
+        if isinstance(result, list):
+            result = "".join(str(part) for part in result)
+        try:
+            return json.loads(result)
+        except (TypeError, ValueError):
+            return result
+
+    async def _connect(self) -> List["BaseTool"]:
+        loaded: asyncio.Future[List[BaseTool]] = (
+            asyncio.get_running_loop().create_future()
+        )
+        closing = self._closing = asyncio.Event()
+
+        async def hold() -> None:
+            # anyio requires the session to be entered and exited in the same task
+            try:
+                async with self.session() as session:
+                    loaded.set_result(await self.load_tools(session))
+                    await closing.wait()
+            except Exception as e:
+                if not loaded.done():
+                    loaded.set_exception(e)
+                else:
+                    logger.warning(
+                        "MCP session to %s closed, reconnecting on next use: %s",
+                        self.url,
+                        e,
+                    )
+            finally:
+                if not loaded.done():
+                    loaded.cancel()
+
+        self._holder = asyncio.create_task(hold())
+        tools = await loaded
+        logger.info("Loaded %d MCP tools from %s", len(tools), self.url)
+        return tools
+
+    def _discard_session(self) -> None:
+        """Let the session of the previous event loop close in that loop and forget it."""
+        if (
+            self._closing is not None
+            and self._loop is not None
+            and not self._loop.is_closed()
+        ):
+            self._loop.call_soon_threadsafe(self._closing.set)
+        self._tools, self._holder, self._closing = None, None, None
+
+    async def close(self) -> None:
+        """Close the session; the next ``get_tools()`` call reconnects."""
+        if self._closing is not None:
+            self._closing.set()
+        if self._holder is not None and not self._holder.done():
+            await self._holder
+        self._tools, self._holder = None, None
+
+
+TOOL_LOADER = MCPToolLoader()
+
+_agent: Optional["CompiledStateGraph[Any, Any, Any, Any]"] = None
+_agent_tools: Optional[List["BaseTool"]] = None
+
+
+def build_dag_manager_agent(
+    tools: List["BaseTool"],
+) -> "CompiledStateGraph[Any, Any, Any, Any]":
+    """Compile the DAG manager ReAct agent over ``tools``."""
+    from langchain.chat_models import init_chat_model
+    from langgraph.prebuilt import create_react_agent
+
+    return create_react_agent(
+        init_chat_model(DAGMANAGER_LLM),
+        tools,
+        prompt=DAG_MANAGER_PROMPT,
+        name="dag_manager",
+    )
+
+
+async def create_dag_manager_agent() -> "CompiledStateGraph[Any, Any, Any, Any]":
+    """Return the DAG manager agent, loading the MCP tools and compiling it on first use.
+
+    The agent is cached and only compiled again when the tools were reloaded after the
+    MCP session dropped.
+    """
+    global _agent, _agent_tools
+    tools = await TOOL_LOADER.get_tools()
+    if _agent is None or _agent_tools is not tools:
+        _agent, _agent_tools = build_dag_manager_agent(tools), tools
+    return _agent
+
 
-# Initialize MCP client
-client = MultiServerMCPClient({
-    "airflow": {
-        "url": AIRFLOW_MCP_URL,
-        "transport": "sse",
-    }
-})
-
-async def create_dag_manager_agent():
-    """Temporary simple agent implementation to avoid import issues."""
-    # Skip tools loading for now to avoid connection errors
-    # tools = await client.get_tools()
-    
-    # Simple agent function that just returns a basic response
-    async def simple_agent(state):
-        messages = state.get("messages", [])
-        # For now, just return a simple response
-        return {
-            "messages": messages + [{"role": "assistant", "content": "DAG Manager agent is ready (temporary implementation)"}]
-        }
-    
-    return simple_agent
\ No newline at end of file
+async def dag_manager(state: DagManagerState, config: RunnableConfig) -> Dict[str, Any]:
+    """Graph node: run the DAG manager agent on the conversation and return its new messages."""
+    agent = await create_dag_manager_agent()
+    messages = state["messages"]
+    result = await agent.ainvoke({"messages": messages}, config)
+    return {"messages": result["messages"][len(messages) :]}
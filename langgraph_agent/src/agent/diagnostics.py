@@ -0,0 +1,446 @@
+"""Failed DAG run diagnostics: a fan-out graph over the Airflow MCP tools.
+
+The retrieval branches run concurrently and merge into a deterministic analysis node::
+
+    START ─┬─> fetch_run ──> fetch_task_instances ──> fetch_logs ─┬─> analyze ─> END
+           └─> fetch_source ──────────────────────────────────────┘
+
+fetch_task_instances waits for the run: its state and end date are part of the memo key,
+so a run that was cleared and failed again is read afresh. Mapped task instances are kept
+apart by their map index.
+Logs of the failed tasks are fetched concurrently. The retrieval nodes after fetch_run are
+memoized on their own inputs (DAG, run, failed task tries) for ``DIAGNOSTICS_CACHE_TTL``
+seconds, so re-running a diagnosis skips branches that were already fetched. fetch_run itself
+always runs: it is a single small request, and it finds a newer failed run as soon as there
+is one. With the local SQLite checkpointer (``diagnose()``), a diagnosis interrupted by a
+failing branch resumes from its checkpoint: completed branches are not repeated, only the
+failed one runs again.
+"""
+
+import asyncio
+import json
+import os
+import re
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.cache.base import BaseCache
+from langgraph.cache.memory import InMemoryCache
+from langgraph.graph import END, START, StateGraph, add_messages
+from langgraph.graph.state import CompiledStateGraph
+from langgraph.types import CachePolicy, RetryPolicy
+from typing_extensions import Annotated, TypedDict
+
+from src.agent.dag_manager import TOOL_LOADER
+
+if TYPE_CHECKING:
+    from langgraph.types import Checkpointer
+
+# Seconds a fetched branch is reused for the same inputs
+DIAGNOSTICS_CACHE_TTL = int(os.getenv("DIAGNOSTICS_CACHE_TTL", "300"))
+# Local SQLite file holding checkpoints and memoized branches, used by diagnose()
+DIAGNOSTICS_DB = os.getenv("DIAGNOSTICS_DB", ".langgraph_diagnostics.sqlite")
+# Failed tasks whose logs are fetched, and log lines kept around the last error
+MAX_FAILED_TASKS = int(os.getenv("DIAGNOSTICS_MAX_TASKS", "10"))
+LOG_CONTEXT_LINES = 10
+SOURCE_CONTEXT_LINES = 4
+
+FAILED_TASK_STATES = ["failed", "upstream_failed"]
+ERROR_LINE = re.compile(r"Traceback|Error|Exception|FAILED|CRITICAL")
+EXCEPTION_LINE = re.compile(r"^(?:[\w.]+\.)?\w*(?:Error|Exception|Exit|Interrupt)\b.*")
+# Tool errors worth retrying: Airflow server errors and timeouts, not bad requests
+TRANSIENT_TOOL_ERROR = re.compile(
+    r"HTTP 5\d\d|timed? ?out|temporarily|unavailable", re.IGNORECASE
+)
+
+
+class DiagnosisState(TypedDict, total=False):
+    """State of a diagnosis, filled in by the retrieval branches and the analysis."""
+
+    # Input: the DAG, and the run to diagnose (default: its latest failed run)
+    dag_id: str
+    dag_run_id: Optional[str]
+    # Written by the retrieval branches
+    dag: Dict[str, Any]
+    run: Optional[Dict[str, Any]]
+    failed_tasks: List[Dict[str, Any]]
+    logs: Dict[str, Dict[str, Any]]
+    source: Dict[str, Any]
+    # Written by the analysis
+    report: Dict[str, Any]
+    messages: Annotated[List[Any], add_messages]
+
+
+def _is_transient(exc: Exception) -> bool:
+    """Retry lost connections and transient Airflow errors, but not missing DAGs or bad arguments."""
+    import anyio
+
+    if isinstance(
+        exc,
+        (
+            ConnectionError,
+            TimeoutError,
+            anyio.ClosedResourceError,
+            anyio.BrokenResourceError,
+        ),
+    ):
+        return True
+    return bool(TRANSIENT_TOOL_ERROR.search(str(exc)))
+
+
+RETRY_POLICY = RetryPolicy(max_attempts=3, retry_on=_is_transient)
+
+
+def _run_id(state: DiagnosisState) -> Optional[str]:
+    run = state.get("run")
+    return state.get("dag_run_id") or (run or {}).get("dag_run_id")
+
+
+def _key(*parts: Any) -> str:
+    return json.dumps(parts, default=str)
+
+
+def _instance_key(ti: Dict[str, Any]) -> str:
+    """Name a task instance, with its map index when it is one of a mapped task's instances."""
+    map_index = ti.get("map_index")
+    if map_index is None or map_index < 0:
+        return str(ti["task_id"])
+    return f"{ti['task_id']}[{map_index}]"
+
+
+async def fetch_run(state: DiagnosisState) -> Dict[str, Any]:
+    """Fetch the run to diagnose, resolving the latest failed run when none is given."""
+    dag_id, dag_run_id = state["dag_id"], state.get("dag_run_id")
+    if dag_run_id:
+        try:
+            run = await TOOL_LOADER.call(
+                "get_dag_run", dag_id=dag_id, dag_run_id=dag_run_id
+            )
+        except Exception as e:
+            if _is_transient(e):
+                raise
+            return {"run": {"dag_run_id": dag_run_id, "error": str(e)}}
+        return {"run": run if isinstance(run, dict) else {"dag_run_id": dag_run_id}}
+    runs = await TOOL_LOADER.call(
+        "get_dag_runs",
+        dag_id=dag_id,
+        state=["failed"],
+        order_by="-execution_date",
+        limit=1,
+    )
+    dag_runs = runs.get("dag_runs", []) if isinstance(runs, dict) else []
+    return {"run": dag_runs[0] if dag_runs else None}
+
+
+async def fetch_task_instances(state: DiagnosisState) -> Dict[str, Any]:
+    """Fetch the failed task instances of the run."""
+    dag_run_id = _run_id(state)
+    if not dag_run_id:
+        return {"failed_tasks": []}
+    # Filtered here: the tool joins states with commas, which Airflow does not read as several states
+    result = await TOOL_LOADER.call(
+        "list_task_instances",
+        dag_id=state["dag_id"],
+        dag_run_id=dag_run_id,
+        fetch_all=True,
+    )
+    task_instances = (
+        result.get("task_instances", []) if isinstance(result, dict) else []
+    )
+    return {
+        "failed_tasks": [
+            {
+                key: ti.get(key)
+                for key in (
+                    "task_id",
+                    "map_index",
+                    "state",
+                    "try_number",
+                    "max_tries",
+                    "operator",
+                    "duration",
+                )
+            }
+            for ti in task_instances
+            if ti.get("state") in FAILED_TASK_STATES
+        ]
+    }
+
+
+def _inspected(state: DiagnosisState) -> List[Dict[str, Any]]:
+    """Failed tasks whose logs are read: those that failed on their own, not because of an upstream."""
+    return [ti for ti in state.get("failed_tasks", []) if ti.get("state") == "failed"][
+        :MAX_FAILED_TASKS
+    ]
+
+
+async def fetch_logs(state: DiagnosisState) -> Dict[str, Any]:
+    """Fetch the log of the latest try of every inspected failed task concurrently."""
+    dag_id, dag_run_id = state["dag_id"], _run_id(state)
+    tasks = _inspected(state)
+
+    async def log(ti: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            result = await TOOL_LOADER.call(
+                "get_task_instance_log",
+                dag_id=dag_id,
+                dag_run_id=dag_run_id,
+                task_id=ti["task_id"],
+                try_number=ti.get("try_number") or 1,
+                full_content=True,
+                map_index=ti.get("map_index"),
+            )
+        except Exception as e:
+            if _is_transient(e):
+                raise
+            return {"error": str(e)}
+        return {
+            "content": result.get("content", "")
+            if isinstance(result, dict)
+            else str(result)
+        }
+
+    logs = await asyncio.gather(*[log(ti) for ti in tasks])
+    return {"logs": {_instance_key(ti): entry for ti, entry in zip(tasks, logs)}}
+
+
+async def fetch_source(state: DiagnosisState) -> Dict[str, Any]:
+    """Fetch the DAG and its source file."""
+    dag = await TOOL_LOADER.call("get_dag", dag_id=state["dag_id"])
+    file_token = dag.get("file_token") if isinstance(dag, dict) else None
+    if not file_token:
+        return {"dag": dag, "source": {"error": "The DAG has no file token"}}
+    try:
+        result = await TOOL_LOADER.call("get_dag_source", file_token=file_token)
+    except Exception as e:
+        if _is_transient(e):
+            raise
+        return {"dag": dag, "source": {"error": str(e)}}
+    return {
+        "dag": dag,
+        "source": {
+            "content": result.get("content", "")
+            if isinstance(result, dict)
+            else str(result)
+        },
+    }
+
+
+def _error_window(content: str) -> Dict[str, Any]:
+    """Find the last cluster of error lines of a log with some context, and the exception it ends with."""
+    lines = content.splitlines()
+    hits = [index for index, line in enumerate(lines) if ERROR_LINE.search(line)]
+    if not hits:
+        return {}
+    first = len(hits) - 1
+    while first and hits[first] - hits[first - 1] <= LOG_CONTEXT_LINES:
+        first -= 1
+    start, end = (
+        max(0, hits[first] - LOG_CONTEXT_LINES),
+        min(len(lines), hits[-1] + LOG_CONTEXT_LINES + 1),
+    )
+    exceptions = [
+        line.strip() for line in lines[start:end] if EXCEPTION_LINE.match(line.strip())
+    ]
+    return {
+        "exception": exceptions[-1] if exceptions else lines[hits[-1]].strip(),
+        "start_line": start + 1,
+        "text": "\n".join(lines[start:end]),
+    }
+
+
+def _declaration(source: str, task_id: str) -> Optional[Dict[str, Any]]:
+    """Source lines around the declaration of a task."""
+    lines = source.splitlines()
+    pattern = re.compile(
+        rf"""task_id\s*=\s*["']{re.escape(task_id)}["']|def\s+{re.escape(task_id)}\s*\("""
+    )
+    for index, line in enumerate(lines):
+        if pattern.search(line):
+            start, end = (
+                max(0, index - SOURCE_CONTEXT_LINES),
+                min(len(lines), index + SOURCE_CONTEXT_LINES + 1),
+            )
+            return {"start_line": start + 1, "text": "\n".join(lines[start:end])}
+    return None
+
+
+def analyze(state: DiagnosisState) -> Dict[str, Any]:
+    """Merge the branches into a report: the error of each failed task, grouped into root causes."""
+    run = state.get("run")
+    logs = state.get("logs", {})
+    source = state.get("source", {}).get("content", "")
+    failed = []
+    causes: Dict[str, List[str]] = {}
+    for ti in _inspected(state):
+        entry = logs.get(_instance_key(ti), {})
+        window = _error_window(entry.get("content", ""))
+        exception = (
+            window.get("exception") or entry.get("error") or "No error found in the log"
+        )
+        causes.setdefault(exception, []).append(_instance_key(ti))
+        failed.append(
+            {
+                **ti,
+                "error": window,
+                "log_error": entry.get("error"),
+                "declaration": _declaration(source, ti["task_id"]),
+            }
+        )
+    report: Dict[str, Any] = {
+        "dag_id": state["dag_id"],
+        "dag_run_id": _run_id(state),
+        "run_state": (run or {}).get("state"),
+        "owners": state.get("dag", {}).get("owners"),
+        "failed_tasks": failed,
+        "upstream_failed": [
+            _instance_key(ti)
+            for ti in state.get("failed_tasks", [])
+            if ti.get("state") == "upstream_failed"
+        ],
+        "root_causes": [
+            {"exception": exception, "tasks": tasks}
+            for exception, tasks in causes.items()
+        ],
+        "source_error": state.get("source", {}).get("error"),
+    }
+
+    if run is None:
+        summary = f"No failed runs found for {state['dag_id']}."
+    elif not failed:
+        summary = f"Run {report['dag_run_id']} of {state['dag_id']} ({report['run_state']}) has no failed tasks."
+    else:
+        lines = [
+            f"Run {report['dag_run_id']} of {state['dag_id']} ({report['run_state']}): {len(failed)} failed task(s)."
+        ]
+        for cause in report["root_causes"]:
+            lines.append(f"- {cause['exception']} in {', '.join(cause['tasks'])}")
+        if report["upstream_failed"]:
+            lines.append(
+                f"Upstream failed as a consequence: {', '.join(report['upstream_failed'])}"
+            )
+        summary = "\n".join(lines)
+    return {"report": report, "messages": [AIMessage(content=summary)]}
+
+
+def _task_instances_key(state: DiagnosisState) -> str:
+    # A cleared run that failed again has a new state or end date, so its tasks are read again
+    run = state.get("run") or {}
+    return _key(
+        state.get("dag_id"), _run_id(state), run.get("state"), run.get("end_date")
+    )
+
+
+def _logs_key(state: DiagnosisState) -> str:
+    # A retried task has a new try, so its new log is fetched
+    return _key(
+        state.get("dag_id"),
+        _run_id(state),
+        [(_instance_key(ti), ti.get("try_number")) for ti in _inspected(state)],
+    )
+
+
+def _source_key(state: DiagnosisState) -> str:
+    return _key(state.get("dag_id"))
+
+
+def create_diagnostics_graph(
+    checkpointer: "Checkpointer" = None,
+    cache: Optional[BaseCache[Any]] = None,
+    cache_ttl: Optional[int] = DIAGNOSTICS_CACHE_TTL,
+    retry_policy: Optional[RetryPolicy] = RETRY_POLICY,
+) -> CompiledStateGraph[Any, Any, Any, Any]:
+    """Build the diagnostics graph; connects nowhere until it is invoked.
+
+    Args:
+        checkpointer: Where to checkpoint each step, so a failed diagnosis can be resumed
+        cache: Where to memoize the retrieval nodes (default: in memory)
+        cache_ttl: Seconds a memoized node result is reused
+        retry_policy: How retrieval nodes retry transient errors
+
+    Returns:
+        The compiled graph
+    """
+    workflow = StateGraph(DiagnosisState)
+
+    # The run is always fetched: memoizing the latest failed run would hide newer failures
+    workflow.add_node("fetch_run", fetch_run, retry_policy=retry_policy)
+    # Other retrieval nodes are memoized on the inputs they read, not on the whole state
+    for name, node, key in [
+        ("fetch_task_instances", fetch_task_instances, _task_instances_key),
+        ("fetch_logs", fetch_logs, _logs_key),
+        ("fetch_source", fetch_source, _source_key),
+    ]:
+        workflow.add_node(
+            name,
+            node,
+            cache_policy=CachePolicy(key_func=key, ttl=cache_ttl),
+            retry_policy=retry_policy,
+        )
+    workflow.add_node("analyze", analyze)
+
+    workflow.add_edge(START, "fetch_run")
+    workflow.add_edge(START, "fetch_source")
+    workflow.add_edge("fetch_run", "fetch_task_instances")
+    workflow.add_edge("fetch_task_instances", "fetch_logs")
+    # The analysis waits for both branches
+    workflow.add_edge(["fetch_source", "fetch_logs"], "analyze")
+    workflow.add_edge("analyze", END)
+
+    return workflow.compile(
+        checkpointer=checkpointer, cache=cache or InMemoryCache(), name="diagnostics"
+    )
+
+
+@asynccontextmanager
+async def local_diagnostics_graph(
+    path: str = DIAGNOSTICS_DB,
+) -> AsyncIterator[CompiledStateGraph[Any, Any, Any, Any]]:
+    """Open the diagnostics graph with its checkpoints and memoized nodes in a local SQLite file."""
+    from langgraph.cache.sqlite import SqliteCache
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+    async with AsyncSqliteSaver.from_conn_string(path) as checkpointer:
+        yield create_diagnostics_graph(
+            checkpointer=checkpointer, cache=SqliteCache(path=path)
+        )
+
+
+async def diagnose(
+    dag_id: str,
+    dag_run_id: Optional[str] = None,
+    thread_id: Optional[str] = None,
+    path: str = DIAGNOSTICS_DB,
+) -> Dict[str, Any]:
+    """Diagnose a failed DAG run, resuming the thread's diagnosis if it was interrupted.
+
+    Args:
+        dag_id: The DAG to diagnose
+        dag_run_id: The run to diagnose (default: the latest failed run)
+        thread_id: The checkpoint thread (default: one per DAG and run)
+        path: The SQLite file of checkpoints and memoized nodes
+
+    Returns:
+        The diagnosis report
+    """
+    config: RunnableConfig = {
+        "configurable": {
+            "thread_id": thread_id or f"{dag_id}:{dag_run_id or 'latest-failed'}"
+        }
+    }
+    async with local_diagnostics_graph(path) as graph:
+        snapshot = await graph.aget_state(config)
+        if snapshot.next:
+            # The last diagnosis stopped on a failing branch: continue from its checkpoint
+            result = await graph.ainvoke(None, config)
+        else:
+            result = await graph.ainvoke(
+                {"dag_id": dag_id, "dag_run_id": dag_run_id}, config
+            )
+    report: Dict[str, Any] = result["report"]
+    return report
+
+
+graph = create_diagnostics_graph()
@@ -1,42 +1,38 @@
-# from langgraph.prebuilt import create_react_agent  # Temporarily disabled due to import issue
-from langgraph.graph import StateGraph, END
-import asyncio
-from src.agent.dag_manager import create_dag_manager_agent
-from typing_extensions import Annotated, TypedDict
-from langgraph.graph import add_messages
-# Define the state schema for our graph
-class State(TypedDict):
-    # add_messages will default to upserting messages by ID to the existing list
-    # if a RemoveMessage is returned, it will delete the message in the list by ID
-    messages: Annotated[list, add_messages]
-
-
-async def create_graph():
+"""Main graph: the DAG manager agent answering questions about the Airflow deployment."""
+
+from typing import Any
+
+from langgraph.graph import END, StateGraph
+from langgraph.graph.state import CompiledStateGraph
+
+from src.agent.dag_manager import DagManagerState, dag_manager
+
+
+class State(DagManagerState):
+    """State of the main graph: the conversation with the DAG manager."""
+
+
+def create_graph() -> CompiledStateGraph[State, Any, State, State]:
+    """Build the graph without connecting anywhere.
+
+    The DAG manager node loads the MCP tools and compiles its agent on the first
+    request and reuses both afterwards, so this is cheap and safe to run at import,
+    with or without a running event loop.
+    """
     # Create the base graph with state schema
-    workflow = StateGraph(
-        state_schema=State
-    )
-    
-    # Create the DAG manager agent
-    dag_manager = await create_dag_manager_agent()
-    
+    workflow = StateGraph(state_schema=State)
+
     # Add the DAG manager node to the graph
     workflow.add_node("dag_manager", dag_manager)
-    
+
     # Set the entry point
     workflow.set_entry_point("dag_manager")
-    
+
     # Add edges (for now, just end after DAG manager)
     workflow.add_edge("dag_manager", END)
-    
-    
-    compiled_graph = workflow.compile()
-    
+
     # Compile the graph
-    return compiled_graph
+    return workflow.compile()
 
-async def main():
-    global graph
-    graph = await create_graph()
 
-asyncio.run(main())
\ No newline at end of file
+graph = create_graph()
@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager
+
+import pytest
+
+from agent import dag_manager
+from agent.dag_manager import MCPToolLoader
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeLoader(MCPToolLoader):
+    def __init__(self, failures: int = 0):
+        super().__init__(url="http://mcp.invalid/sse")
+        self.sessions = 0
+        self.failures = failures
+        self.closed = []
+
+    @asynccontextmanager
+    async def session(self):
+        self.sessions += 1
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("MCP server unavailable")
+        name = f"session-{self.sessions}"
+        await asyncio.sleep(0.01)
+        try:
+            yield name
+        finally:
+            self.closed.append(name)
+
+    async def load_tools(self, session):
+        return [f"{session}-tool"]
+
+
+def test_import_does_not_connect() -> None:
+    assert dag_manager.TOOL_LOADER._holder is None
+    assert dag_manager._agent is None
+
+
+async def test_tools_loaded_once_for_concurrent_callers() -> None:
+    loader = FakeLoader()
+    results = await asyncio.gather(*[loader.get_tools() for _ in range(5)])
+    assert loader.sessions == 1
+    assert all(tools is results[0] for tools in results)
+    assert await loader.get_tools() is results[0]
+    await loader.close()
+
+
+async def test_reconnects_after_session_ends() -> None:
+    loader = FakeLoader()
+    assert await loader.get_tools() == ["session-1-tool"]
+    assert loader._holder is not None
+    loader._holder.cancel()
+    await asyncio.sleep(0)
+    assert await loader.get_tools() == ["session-2-tool"]
+    await loader.close()
+
+
+async def test_failed_connection_is_retried() -> None:
+    loader = FakeLoader(failures=1)
+    with pytest.raises(ConnectionError):
+        await loader.get_tools()
+    assert await loader.get_tools() == ["session-2-tool"]
+    await loader.close()
+
+
+def test_session_of_previous_loop_is_closed() -> None:
+    loader = FakeLoader()
+    old_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=old_loop.run_forever)
+    thread.start()
+    try:
+        future = asyncio.run_coroutine_threadsafe(loader.get_tools(), old_loop)
+        assert future.result(timeout=5) == ["session-1-tool"]
+        assert asyncio.run(loader.get_tools()) == ["session-2-tool"]
+        deadline = time.monotonic() + 5
+        while "session-1" not in loader.closed and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert "session-1" in loader.closed
+    finally:
+        old_loop.call_soon_threadsafe(old_loop.stop)
+        thread.join()
+        old_loop.close()
@@ -0,0 +1,147 @@
+import asyncio
+from collections import Counter
+
+import pytest
+from langgraph.cache.memory import InMemoryCache
+from langgraph.checkpoint.memory import InMemorySaver
+
+from agent import diagnostics
+from agent.diagnostics import create_diagnostics_graph
+
+pytestmark = pytest.mark.anyio
+
+DAG_ID = "data_pipeline_etl"
+RUN_ID = "scheduled__2024-01-05T00:00:00+00:00"
+LOG = "\n".join(
+    [f"INFO - processed batch {i}" for i in range(50)]
+    + [
+        "ERROR - Task failed with exception",
+        "Traceback (most recent call last):",
+        "KeyError: 'customer_id'",
+    ]
+)
+SOURCE = 'with DAG("data_pipeline_etl") as dag:\n    transform = PythonOperator(task_id="transform")\n'
+
+
+class FakeTools:
+    def __init__(self, failures: Counter = None):
+        self.calls = Counter()
+        self.failures = failures or Counter()
+        self.run_id = RUN_ID
+        self.end_date = "2024-01-05T01:00:00+00:00"
+        self.mapped = []
+
+    async def call(self, name, **arguments):
+        self.calls[name] += 1
+        await asyncio.sleep(0)
+        if self.failures[name]:
+            self.failures[name] -= 1
+            raise ConnectionError(f"{name} failed")
+        if name == "get_dag":
+            return {"dag_id": DAG_ID, "file_token": "token", "owners": ["data-eng"]}
+        if name == "get_dag_source":
+            return {"content": SOURCE}
+        if name == "get_dag_runs":
+            return {"dag_runs": [self.run()]}
+        if name == "get_dag_run":
+            assert arguments["dag_run_id"] == self.run_id
+            return self.run()
+        if name == "list_task_instances":
+            return {
+                "task_instances": [
+                    {"task_id": "transform", "state": "failed", "try_number": 2},
+                    {"task_id": "load", "state": "upstream_failed", "try_number": 1},
+                    {"task_id": "extract", "state": "success", "try_number": 1},
+                ]
+                + self.mapped
+            }
+        if name == "get_task_instance_log":
+            if arguments.get("map_index") is not None:
+                return {
+                    "content": f"ValueError: bad partition {arguments['map_index']}"
+                }
+            return {"content": LOG}
+        raise AssertionError(name)
+
+    def run(self):
+        return {"dag_run_id": self.run_id, "state": "failed", "end_date": self.end_date}
+
+
+@pytest.fixture
+def tools(monkeypatch):
+    fake = FakeTools()
+    monkeypatch.setattr(diagnostics, "TOOL_LOADER", fake)
+    return fake
+
+
+@pytest.mark.parametrize("dag_run_id", [None, RUN_ID])
+async def test_diagnosis_report(tools, dag_run_id) -> None:
+    graph = create_diagnostics_graph(retry_policy=None)
+    result = await graph.ainvoke({"dag_id": DAG_ID, "dag_run_id": dag_run_id})
+    report = result["report"]
+    assert report["dag_run_id"] == RUN_ID
+    assert report["root_causes"] == [
+        {"exception": "KeyError: 'customer_id'", "tasks": ["transform"]}
+    ]
+    assert report["upstream_failed"] == ["load"]
+    assert 'task_id="transform"' in report["failed_tasks"][0]["declaration"]["text"]
+    assert "KeyError" in result["messages"][-1].content
+    assert tools.calls["get_task_instance_log"] == 1
+
+
+async def test_rerun_reuses_memoized_branches(tools) -> None:
+    graph = create_diagnostics_graph(cache=InMemoryCache(), retry_policy=None)
+    first = await graph.ainvoke({"dag_id": DAG_ID})
+    calls = Counter(tools.calls)
+    second = await graph.ainvoke({"dag_id": DAG_ID})
+    # Only the latest failed run is looked up again
+    assert tools.calls - calls == Counter({"get_dag_runs": 1})
+    assert second["report"] == first["report"]
+
+
+async def test_rerun_finds_newer_failed_run(tools) -> None:
+    graph = create_diagnostics_graph(cache=InMemoryCache(), retry_policy=None)
+    await graph.ainvoke({"dag_id": DAG_ID})
+    tools.run_id = "scheduled__2024-01-06T00:00:00+00:00"
+    result = await graph.ainvoke({"dag_id": DAG_ID})
+    assert result["report"]["dag_run_id"] == tools.run_id
+    assert tools.calls["get_task_instance_log"] == 2
+
+
+async def test_resume_skips_completed_branches(tools) -> None:
+    tools.failures["get_task_instance_log"] = 1
+    graph = create_diagnostics_graph(
+        checkpointer=InMemorySaver(), cache_ttl=None, retry_policy=None
+    )
+    config = {"configurable": {"thread_id": "resume"}}
+    with pytest.raises(ConnectionError):
+        await graph.ainvoke({"dag_id": DAG_ID, "dag_run_id": RUN_ID}, config)
+    assert (await graph.aget_state(config)).next == ("fetch_logs",)
+    calls = Counter(tools.calls)
+
+    result = await graph.ainvoke(None, config)
+    assert tools.calls - calls == Counter({"get_task_instance_log": 1})
+    assert result["report"]["root_causes"][0]["tasks"] == ["transform"]
+
+
+async def test_mapped_instances_are_kept_apart(tools) -> None:
+    tools.mapped = [
+        {"task_id": "partition", "state": "failed", "map_index": index, "try_number": 1}
+        for index in (0, 1)
+    ]
+    graph = create_diagnostics_graph(retry_policy=None)
+    result = await graph.ainvoke({"dag_id": DAG_ID, "dag_run_id": RUN_ID})
+    causes = {
+        cause["exception"]: cause["tasks"] for cause in result["report"]["root_causes"]
+    }
+    assert causes["ValueError: bad partition 0"] == ["partition[0]"]
+    assert causes["ValueError: bad partition 1"] == ["partition[1]"]
+    assert result["report"]["run_state"] == "failed"
+
+
+async def test_cleared_run_that_failed_again_is_read_again(tools) -> None:
+    graph = create_diagnostics_graph(cache=InMemoryCache(), retry_policy=None)
+    await graph.ainvoke({"dag_id": DAG_ID, "dag_run_id": RUN_ID})
+    tools.end_date = "2024-01-05T02:00:00+00:00"
+    await graph.ainvoke({"dag_id": DAG_ID, "dag_run_id": RUN_ID})
+    assert tools.calls["list_task_instances"] == 2